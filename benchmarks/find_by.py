@@ -0,0 +1,68 @@
+"""
+Measure the per-call overhead of BaseMixin.find_by and BaseMixin.get.
+
+Usage:
+    python3 benchmarks/find_by.py --calls 5000
+
+"before" rebuilds `select(cls).where(...)` on every call and uses the legacy `Query.get`, as the
+original implementation did. "after" uses the cached statements and the identity-map-aware `Session.get`.
+"""
+
+import argparse
+import time
+import warnings
+
+from lms.adapters import db
+from lms.app import app
+from lms.domains import User
+from tests.factories import UserFactory
+
+
+# Function to run a callable repeatedly and return the mean duration in microseconds
+def per_call(function, calls: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - started_at) / calls * 1_000_000
+
+
+# Function reproducing the original find_by, which rebuilt the statement on every call
+def find_by_uncached(**kwargs) -> User | None:
+    filters = [getattr(User, attr) == kwargs[attr] for attr in kwargs]
+    return db.session.execute(db.select(User).where(*filters)).scalars().first()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=5000, help="calls per measurement")
+    args = parser.parse_args()
+
+    with app.app_context():
+        user = UserFactory.create()
+
+        try:
+            results = {
+                "find_by before": per_call(lambda: find_by_uncached(auth_token=user.auth_token), args.calls),
+                "find_by after": per_call(lambda: User.find_by(auth_token=user.auth_token), args.calls),
+                "statement build before": per_call(
+                    lambda: db.select(User).where(User.auth_token == user.auth_token), args.calls
+                ),
+            }
+
+            # Compare the legacy Query.get with Session.get while the user is in the identity map
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                results["get before"] = per_call(lambda: User.query.get(user.id), args.calls)
+            results["get after"] = per_call(lambda: User.get(user.id), args.calls)
+        finally:
+            # Remove the seeded row
+            db.session.execute(db.delete(User).where(User.id == user.id))
+            db.session.commit()
+
+    for label, duration in results.items():
+        print(f"{label:>24}: {duration:8.1f}us per call")
+
+
+# Main entry point for the script
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Measure GET /grades/export for a module with 1M grades (10,000 students x 100 assignments).
+
+Usage:
+    python3 benchmarks/grade_export.py --students 10000 --assignments 100
+
+"buffered" fetches every row and builds the whole CSV file before it could be returned. "streamed" reads the
+export response chunk by chunk. Reports the time to the first byte, the total time,
+and the tracemalloc peak over a separate run.
+"""
+
+import argparse
+import csv
+import io
+import secrets
+import time
+import tracemalloc
+
+from datetime import datetime
+
+from sqlalchemy import text
+
+from lms.adapters import db
+from lms.app import app
+from lms.domains import Assignment, Grade, Module, User
+from lms.domains.grade.grade_service import EXPORT_COLUMNS
+from tests.factories import TeacherFactory
+
+
+# Function to build the CSV export in memory from every row at once
+def buffered(module_id: int) -> tuple[None, int]:
+    rows = db.session.execute(
+        db.select(
+            Grade.id,
+            Grade.student_id,
+            Grade.assignment_id,
+            Assignment.module_id,
+            Grade.score,
+            Grade.created_at,
+            Grade.updated_at,
+        )
+        .join(Assignment, Assignment.id == Grade.assignment_id)
+        .where(Assignment.module_id == module_id)
+        .order_by(Grade.id)
+    ).all()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows)
+    return None, len(buffer.getvalue().encode())
+
+
+# Function to read the streamed export, returning the time to its first chunk and its size
+def streamed(client, module_id: int, headers: dict[str, str]) -> tuple[float, int]:
+    started_at = time.perf_counter()
+    response = client.get(f"/grades/export?module_id={module_id}", headers=headers, buffered=False)
+    first_byte, size = None, 0
+    for chunk in response.response:
+        first_byte = first_byte or time.perf_counter() - started_at
+        size += len(chunk)
+    response.close()
+    return first_byte, size
+
+
+# Function to run an export twice: once timed, once under tracemalloc
+def measure(function) -> tuple[float, float, float, int]:
+    started_at = time.perf_counter()
+    first_byte, size = function()
+    duration = time.perf_counter() - started_at
+    db.session.expunge_all()
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_byte or duration, duration, peak / 1024 / 1024, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=10_000, help="students graded in the module")
+    parser.add_argument("--assignments", type=int, default=100, help="assignments in the module")
+    args = parser.parse_args()
+
+    with app.app_context():
+        # Seed a teacher, a module with its assignments, the students, and a grade for every pair in one statement
+        prefix = f"bench-{secrets.token_hex(4)}"
+        teacher = TeacherFactory.create()
+        module = Module.create(title=prefix, description="", teacher_id=teacher.id)
+        assignment_ids = db.session.scalars(
+            db.insert(Assignment).returning(Assignment.id),
+            [
+                {"title": f"{prefix} {index}", "description": "", "module_id": module.id}
+                for index in range(args.assignments)
+            ],
+        ).all()
+        student_ids = db.session.scalars(
+            db.insert(User).returning(User.id),
+            [
+                {
+                    "username": f"{prefix}-{index}",
+                    "password": "x",
+                    "role_id": 3,
+                    "first_name": "First",
+                    "last_name": "Last",
+                    "email": f"{prefix}-{index}@example.com",
+                }
+                for index in range(args.students)
+            ],
+        ).all()
+        db.session.execute(
+            text(
+                "INSERT INTO grades (student_id, assignment_id, score) "
+                "SELECT s, a, (s + a) % 101 FROM unnest(:students) AS s CROSS JOIN unnest(:assignments) AS a"
+            ),
+            {"students": student_ids, "assignments": assignment_ids},
+        )
+        db.session.commit()
+        module_id, token = module.id, teacher.auth_token
+
+        try:
+            client = app.test_client()
+            headers = {"Authorization": f"Bearer {token}"}
+            results = {
+                "buffered": measure(lambda: buffered(module_id)),
+                "streamed": measure(lambda: streamed(client, module_id, headers)),
+            }
+        finally:
+            # Remove the seeded rows; grades and assignments go with their student and module
+            db.session.execute(db.delete(User).where(User.id.in_(student_ids)))
+            db.session.execute(db.delete(Module).where(Module.id == module_id))
+            db.session.execute(db.delete(User).where(User.id == teacher.id))
+            db.session.commit()
+
+    print(f"export: {args.students * args.assignments} grades")
+    for label, (first_byte, duration, peak, size) in results.items():
+        print(
+            f"{label:>9}: first byte={first_byte * 1000:9.1f}ms total={duration:6.2f}s "
+            f"peak={peak:8.1f}MiB size={size / 1024 / 1024:6.1f}MiB"
+        )
+
+
+# Main entry point for the script
+if __name__ == "__main__":
+    main()
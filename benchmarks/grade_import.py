@@ -0,0 +1,134 @@
+"""
+Measure importing 100k grades through POST /grades/bulk against one POST /grades/create per grade.
+
+Usage:
+    python3 benchmarks/grade_import.py --students 2000 --assignments 50 --sample 500
+
+The per-grade endpoint is timed on a sample of grades and extrapolated to the whole file. The bulk endpoint
+imports every grade from a CSV file (creating those the sample did not), then updates them all from an NDJSON file.
+Memory is the tracemalloc peak while the server handles the bulk request.
+"""
+
+import argparse
+import io
+import json
+import secrets
+import time
+import tracemalloc
+
+from lms.adapters import db
+from lms.app import app
+from lms.domains import Assignment, Module, User
+from tests.factories import TeacherFactory
+
+
+# Function to time one request, returning the response, its duration in seconds and the tracemalloc peak in MiB
+def timed(function) -> tuple:
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    response = function()
+    duration = time.perf_counter() - started_at
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return response, duration, peak / 1024 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=2000, help="students to grade")
+    parser.add_argument("--assignments", type=int, default=50, help="assignments graded for every student")
+    parser.add_argument("--sample", type=int, default=500, help="grades submitted one request at a time")
+    args = parser.parse_args()
+
+    with app.app_context():
+        # Seed a teacher, a module with its assignments, and the students
+        prefix = f"bench-{secrets.token_hex(4)}"
+        teacher = TeacherFactory.create()
+        module = Module.create(title=prefix, description="", teacher_id=teacher.id)
+        assignment_ids = db.session.scalars(
+            db.insert(Assignment).returning(Assignment.id),
+            [
+                {"title": f"{prefix} {index}", "description": "", "module_id": module.id}
+                for index in range(args.assignments)
+            ],
+        ).all()
+        student_ids = db.session.scalars(
+            db.insert(User).returning(User.id),
+            [
+                {
+                    "username": f"{prefix}-{index}",
+                    "password": "x",
+                    "role_id": 3,
+                    "first_name": "First",
+                    "last_name": "Last",
+                    "email": f"{prefix}-{index}@example.com",
+                }
+                for index in range(args.students)
+            ],
+        ).all()
+        db.session.commit()
+        module_id, token = module.id, teacher.auth_token
+        grades = [
+            (student_id, assignment_id, (student_id * assignment_id) % 101)
+            for student_id in student_ids
+            for assignment_id in assignment_ids
+        ]
+
+        # Build both files before timing anything
+        csv_body = (
+            "student_id,assignment_id,score\n" + "".join(f"{s},{a},{score}\n" for s, a, score in grades)
+        ).encode()
+        ndjson_body = "".join(
+            json.dumps({"student_id": s, "assignment_id": a, "score": score + 0.5}) + "\n" for s, a, score in grades
+        ).encode()
+
+        try:
+            client = app.test_client()
+            headers = {"Authorization": f"Bearer {token}"}
+
+            # Submit a sample of the grades one request at a time
+            started_at = time.perf_counter()
+            for student_id, assignment_id, score in grades[: args.sample]:
+                response = client.post(
+                    "/grades/create",
+                    json={"student_id": student_id, "assignment_id": assignment_id, "score": score + 1},
+                    headers=headers,
+                )
+                assert response.status_code in (200, 201), response.json
+            per_grade = (time.perf_counter() - started_at) / args.sample
+
+            # Import every grade from the CSV file, then update them all from the NDJSON file
+            results = {}
+            for label, body, content_type in (
+                ("bulk csv", csv_body, "text/csv"),
+                ("bulk ndjson", ndjson_body, "application/x-ndjson"),
+            ):
+                response, duration, peak = timed(
+                    lambda: client.post(
+                        "/grades/bulk", data=io.BytesIO(body), content_type=content_type, headers=headers
+                    )
+                )
+                assert response.status_code == 200, response.json
+                results[label] = (duration, peak, len(body), response.json["message"])
+        finally:
+            # Remove the seeded rows; grades and assignments go with their student and module
+            db.session.execute(db.delete(User).where(User.id.in_(student_ids)))
+            db.session.execute(db.delete(Module).where(Module.id == module_id))
+            db.session.execute(db.delete(User).where(User.id == teacher.id))
+            db.session.commit()
+
+    print(f"grades: {len(grades)} ({args.students} students x {args.assignments} assignments)")
+    print(
+        f"{'per grade':>12}: {per_grade * 1000:8.2f}ms per request, "
+        f"{per_grade * len(grades):8.2f}s extrapolated to {len(grades)} requests"
+    )
+    for label, (duration, peak, size, message) in results.items():
+        print(
+            f"{label:>12}: {duration:8.2f}s ({len(grades) / duration:9.0f} rows/s) "
+            f"file={size / 1024 / 1024:6.1f}MiB peak={peak:6.1f}MiB; {message}"
+        )
+
+
+# Main entry point for the script
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Measure GET /modules/<id>/gradebook for a module with 2,000 students and 50 assignments.
+
+Usage:
+    python3 benchmarks/gradebook.py --students 2000 --assignments 50 --requests 20
+
+Reports the endpoint latency and compares the size of the columnar payload with the same matrix
+encoded as nested objects ({"student_id": ..., "grades": [{"assignment_id": ..., "score": ...}]}).
+"""
+
+import argparse
+import json
+import secrets
+import statistics
+import time
+
+from lms.adapters import db
+from lms.app import app
+from lms.domains import Assignment, Grade, Module, User
+from tests.factories import TeacherFactory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=2000, help="students graded in the module")
+    parser.add_argument("--assignments", type=int, default=50, help="assignments in the module")
+    parser.add_argument("--requests", type=int, default=20, help="timed requests")
+    args = parser.parse_args()
+
+    with app.app_context():
+        # Seed a teacher, a module with its assignments, and a grade for every student and assignment
+        prefix = f"bench-{secrets.token_hex(4)}"
+        teacher = TeacherFactory.create()
+        module = Module.create(title=prefix, description="", teacher_id=teacher.id)
+        assignment_ids = db.session.scalars(
+            db.insert(Assignment).returning(Assignment.id),
+            [
+                {"title": f"{prefix} {index}", "description": "", "module_id": module.id}
+                for index in range(args.assignments)
+            ],
+        ).all()
+        student_ids = db.session.scalars(
+            db.insert(User).returning(User.id),
+            [
+                {
+                    "username": f"{prefix}-{index}",
+                    "password": "x",
+                    "role_id": 3,
+                    "first_name": "First",
+                    "last_name": "Last",
+                    "email": f"{prefix}-{index}@example.com",
+                }
+                for index in range(args.students)
+            ],
+        ).all()
+        db.session.execute(
+            db.insert(Grade),
+            [
+                {"student_id": student_id, "assignment_id": assignment_id, "score": (student_id + assignment_id) % 100}
+                for student_id in student_ids
+                for assignment_id in assignment_ids
+            ],
+        )
+        db.session.commit()
+        module_id, token = module.id, teacher.auth_token
+
+        try:
+            client = app.test_client()
+            latencies = []
+            for _ in range(args.requests):
+                started_at = time.perf_counter()
+                response = client.get(f"/modules/{module_id}/gradebook", headers={"Authorization": f"Bearer {token}"})
+                latencies.append(time.perf_counter() - started_at)
+                assert response.status_code == 200
+        finally:
+            # Remove the seeded rows; grades and assignments go with their student and module
+            db.session.execute(db.delete(User).where(User.id.in_(student_ids)))
+            db.session.execute(db.delete(Module).where(Module.id == module_id))
+            db.session.execute(db.delete(User).where(User.id == teacher.id))
+            db.session.commit()
+
+    # Re-encode the same matrix as nested objects to compare the payload sizes
+    gradebook = response.json
+    width = len(gradebook["assignments"])
+    nested = [
+        {
+            "student_id": student_id,
+            "grades": [
+                {"assignment_id": assignment_id, "score": gradebook["scores"][row * width + column]}
+                for column, assignment_id in enumerate(gradebook["assignments"])
+            ],
+        }
+        for row, student_id in enumerate(gradebook["students"])
+    ]
+
+    print(f"gradebook: {len(gradebook['students'])} students x {width} assignments")
+    print(
+        f"latency: p50={statistics.median(latencies) * 1000:8.2f}ms "
+        f"max={max(latencies) * 1000:8.2f}ms over {args.requests} requests"
+    )
+    print(f"columnar payload: {len(response.data) / 1024:8.1f}KiB")
+    print(f"nested payload:   {len(json.dumps(nested, separators=(',', ':'))) / 1024:8.1f}KiB")
+
+
+# Main entry point for the script
+if __name__ == "__main__":
+    main()
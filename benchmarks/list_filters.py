@@ -0,0 +1,147 @@
+"""
+Measure the latency of filtered and sorted /assignments/list pages over a large catalog.
+
+Usage:
+    python3 benchmarks/list_filters.py --modules 5000 --assignments 200000 --depth 50 --repeat 5
+
+Seeds teachers, modules and assignments (due over two years, one in ten without a due date, created a minute apart)
+inside a transaction that is rolled back at the end. Each scenario fetches one page of 100 rows of the list view with
+Assignment.paginate, as the endpoint does; "deep" scenarios fetch the page after `--depth` others. "V6" runs with the
+indexes of db/migrations/V6__list_filter_indexes.sql, "V3" after replacing them with the V3 index on module_id, within
+the same transaction (which locks the table until the end of the run). "client" pulls the whole catalog and filters it
+in Python, as clients had to before the filters existed. Reports the median of `--repeat` runs.
+"""
+
+import argparse
+import statistics
+import time
+
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from lms.adapters import db
+from lms.app import app
+from lms.domains import Assignment
+
+# Define the indexes of the V6 migration on the assignments table
+V6_INDEXES = ("assignments_module_id_due_date_id_idx", "assignments_due_date_id_idx", "assignments_created_at_id_idx")
+
+# Define the first due date of the seeded assignments
+START = date(2030, 1, 1)
+
+
+# Function to seed the catalog in the current transaction and return the id of a module
+def seed(modules: int, assignments: int) -> int:
+    statements = (
+        """
+        INSERT INTO users (username, password, first_name, last_name, email, role_id)
+        SELECT 'bench-teacher-' || n, 'x', 'First', 'Last', 'bench-teacher-' || n || '@example.com', 2
+        FROM generate_series(1, :modules / 5 + 1) AS n
+        """,
+        """
+        INSERT INTO modules (title, teacher_id, created_at)
+        SELECT 'Module ' || n, teachers.ids[1 + n % cardinality(teachers.ids)],
+               TIMESTAMP '2024-01-01' + n * INTERVAL '1 minute'
+        FROM generate_series(1, :modules) AS n,
+             (SELECT array_agg(id) AS ids FROM users WHERE username LIKE 'bench-teacher-%') AS teachers
+        """,
+        """
+        INSERT INTO assignments (title, description, module_id, due_date, created_at)
+        SELECT 'Assignment ' || n, 'Description', modules.ids[1 + n % cardinality(modules.ids)],
+               CASE WHEN n % 10 <> 0 THEN DATE '2030-01-01' + (n * 7) % 730 END,
+               TIMESTAMP '2024-01-01' + n * INTERVAL '1 minute'
+        FROM generate_series(1, :assignments) AS n,
+             (SELECT array_agg(id) AS ids FROM modules WHERE title LIKE 'Module %') AS modules
+        """,
+        "ANALYZE users, modules, assignments",
+    )
+    for statement in statements:
+        db.session.execute(text(statement), {"modules": modules, "assignments": assignments})
+    return db.session.execute(text("SELECT max(module_id) FROM assignments")).scalar_one()
+
+
+# Function to return the cursor of the page following `depth` pages of a scenario
+def cursor_after(kwargs: dict, depth: int) -> str | None:
+    cursor = None
+    for _ in range(depth):
+        cursor = Assignment.paginate(after=cursor, limit=100, view="list", **kwargs).next_cursor
+    return cursor
+
+
+# Function to measure the median duration (in ms) of a function
+def measure(function, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - started_at)
+    return statistics.median(durations) * 1000
+
+
+# Function to time each scenario, fetching the page after its cursor
+def run(scenarios: list[tuple[str, dict, int]], cursors: list[str | None], repeat: int) -> list[float]:
+    return [
+        measure(lambda: Assignment.paginate(after=cursor, limit=100, view="list", **kwargs), repeat)
+        for (_, kwargs, _), cursor in zip(scenarios, cursors)
+    ]
+
+
+# Function to fetch the whole catalog and keep the first page of a module's assignments due after a date
+def client_side(module_id: int, due_after: date) -> list[dict]:
+    rows = Assignment.find_all(view=("id", "title", "module_id", "due_date"))
+    matching = [row for row in rows if row.module_id == module_id and row.due_date and row.due_date > due_after]
+    return [row._asdict() for row in sorted(matching, key=lambda row: (row.due_date, row.id))[:100]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=5_000, help="modules to seed")
+    parser.add_argument("--assignments", type=int, default=200_000, help="assignments to seed")
+    parser.add_argument("--depth", type=int, default=50, help="pages skipped by the deep scenarios")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per measurement")
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            module_id = seed(args.modules, args.assignments)
+            due_after = START + timedelta(days=180)
+
+            # Define the scenarios as (label, paginate arguments, pages to skip), and find the cursor of each timed page
+            scenarios = [
+                (
+                    "module due after a date",
+                    {"order_by": "due_date", "module_id": module_id, "due_date__gt": due_after},
+                    0,
+                ),
+                (
+                    "due within a week",
+                    {"order_by": "due_date", "due_date__gte": due_after, "due_date__lt": due_after + timedelta(days=7)},
+                    0,
+                ),
+                ("by due date, deep", {"order_by": "due_date"}, args.depth),
+                ("newest first, deep", {"order_by": "-created_at"}, args.depth),
+                ("created since a date", {"order_by": "created_at", "created_at__gte": date(2024, 3, 1)}, 0),
+            ]
+            cursors = [cursor_after(kwargs, depth) for _, kwargs, depth in scenarios]
+
+            indexed = run(scenarios, cursors, args.repeat)
+            client = measure(lambda: client_side(module_id, due_after), args.repeat)
+
+            # Replace the V6 indexes with the V3 index on module_id, within the transaction
+            db.session.execute(text(f"DROP INDEX {', '.join(V6_INDEXES)}"))
+            db.session.execute(text("CREATE INDEX assignments_module_id_idx ON assignments (module_id)"))
+            db.session.execute(text("ANALYZE assignments"))
+            unindexed = run(scenarios, cursors, args.repeat)
+        finally:
+            db.session.rollback()
+
+    print(f"assignments: {args.assignments} in {args.modules} modules, pages of 100, median of {args.repeat}")
+    for (label, _, _), after, before in zip(scenarios, indexed, unindexed):
+        print(f"{label:>24}: V6={after:8.2f}ms V3={before:8.2f}ms ({before / after:6.1f}x)")
+    print(f"{'client-side filtering':>24}: {client:8.2f}ms (whole catalog, vs the first scenario)")
+
+
+# Main entry point for the script
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Measure the memory and time needed to build the /users/list and /modules/list payloads per 10k rows.
+
+Usage:
+    python3 benchmarks/list_projection.py --rows 10000 --repeat 5
+
+"before" hydrates full ORM entities, including password hashes, auth tokens and module descriptions,
+and then picks the attributes to return, as the endpoints originally did. "after" selects the columns
+of the model's list view as lightweight rows. Memory is the tracemalloc peak while building one payload.
+"""
+
+import argparse
+import secrets
+import statistics
+import time
+import tracemalloc
+
+from lms.adapters import db
+from lms.app import app
+from lms.domains import Module, User
+
+
+# Function to build the /users/list payload from full User entities
+def users_before() -> list[dict]:
+    return [
+        {
+            "id": user.id,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "email": user.email,
+            "username": user.username,
+            "role_id": user.role_id,
+        }
+        for user in db.session.execute(db.select(User).order_by(User.id)).scalars()
+    ]
+
+
+# Function to build the /users/list payload from the rows of the list view
+def users_after() -> list[dict]:
+    return [user._asdict() for user in User.find_all(view="list")]
+
+
+# Function to build the /modules/list payload from full Module entities
+def modules_before() -> list[dict]:
+    return [
+        {"id": module.id, "title": module.title}
+        for module in db.session.execute(db.select(Module).order_by(Module.id)).scalars()
+    ]
+
+
+# Function to build the /modules/list payload from the rows of the list view
+def modules_after() -> list[dict]:
+    return [module._asdict() for module in Module.find_all(view="list")]
+
+
+# Function to measure the tracemalloc peak (in MiB) and the median duration (in ms) of building a payload
+def measure(function, repeat: int) -> tuple[float, float]:
+    durations = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started_at = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - started_at)
+
+    db.session.expunge_all()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, statistics.median(durations) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="users and modules to seed")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per measurement")
+    args = parser.parse_args()
+
+    with app.app_context():
+        # Seed users with realistic password hashes and tokens, and modules with long descriptions
+        prefix = f"bench-{secrets.token_hex(4)}"
+        password = "$2b$12$" + "x" * 53
+        db.session.execute(
+            db.insert(User),
+            [
+                {
+                    "username": f"{prefix}-{index}",
+                    "password": password,
+                    "role_id": 3,
+                    "first_name": "First",
+                    "last_name": "Last",
+                    "email": f"{prefix}-{index}@example.com",
+                    "auth_token": secrets.token_hex(24),
+                }
+                for index in range(args.rows)
+            ],
+        )
+        db.session.execute(
+            db.insert(Module),
+            [{"title": f"{prefix} module {index}", "description": "lorem ipsum " * 200} for index in range(args.rows)],
+        )
+        db.session.commit()
+
+        try:
+            results = {
+                "users before": measure(users_before, args.repeat),
+                "users after": measure(users_after, args.repeat),
+                "modules before": measure(modules_before, args.repeat),
+                "modules after": measure(modules_after, args.repeat),
+            }
+        finally:
+            # Remove the seeded rows
+            db.session.execute(db.delete(Module).where(Module.title.startswith(prefix)))
+            db.session.execute(db.delete(User).where(User.username.startswith(prefix)))
+            db.session.commit()
+
+    scale = 10_000 / args.rows
+    for label, (peak, duration) in results.items():
+        print(f"{label:>15}: peak={peak * scale:8.2f}MiB time={duration * scale:8.2f}ms per 10k rows")
+
+
+# Main entry point for the script
+if __name__ == "__main__":
+    main()
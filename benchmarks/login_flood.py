@@ -0,0 +1,106 @@
+"""
+Measure the latency of /modules/list while a flood of concurrent logins hits the same worker.
+
+Usage:
+    python3 benchmarks/login_flood.py --flooders 16 --requests 200 --workers 2 --queue 16
+
+Run it once with the defaults and once with `--workers 16 --queue 0` to compare a bounded pool
+against letting every login hash at the same time.
+"""
+
+import argparse
+import secrets
+import statistics
+import threading
+import time
+
+import bcrypt
+
+from lms.adapters import db, password_pool
+from lms.app import app
+from lms.domains import Module, User
+from tests.factories import ModuleFactory, TeacherFactory
+
+
+# Function to read a percentile, in milliseconds, from latency samples in seconds
+def percentile(samples: list[float], fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000
+
+
+# Function to time sequential /modules/list requests
+def measure_list(token: str, requests: int) -> list[float]:
+    client = app.test_client()
+    latencies = []
+    for _ in range(requests):
+        started_at = time.perf_counter()
+        response = client.get("/modules/list", headers={"Authorization": f"Bearer {token}"})
+        latencies.append(time.perf_counter() - started_at)
+        assert response.status_code == 200
+    return latencies
+
+
+# Function to log in repeatedly until told to stop, counting the responses by status code
+def flood(username: str, password: str, stop: threading.Event, statuses: dict[int, int]) -> None:
+    client = app.test_client()
+    while not stop.is_set():
+        status = client.post("/login", json={"username": username, "password": password}).status_code
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flooders", type=int, default=16, help="concurrent login clients")
+    parser.add_argument("--requests", type=int, default=200, help="/modules/list requests per measurement")
+    parser.add_argument("--workers", type=int, default=2, help="password pool workers")
+    parser.add_argument("--queue", type=int, default=16, help="password pool queue depth")
+    args = parser.parse_args()
+
+    # Resize the password pool for this run
+    app.config.update(PASSWORD_POOL_WORKERS=args.workers, PASSWORD_POOL_QUEUE=args.queue)
+    password_pool.init_app(app)
+
+    with app.app_context():
+        # Seed a teacher with a cost-12 password and a catalog of modules
+        password = secrets.token_hex(8)
+        teacher = TeacherFactory.create(
+            username=f"bench-{password}", password=bcrypt.hashpw(password.encode(), bcrypt.gensalt(12)).decode()
+        )
+        ModuleFactory.create_batch(50, teacher_id=teacher.id)
+
+        try:
+            # Measure the endpoint on an idle worker
+            idle = measure_list(teacher.auth_token, args.requests)
+
+            # Measure the endpoint again while the login flood is running
+            stop, statuses = threading.Event(), {}
+            flooders = [
+                threading.Thread(target=flood, args=(teacher.username, password, stop, statuses))
+                for _ in range(args.flooders)
+            ]
+            for flooder in flooders:
+                flooder.start()
+            time.sleep(0.5)
+            flooded = measure_list(teacher.auth_token, args.requests)
+            stop.set()
+            for flooder in flooders:
+                flooder.join()
+        finally:
+            # Remove the seeded rows
+            db.session.execute(db.delete(Module).where(Module.teacher_id == teacher.id))
+            db.session.execute(db.delete(User).where(User.id == teacher.id))
+            db.session.commit()
+
+    print(f"pool: workers={args.workers} queue={args.queue} flooders={args.flooders}")
+    for label, samples in (("idle", idle), ("flooded", flooded)):
+        print(
+            f"/modules/list {label:>8}: p50={percentile(samples, 0.50):8.2f}ms "
+            f"p99={percentile(samples, 0.99):8.2f}ms mean={statistics.mean(samples) * 1000:8.2f}ms"
+        )
+    print(f"login responses by status: {dict(sorted(statuses.items()))}")
+    print(f"password pool: {password_pool.stats()}")
+
+
+# Main entry point for the script
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Measure the latency of /search over a large catalog of modules and assignments.
+
+Usage:
+    python3 benchmarks/search.py --modules 20000 --assignments 200000 --queries 200
+
+Seeds teachers, modules and assignments whose titles and descriptions draw from a vocabulary of course words, inside
+a transaction that is rolled back at the end. "postgres" ranks the matches of the generated `search_vector` columns
+through their GIN indexes; "ilike" matches `%word%` against the titles and descriptions of both tables, as scanning
+the lists would; "sqlite" searches the in-memory FTS5 test stub, after loading the catalog into it. Each run searches
+`--queries` one- and two-word queries for the top 20 results, and reports the median and 95th percentile latencies.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from lms.adapters import SearchIndex, db, search_index
+from lms.app import app
+from lms.domains import Assignment, Module
+
+# Define the vocabulary of the seeded titles and descriptions
+WORDS = (
+    "algebra biology calculus chemistry databases economics electronics ethics genetics geometry history literature "
+    "logic mechanics microbiology networks optics philosophy physics poetry probability programming psychology "
+    "sociology statistics thermodynamics topology writing essay report project experiment analysis review practical "
+    "seminar lecture laboratory fieldwork presentation portfolio quiz midterm final coursework reading research"
+).split()
+
+
+# Function to seed the catalog in the current transaction
+def seed(modules: int, assignments: int) -> None:
+    statements = (
+        """
+        INSERT INTO users (username, password, first_name, last_name, email, role_id)
+        SELECT 'bench-teacher-' || n, 'x', 'First', 'Last', 'bench-teacher-' || n || '@example.com', 2
+        FROM generate_series(1, :modules / 5 + 1) AS n
+        """,
+        """
+        INSERT INTO modules (title, description, teacher_id)
+        SELECT initcap(w[1 + n % 47]) || ' ' || w[1 + n % 23],
+               'An introduction to ' || w[1 + n % 13] || ', ' || w[1 + n % 29] || ' and ' || w[1 + n % 31],
+               teachers.ids[1 + n % cardinality(teachers.ids)]
+        FROM generate_series(1, :modules) AS n, (SELECT CAST(:words AS text[]) AS w) AS words,
+             (SELECT array_agg(id) AS ids FROM users WHERE username LIKE 'bench-teacher-%') AS teachers
+        """,
+        """
+        INSERT INTO assignments (title, description, module_id)
+        SELECT initcap(w[1 + n % 41]) || ' ' || w[1 + n % 19],
+               'Submit a ' || w[1 + n % 37] || ' on ' || w[1 + n % 43] || ' and ' || w[1 + n % 17],
+               modules.ids[1 + n % cardinality(modules.ids)]
+        FROM generate_series(1, :assignments) AS n, (SELECT CAST(:words AS text[]) AS w) AS words,
+             (SELECT array_agg(id) AS ids FROM modules) AS modules
+        """,
+        "ANALYZE users, modules, assignments",
+    )
+    for statement in statements:
+        db.session.execute(text(statement), {"modules": modules, "assignments": assignments, "words": list(WORDS)})
+
+
+# Function to search the titles and descriptions of both tables with ILIKE, requiring every word
+def ilike(query: str) -> list:
+    rows = []
+    for model in (Module, Assignment):
+        conditions = [
+            db.or_(model.title.ilike(f"%{word}%"), model.description.ilike(f"%{word}%")) for word in query.split()
+        ]
+        rows += db.session.execute(db.select(model.id, model.title).where(*conditions).limit(20)).all()
+    return rows[:20]
+
+
+# Function to return the median and 95th percentile durations (in ms) of searching every query
+def measure(search, queries: list[str]) -> tuple[float, float]:
+    durations = []
+    for query in queries:
+        started_at = time.perf_counter()
+        search(query)
+        durations.append(time.perf_counter() - started_at)
+    return statistics.median(durations) * 1000, statistics.quantiles(durations, n=20)[-1] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=20_000, help="modules to seed")
+    parser.add_argument("--assignments", type=int, default=200_000, help="assignments to seed")
+    parser.add_argument("--queries", type=int, default=200, help="queries searched per run")
+    args = parser.parse_args()
+
+    randomiser = random.Random(0)
+    queries = [" ".join(randomiser.sample(WORDS, randomiser.choice((1, 2)))) for _ in range(args.queries)]
+
+    with app.app_context():
+        try:
+            seed(args.modules, args.assignments)
+
+            # Search with the application's index, with ILIKE, and with an index on the SQLite backend
+            postgres = measure(search_index.search, queries)
+            scan = measure(ilike, queries)
+
+            sqlite = SearchIndex()
+            sqlite.register("module", Module)
+            sqlite.register("assignment", Assignment)
+            app.config["SEARCH_BACKEND"] = "sqlite"
+            sqlite.init_app(app)
+            app.config["SEARCH_BACKEND"] = search_index.backend
+            started_at = time.perf_counter()
+            sqlite.search("warm up")
+            loaded = (time.perf_counter() - started_at) * 1000
+            fts5 = measure(sqlite.search, queries)
+        finally:
+            db.session.rollback()
+
+    print(f"catalog: {args.modules} modules, {args.assignments} assignments, {args.queries} queries, top 20")
+    for label, (median, p95) in (("postgres", postgres), ("ilike", scan), ("sqlite", fts5)):
+        print(f"{label:>9}: median={median:8.2f}ms p95={p95:8.2f}ms")
+    print(f"{'':>9}  (sqlite loaded the catalog in {loaded:.0f}ms)")
+
+
+# Main entry point for the script
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Measure building the JSON response of 100k grades (1,000 students x 100 assignments).
+
+Usage:
+    python3 benchmarks/serialization.py --students 1000 --assignments 100 --repeat 5
+
+"dataclass" encodes Grade entities with Flask's default provider, which walks their dataclass fields. "asdict"
+converts the rows of the student view with Row._asdict and the default provider (sorted keys, stdlib json). "compiled"
+converts them with the view's compiled serializer and encodes them with the orjson provider. Reports the best of
+`--repeat` runs, split into building the dictionaries and encoding the body.
+"""
+
+import argparse
+import secrets
+import time
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import text
+
+from lms.adapters import OrjsonProvider, db
+from lms.app import app
+from lms.domains import Assignment, Grade, Module, User
+from tests.factories import TeacherFactory
+
+
+# Function to time converting records to dictionaries and encoding them as a response body, keeping the best run
+def measure(provider, convert, records, repeat: int) -> tuple[float, float, int]:
+    best_convert, best_encode, size = float("inf"), float("inf"), 0
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        items = convert(records)
+        converted_at = time.perf_counter()
+        with app.test_request_context():
+            size = len(provider.response(items).get_data())
+        best_convert = min(best_convert, converted_at - started_at)
+        best_encode = min(best_encode, time.perf_counter() - converted_at)
+    return best_convert, best_encode, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=1000, help="students graded")
+    parser.add_argument("--assignments", type=int, default=100, help="assignments graded for every student")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each variant")
+    args = parser.parse_args()
+
+    with app.app_context():
+        # Seed a teacher, a module with its assignments, the students, and a grade for every pair in one statement
+        prefix = f"bench-{secrets.token_hex(4)}"
+        teacher = TeacherFactory.create()
+        module = Module.create(title=prefix, description="", teacher_id=teacher.id)
+        assignment_ids = db.session.scalars(
+            db.insert(Assignment).returning(Assignment.id),
+            [
+                {"title": f"{prefix} {index}", "description": "", "module_id": module.id}
+                for index in range(args.assignments)
+            ],
+        ).all()
+        student_ids = db.session.scalars(
+            db.insert(User).returning(User.id),
+            [
+                {
+                    "username": f"{prefix}-{index}",
+                    "password": "x",
+                    "role_id": 3,
+                    "first_name": "First",
+                    "last_name": "Last",
+                    "email": f"{prefix}-{index}@example.com",
+                }
+                for index in range(args.students)
+            ],
+        ).all()
+        db.session.execute(
+            text(
+                "INSERT INTO grades (student_id, assignment_id, score) "
+                "SELECT s, a, (s + a) % 101 + 0.5 FROM unnest(:students) AS s CROSS JOIN unnest(:assignments) AS a"
+            ),
+            {"students": student_ids, "assignments": assignment_ids},
+        )
+        db.session.commit()
+        module_id, teacher_id = module.id, teacher.id
+
+        try:
+            # Load the grades once, as entities and as rows of the student view
+            entities = Grade.find_all(assignment_id__in=assignment_ids)
+            rows = Grade.find_all(view="student", assignment_id__in=assignment_ids)
+
+            default, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+            results = {
+                "dataclass": measure(default, list, entities, args.repeat),
+                "asdict": measure(default, lambda records: [row._asdict() for row in records], rows, args.repeat),
+                "compiled": measure(fast, lambda records: Grade.serialize(records, view="student"), rows, args.repeat),
+            }
+        finally:
+            # Remove the seeded rows; grades and assignments go with their student and module
+            db.session.rollback()
+            db.session.execute(db.delete(User).where(User.id.in_(student_ids)))
+            db.session.execute(db.delete(Module).where(Module.id == module_id))
+            db.session.execute(db.delete(User).where(User.id == teacher_id))
+            db.session.commit()
+
+    print(f"grades: {len(rows)} ({args.students} students x {args.assignments} assignments), best of {args.repeat}")
+    for label, (convert, encode, size) in results.items():
+        print(
+            f"{label:>9}: convert={convert * 1000:8.1f}ms encode={encode * 1000:8.1f}ms "
+            f"total={(convert + encode) * 1000:8.1f}ms body={size / 1024 / 1024:5.1f}MiB"
+        )
+
+
+# Main entry point for the script
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure provisioning a roster through POST /users/bulk against one POST /users/create per user.
+
+Usage:
+    python3 benchmarks/user_provisioning.py --users 1000 --sample 50 --rounds 10
+
+The per-user endpoint is timed on a sample of users and extrapolated to the whole roster. The bulk endpoint
+creates the rest of the roster from one CSV file, hashing on PASSWORD_BATCH_WORKERS threads (one per core).
+"""
+
+import argparse
+import os
+import secrets
+import time
+
+from lms.adapters import db, password_pool
+from lms.app import app
+from lms.domains import User
+from tests.factories import UserFactory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="users in the roster")
+    parser.add_argument("--sample", type=int, default=50, help="users created one request at a time")
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt work factor")
+    args = parser.parse_args()
+
+    with app.app_context():
+        # Seed an admin to authorise the requests, and build the roster
+        prefix = f"bench-{secrets.token_hex(4)}"
+        admin = UserFactory.create()
+        token = admin.auth_token
+        password_pool.rounds = args.rounds
+        roster = [
+            {
+                "username": f"{prefix}-{index}",
+                "password": secrets.token_urlsafe(12),
+                "role": "student",
+                "first_name": "First",
+                "last_name": "Last",
+                "email": f"{prefix}-{index}@example.com",
+            }
+            for index in range(args.users)
+        ]
+
+        try:
+            client = app.test_client()
+            headers = {"Authorization": f"Bearer {token}"}
+
+            # Create a sample of the roster one request at a time
+            started_at = time.perf_counter()
+            for user in roster[: args.sample]:
+                response = client.post("/users/create", json=user, headers=headers)
+                assert response.status_code == 201, response.json
+            per_user = (time.perf_counter() - started_at) / args.sample
+
+            # Create the rest of the roster from one CSV file
+            body = "username,password,role,first_name,last_name,email\n" + "".join(
+                ",".join(user.values()) + "\n" for user in roster[args.sample :]
+            )
+            started_at = time.perf_counter()
+            response = client.post("/users/bulk", data=body, content_type="text/csv", headers=headers)
+            bulk = time.perf_counter() - started_at
+            assert response.status_code == 200, response.json
+            message = response.json["message"]
+        finally:
+            # Remove the seeded users
+            db.session.execute(db.delete(User).where(User.username.startswith(prefix)))
+            db.session.execute(db.delete(User).where(User.id == admin.id))
+            db.session.commit()
+
+    bulk_users = args.users - args.sample
+    print(f"roster: {args.users} users, bcrypt rounds={args.rounds}, cores={os.cpu_count()}")
+    print(
+        f"{'per user':>9}: {per_user * 1000:8.2f}ms per request, "
+        f"{per_user * args.users:8.2f}s extrapolated to {args.users} requests"
+    )
+    print(f"{'bulk':>9}: {bulk:8.2f}s for {bulk_users} users ({bulk / bulk_users * 1000:8.2f}ms per user); {message}")
+
+
+# Main entry point for the script
+if __name__ == "__main__":
+    main()
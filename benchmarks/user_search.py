@@ -0,0 +1,127 @@
+"""
+Measure the latency of /users/search typeahead lookups over a large user base.
+
+Usage:
+    python3 benchmarks/user_search.py --users 200000 --queries 500
+
+Seeds users named from a vocabulary of first and last names, with usernames and emails derived from their names,
+inside a transaction that is rolled back at the end. Each query is the first three or four characters (the shortest
+prefixes searched, MIN_PREFIX_LENGTH, and one more) of the username, first name, last name or email of a random
+user, as typed into the CLI, and asks for the first 10 matches with User.search, as the endpoint does. "postgres"
+searches the table through the trigram index of db/migrations/V9__user_search_document.sql (or scans it when pg_trgm
+is not installed), "memory" the in-memory prefix index, after loading it; both run with an empty cache, and "cached"
+repeats the queries once every one is cached. "list_students" reads every student, as the CLI did to let teachers
+pick one. Reports the median and 99th percentile latencies.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from lms.adapters import db
+from lms.app import app
+from lms.domains import User, UserRole
+from lms.domains.user.user_model import MIN_PREFIX_LENGTH, user_prefix_index, user_search_cache
+
+# Define the vocabulary of the seeded names
+FIRST_NAMES = (
+    "Aaliyah Adam Aisha Alan Alice Amelia Amir Anna Arjun Ava Ben Carlos Chen Chloe Daniel David Elena Emily Ethan "
+    "Fatima Freya George Grace Hannah Harry Isla Jack James Jia Kai Laura Leo Lily Lucas Maria Mason Mia Mohammed "
+    "Noah Olivia Omar Priya Rosa Sam Sofia Thomas Wei Yusuf Zara Zoe"
+).split()
+LAST_NAMES = (
+    "Ahmed Ali Anderson Baker Brown Campbell Chen Clarke Davies Evans Garcia Green Hall Harris Hughes Jackson Jones "
+    "Khan Kumar Lee Lewis Li Lopez Martin Miller Moore Morgan Murphy Nguyen Patel Roberts Robinson Rossi Scott Shah "
+    "Singh Smith Taylor Thomas Thompson Turner Walker Wang Watson White Williams Wilson Wood Wright Young"
+).split()
+
+
+# Function to seed the users in the current transaction, nine in ten of them students
+def seed(users: int) -> None:
+    statements = (
+        """
+        INSERT INTO users (username, password, first_name, last_name, email, role_id)
+        SELECT lower(first_name || '.' || last_name) || n, 'x', first_name, last_name,
+               lower(first_name || '.' || last_name) || n || '@uni.example.ac.uk',
+               CASE WHEN n % 10 = 0 THEN 2 ELSE 3 END
+        FROM (
+            SELECT n, f[1 + n % cardinality(f)] AS first_name, l[1 + (n / cardinality(f)) % cardinality(l)] AS last_name
+            FROM generate_series(1, :users) AS n,
+                 (SELECT CAST(:first_names AS text[]) AS f, CAST(:last_names AS text[]) AS l) AS vocabulary
+        ) AS names
+        """,
+        "ANALYZE users",
+    )
+    for statement in statements:
+        db.session.execute(
+            text(statement), {"users": users, "first_names": list(FIRST_NAMES), "last_names": list(LAST_NAMES)}
+        )
+
+
+# Function to return the median and 99th percentile durations (in ms) of searching every prefix
+def measure(prefixes: list[str], cached: bool = False) -> tuple[float, float]:
+    durations = []
+    for prefix in prefixes:
+        if not cached:
+            user_search_cache.clear()
+        started_at = time.perf_counter()
+        User.search(prefix, limit=10)
+        durations.append(time.perf_counter() - started_at)
+    return statistics.median(durations) * 1000, statistics.quantiles(durations, n=100)[-1] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200_000, help="users to seed")
+    parser.add_argument("--queries", type=int, default=500, help="prefixes searched per run")
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            seed(args.users)
+            trigrams = db.session.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar()
+
+            # Type the start of the username, a name or the email of random users, skipping names too short to search
+            randomiser = random.Random(0)
+            rows = db.session.execute(db.select(User.username, User.first_name, User.last_name, User.email)).all()
+            prefixes = []
+            while len(prefixes) < args.queries:
+                field = randomiser.choice(randomiser.choice(rows))
+                if len(field) >= MIN_PREFIX_LENGTH:
+                    prefixes.append(field[: randomiser.randint(MIN_PREFIX_LENGTH, 4)])
+
+            # Search the table, then the in-memory index once loaded, then the cached results
+            app.config["USER_SEARCH_BACKEND"] = "postgres"
+            postgres = measure(prefixes)
+
+            app.config["USER_SEARCH_BACKEND"] = "memory"
+            started_at = time.perf_counter()
+            User.search("warm up")
+            loaded = (time.perf_counter() - started_at) * 1000
+            memory = measure(prefixes)
+            measure(prefixes, cached=True)
+            cached = measure(prefixes, cached=True)
+
+            # Read every student, as the CLI did before
+            started_at = time.perf_counter()
+            students = User.find_all(view="student", role_id=UserRole.STUDENT.value)
+            listed = (time.perf_counter() - started_at) * 1000
+        finally:
+            app.config["USER_SEARCH_BACKEND"] = "postgres"
+            user_prefix_index.clear()
+            db.session.rollback()
+
+    print(f"users: {args.users}, {args.queries} prefixes of {MIN_PREFIX_LENGTH}-4 characters, first 10 matches")
+    postgres_label = "postgres" if trigrams else "postgres (no pg_trgm, sequential scan)"
+    for label, (median, p99) in ((postgres_label, postgres), ("memory", memory), ("cached", cached)):
+        print(f"{label:>38}: median={median:8.2f}ms p99={p99:8.2f}ms")
+    print(f"{'':>38}  (memory loaded {args.users} users in {loaded:.0f}ms)")
+    print(f"{'list_students':>38}: {listed:8.2f}ms ({len(students)} students)")
+
+
+# Main entry point for the script
+if __name__ == "__main__":
+    main()
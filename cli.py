@@ -1,9 +1,164 @@
+import json
+import os
+
+from typing import Any, Iterator
+from urllib.parse import urljoin
+
 import click
 import requests
 
 # Base URL for the Learning Management System (LMS) API
 API_BASE_URL = "http://localhost:5001"
 
+# Path of the locally persisted bearer token
+CREDENTIALS_PATH = os.path.expanduser("~/.lms_credentials")
+
+# Path of the locally cached list responses and their ETag validators
+RESPONSE_CACHE_PATH = os.path.expanduser("~/.lms_response_cache.json")
+
+
+# Function to build the authorisation headers from the persisted credential
+def auth_headers() -> dict[str, str]:
+    """
+    Returns the `Authorization: Bearer` header for the persisted token, if any.
+    """
+    try:
+        with open(CREDENTIALS_PATH, "r") as file:
+            token = file.read().strip()
+    except FileNotFoundError:
+        return {}
+
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+# Function to persist the bearer token returned by a successful login
+def save_credentials(token: str) -> None:
+    """
+    Stores the bearer token in a file only readable by the current user.
+    """
+    with open(os.open(CREDENTIALS_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as file:
+        file.write(token)
+
+
+# Function to remove the persisted bearer token
+def clear_credentials() -> None:
+    """
+    Removes the persisted bearer token.
+    """
+    if os.path.exists(CREDENTIALS_PATH):
+        os.remove(CREDENTIALS_PATH)
+
+
+# Function to read the cached responses, keyed by URL
+def load_response_cache() -> dict[str, Any]:
+    """
+    Returns the cached responses, or an empty cache when there is none or it cannot be read.
+    """
+    try:
+        with open(RESPONSE_CACHE_PATH, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+# Function to persist the cached responses
+def save_response_cache(cache: dict[str, Any]) -> None:
+    """
+    Stores the cached responses in a file only readable by the current user, since they hold other users' details.
+    """
+    with open(os.open(RESPONSE_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as file:
+        json.dump(cache, file)
+
+
+# Function to remove the cached responses
+def clear_response_cache() -> None:
+    """
+    Removes the cached responses.
+    """
+    if os.path.exists(RESPONSE_CACHE_PATH):
+        os.remove(RESPONSE_CACHE_PATH)
+
+
+# Function to send a GET request, revalidating the cached copy of the response with its ETag
+def cached_get(url: str) -> tuple[Any, dict[str, Any]]:
+    """
+    Returns the JSON body and the links of the response to a GET request.
+    Sends the ETag of the cached copy in an `If-None-Match` header, and reuses the copy when the server answers
+    304 Not Modified; successful responses carrying an ETag replace the cached copy.
+    """
+    cache = load_response_cache()
+    cached = cache.get(url)
+    headers = auth_headers()
+    if cached:
+        headers["If-None-Match"] = cached["etag"]
+
+    response = requests.get(url, headers=headers)
+    if response.status_code == 304 and cached:
+        return cached["data"], cached["links"]
+
+    data = response.json()
+    if response.status_code == 200 and "ETag" in response.headers:
+        cache[url] = {"etag": response.headers["ETag"], "data": data, "links": response.links}
+        save_response_cache(cache)
+
+    return data, response.links
+
+
+# Function to lazily iterate over every record of a paginated list endpoint
+def fetch_pages(path: str) -> Iterator[dict[str, Any]]:
+    """
+    Yields the records of a list endpoint, requesting the next page only when the previous one is exhausted.
+    Follows the `Link: <...>; rel="next"` header until the last page, and echoes the message of an error response.
+    Pages that have not changed since they were cached are not downloaded again.
+    """
+    url = f"{API_BASE_URL}{path}"
+    while url:
+        data, links = cached_get(url)
+
+        # Check if the response is an error message
+        if isinstance(data, dict):
+            click.echo(data.get("message"))
+            return
+
+        yield from data
+
+        # Move on to the next page, if the server linked one
+        next_link = links.get("next")
+        url = urljoin(API_BASE_URL, next_link["url"]) if next_link else None
+
+
+# Function to pick a user by the start of their username, name or email
+def pick_user(role: str | None = None) -> int:
+    """
+    Returns the ID of a user picked among the users matching a search, optionally only those of a role.
+    Prompts for the start of a username, name or email and lists the first matching users, until an ID is entered.
+    """
+    while True:
+        prefix = click.prompt("Please enter the start of a username, name or email to search for", type=str)
+        params = {"prefix": prefix, "role": role} if role else {"prefix": prefix}
+        response = requests.get(f"{API_BASE_URL}/users/search", params=params, headers=auth_headers())
+        users = response.json()
+
+        # Check if the response is an error message
+        if isinstance(users, dict):
+            click.echo(users.get("message"))
+            continue
+
+        # Display the matching users
+        click.echo("")
+        click.echo("Matching users:" if users else "No matching users, please try again")
+        for user in users:
+            click.echo(
+                f'- User ID {user.get("id")}. first name: {user.get("first_name")}, '
+                f'last name: {user.get("last_name")}, username: {user.get("username")}, email: {user.get("email")}'
+            )
+        click.echo("")
+
+        # Get the ID of the user, or search again
+        user_id = click.prompt("Please enter the user ID (or press Enter to search again)", type=str, default="")
+        if user_id.isdigit():
+            return int(user_id)
+
 
 # Click group to create a command-line interface
 @click.group(invoke_without_command=True)
@@ -30,10 +185,11 @@ def cli(ctx) -> None:
         click.echo("5. Create a Module")
         click.echo("6. Create an Assignment")
         click.echo("7. Submit a Grade")
-        click.echo("8. View Grades as a Student")
-        click.echo("9. Toggle Hacker Mode")
-        click.echo("10. Logout")
-        click.echo("11. Exit")
+        click.echo("8. Import Grades from a File")
+        click.echo("9. View Grades as a Student")
+        click.echo("10. Toggle Hacker Mode")
+        click.echo("11. Logout")
+        click.echo("12. Exit")
 
         # Get the user's choice
         choice = click.prompt("Please select an action", type=int)
@@ -54,12 +210,14 @@ def cli(ctx) -> None:
         elif choice == 7:
             submit_grade()
         elif choice == 8:
-            view_grades()
+            import_grades()
         elif choice == 9:
-            toggle_hacker_mode()
+            view_grades()
         elif choice == 10:
-            logout()
+            toggle_hacker_mode()
         elif choice == 11:
+            logout()
+        elif choice == 12:
             click.echo("Exiting...")
             break
         else:
@@ -93,7 +251,7 @@ def register_user() -> None:
     }
 
     # Send POST request to register the user
-    response = requests.post(f"{API_BASE_URL}/users/create", json=user_data)
+    response = requests.post(f"{API_BASE_URL}/users/create", json=user_data, headers=auth_headers())
     data = response.json()
     message = data.get("message")
     click.echo(message)
@@ -119,6 +277,10 @@ def login() -> None:
     response = requests.post(f"{API_BASE_URL}/login", json=user_data)
     data = response.json()
     message = data.get("message")
+
+    # Persist the bearer token so that subsequent requests are authenticated
+    if data.get("token"):
+        save_credentials(data["token"])
     click.echo(message)
     click.echo("")
 
@@ -129,25 +291,17 @@ def list_all_users() -> None:
     Lists all users in the LMS system.
     Sends a GET request to the LMS API to retrieve the list of users.
     """
-    # Send GET request to retrieve user list
-    response = requests.get(f"{API_BASE_URL}/users/list")
-    data = response.json()
+    # Send GET requests to retrieve the user list, one page at a time
+    users = fetch_pages("/users/list?fields=first_name,last_name,username")
 
-    # Check if the response is an error message
-    if isinstance(data, dict):
-        message = data.get("message")
-        click.echo(message)
-    else:
-        # Display the list of users
-        start_number = 1
-        click.echo("")
-        click.echo("Current users in the system:")
-        for user in data:
-            click.echo(
-                f'- User {start_number}. first name: {user.get("first_name")}, '
-                f'last name: {user.get("last_name")}, username: {user.get("username")}'
-            )
-            start_number += 1
+    # Display the list of users
+    click.echo("")
+    click.echo("Current users in the system:")
+    for start_number, user in enumerate(users, start=1):
+        click.echo(
+            f'- User {start_number}. first name: {user.get("first_name")}, '
+            f'last name: {user.get("last_name")}, username: {user.get("username")}'
+        )
 
     click.echo("")
 
@@ -156,30 +310,14 @@ def list_all_users() -> None:
 def update_user() -> None:
     """
     Updates an existing user.
-    Retrieves the list of users and prompts the user to select a user to update.
+    Searches the users and prompts the user to select a user to update.
     Sends a PUT request to the LMS API to update the user's details.
     """
-    # Fetch the list of current users
-    response = requests.get(f"{API_BASE_URL}/users/list")
-    data = response.json()
-
-    # Check if the response is an error message
-    if isinstance(data, dict):
-        message = data.get("message")
-        click.echo(message)
-    else:
-        # Display the list of users
-        click.echo("")
-        click.echo("Current users in the system:")
-        for user in data:
-            click.echo(
-                f'- User ID {user.get("id")}. first name: {user.get("first_name")}, '
-                f'last name: {user.get("last_name")}, username: {user.get("username")}'
-            )
+    # Search for the user to update
     click.echo("")
+    user_id = pick_user()
 
-    # Get user input for the user to update
-    user_id = click.prompt("Please enter the user ID of the user you want to update", type=int)
+    # Get user input for the new details
     username = click.prompt("Please enter a new username (or press Enter to skip)", type=str, default="")
     role = click.prompt(
         "Please enter a new role (Admin, Teacher, Student, or press Enter to skip)", type=str, default=""
@@ -202,7 +340,7 @@ def update_user() -> None:
     user_data = {k: v for k, v in user_data.items() if v}
 
     # Send PUT request to update the user
-    response = requests.put(f"{API_BASE_URL}/users/{user_id}", json=user_data)
+    response = requests.put(f"{API_BASE_URL}/users/{user_id}", json=user_data, headers=auth_headers())
     data = response.json()
     message = data.get("message")
     click.echo(message)
@@ -225,7 +363,7 @@ def create_module() -> None:
     module_data = {"title": title, "description": description}
 
     # Send POST request to create the module
-    response = requests.post(f"{API_BASE_URL}/modules/create", json=module_data)
+    response = requests.post(f"{API_BASE_URL}/modules/create", json=module_data, headers=auth_headers())
     data = response.json()
     message = data.get("message")
     click.echo(message)
@@ -242,19 +380,10 @@ def create_assignment() -> None:
     """
     # Display list of available modules
     click.echo("List of available modules to add an assignment to")
-    response = requests.get(f"{API_BASE_URL}/modules/list")
-    data = response.json()
-
-    # Check if the response is an error message
-    if isinstance(data, dict):
-        message = data.get("message")
-        click.echo(message)
-    else:
-        # Display the list of modules
-        click.echo("")
-        click.echo("Current modules in the system:")
-        for module in data:
-            click.echo(f'- Module ID: {module.get("id")}. Title: {module.get("title")}')
+    click.echo("")
+    click.echo("Current modules in the system:")
+    for module in fetch_pages("/modules/list?fields=id,title"):
+        click.echo(f'- Module ID: {module.get("id")}. Title: {module.get("title")}')
     click.echo("")
 
     # Get assignment details
@@ -268,7 +397,7 @@ def create_assignment() -> None:
     assignment_data = {"title": title, "description": description, "module_id": module_id, "due_date": due_date}
 
     # Send POST request to create the assignment
-    response = requests.post(f"{API_BASE_URL}/assignments/create", json=assignment_data)
+    response = requests.post(f"{API_BASE_URL}/assignments/create", json=assignment_data, headers=auth_headers())
     data = response.json()
     message = data.get("message")
     click.echo(message)
@@ -279,42 +408,22 @@ def create_assignment() -> None:
 def submit_grade() -> None:
     """
     Submits a grade for a student in a particular assignment.
-    Retrieves lists of students and assignments and prompts the user to select a student and an assignment.
+    Searches the students and retrieves the list of assignments, and prompts the user to select a student and an
+    assignment.
     Prompts the user to enter the score.
     Sends a POST request to the LMS API to submit the grade.
     """
-    # Display list of available students
-    click.echo("List of available students")
-    response = requests.get(f"{API_BASE_URL}/users/list_students")
-    data = response.json()
-
-    # Check if the response is an error message
-    if isinstance(data, dict):
-        message = data.get("message")
-        click.echo(message)
-    else:
-        # Display the list of students
-        click.echo("")
-        click.echo("Current students in the system:")
-        for student in data:
-            click.echo(
-                f'- Student ID: {student.get("id")}. Name: {student.get("first_name")} - {student.get("last_name")}'
-            )
+    # Search for the student to grade
+    click.echo("Search for the student to grade")
+    click.echo("")
+    student_id = pick_user(role="student")
 
-    # Retrieve and display the list of assignments
-    response = requests.get(f"{API_BASE_URL}/assignments/list")
-    data = response.json()
-    if isinstance(data, dict):
-        message = data.get("message")
-        click.echo(message)
-    else:
-        click.echo("")
-        click.echo("Current assignments in the system:")
-        for assignment in data:
-            click.echo(f'- Assignment ID: {assignment.get("id")}. Title: {assignment.get("title")}')
+    # Retrieve and display the list of assignments, one page at a time
+    click.echo("Current assignments in the system:")
+    for assignment in fetch_pages("/assignments/list?fields=id,title"):
+        click.echo(f'- Assignment ID: {assignment.get("id")}. Title: {assignment.get("title")}')
 
     # Get grade details
-    student_id = click.prompt("Please enter the student ID", type=int)
     assignment_id = click.prompt("Please enter the assignment ID", type=int)
     score = click.prompt("Please enter the score", type=float)
     click.echo("")
@@ -323,21 +432,42 @@ def submit_grade() -> None:
     grade_data = {"student_id": student_id, "assignment_id": assignment_id, "score": score}
 
     # Send POST request to submit the grade
-    response = requests.post(f"{API_BASE_URL}/grades/create", json=grade_data)
+    response = requests.post(f"{API_BASE_URL}/grades/create", json=grade_data, headers=auth_headers())
     data = response.json()
     message = data.get("message")
     click.echo(message)
     click.echo("")
 
 
+# Function to import many grades from a file
+def import_grades() -> None:
+    """
+    Imports the grades of a CSV file (with a student_id, assignment_id and score header) or of a JSON Lines file.
+    Streams the file to the LMS API in a single POST request and displays the rows that were rejected.
+    """
+    path = click.prompt("Please enter the path of a .csv or .jsonl file", type=click.Path(exists=True, dir_okay=False))
+    content_type = "text/csv" if path.lower().endswith(".csv") else "application/x-ndjson"
+    click.echo("")
+
+    # Send the file as the request body, without reading it into memory first
+    with open(path, "rb") as file:
+        response = requests.post(
+            f"{API_BASE_URL}/grades/bulk", data=file, headers={**auth_headers(), "Content-Type": content_type}
+        )
+    data = response.json()
+    click.echo(data.get("message"))
+    for error in data.get("errors", []):
+        click.echo(f'- Line {error.get("line")}: {error.get("message")}')
+    click.echo("")
+
+
 # Function to view grades as a student
 def view_grades() -> None:
     """
     Retrieves and displays the grades of the currently logged-in student.
-    Sends a GET request to the LMS API to retrieve the grades.
+    Sends a GET request to the LMS API to retrieve the grades, unless the cached copy is still current.
     """
-    response = requests.get(f"{API_BASE_URL}/grades/view")
-    data = response.json()
+    data, _ = cached_get(f"{API_BASE_URL}/grades/view?fields=assignment_id,score")
 
     # Check if the response is an error message
     if isinstance(data, dict):
@@ -368,7 +498,9 @@ def toggle_hacker_mode() -> None:
         return
 
     # Send POST request to toggle Hacker Mode
-    response = requests.post(f"{API_BASE_URL}/feature_switch/hacker_mode", json={"active": status})
+    response = requests.post(
+        f"{API_BASE_URL}/feature_switch/hacker_mode", json={"active": status}, headers=auth_headers()
+    )
     data = response.json()
     message = data.get("message")
     click.echo(message)
@@ -382,9 +514,13 @@ def logout() -> None:
     Sends a PUT request to the LMS API to log out.
     """
     click.echo("")
-    response = requests.put(f"{API_BASE_URL}/logout")
+    response = requests.put(f"{API_BASE_URL}/logout", headers=auth_headers())
     data = response.json()
     message = data.get("message")
+
+    # Forget the persisted bearer token and the responses cached for the user
+    clear_credentials()
+    clear_response_cache()
     click.echo(message)
     click.echo("")
 
@@ -0,0 +1,41 @@
+-- count the changes to the tables behind the list endpoints without a hot row.
+-- the triggers of V5 updated one table_versions row per table in every writing transaction, so concurrent writers to
+-- a table queued on that row's lock until commit. they now append a row to table_changes instead, which writers never
+-- wait on. a table's version is its counter in table_versions plus its rows in table_changes: inserted by the writing
+-- transaction, a change still becomes visible together with the rows it describes, and every committed change adds
+-- one whatever order transactions commit in.
+CREATE TABLE table_changes(
+  id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  table_name VARCHAR(63) NOT NULL
+);
+
+CREATE INDEX table_changes_table_name_idx ON table_changes (table_name);
+
+-- every 128th change folds the committed changes into the counters, so that versions count few rows. a transaction
+-- folding holds the counter rows until it commits, so the others skip folding while the advisory lock is taken
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+DECLARE
+  change_id BIGINT;
+BEGIN
+  INSERT INTO table_changes (table_name) VALUES (TG_TABLE_NAME) RETURNING id INTO change_id;
+
+  IF change_id % 128 = 0 AND pg_try_advisory_xact_lock(hashtext('table_changes')) THEN
+    WITH folded AS (
+      DELETE FROM table_changes WHERE id < change_id RETURNING table_name
+    )
+    UPDATE table_versions SET version = version + counts.changes
+    FROM (SELECT table_name, count(*) AS changes FROM folded GROUP BY table_name) AS counts
+    WHERE table_versions.table_name = counts.table_name;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- count the writes to users that change what the versioned reads return. logging in rehashes passwords and logging
+-- out rotates auth tokens, neither of which is listed or searched, so they no longer retire every cached list and
+-- search of users; the updated_at those writes set is not counted either
+DROP TRIGGER IF EXISTS users_version ON users;
+CREATE TRIGGER users_version AFTER INSERT OR DELETE OR TRUNCATE ON users
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER users_update_version AFTER UPDATE OF username, role_id, first_name, last_name, email, created_at
+  ON users FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
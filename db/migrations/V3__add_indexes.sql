@@ -0,0 +1,14 @@
+-- index the foreign keys and filter columns queried by the application.
+-- grades are looked up by student (GET /grades/view, User.grades) and deleted with their student or assignment;
+-- the composite also serves lookups of one student's grade for one assignment
+CREATE INDEX IF NOT EXISTS grades_student_id_assignment_id_idx ON grades (student_id, assignment_id);
+CREATE INDEX IF NOT EXISTS grades_assignment_id_idx ON grades (assignment_id);
+
+-- assignments are loaded per module (Module.assignments) and deleted with their module
+CREATE INDEX IF NOT EXISTS assignments_module_id_idx ON assignments (module_id);
+
+-- modules are loaded per teacher (User.modules) and deleted with their teacher
+CREATE INDEX IF NOT EXISTS modules_teacher_id_idx ON modules (teacher_id);
+
+-- students are listed page by page in id order (GET /users/list_students)
+CREATE INDEX IF NOT EXISTS users_role_id_id_idx ON users (role_id, id);
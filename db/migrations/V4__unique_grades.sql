@@ -0,0 +1,11 @@
+-- remove duplicate grades left by retried or double-submitted requests, keeping the latest submission
+-- of each student for each assignment
+DELETE FROM grades AS duplicate
+USING grades AS latest
+WHERE duplicate.student_id = latest.student_id
+  AND duplicate.assignment_id = latest.assignment_id
+  AND duplicate.id < latest.id;
+
+-- allow one grade per student and assignment; the constraint's index replaces the one added in V3
+DROP INDEX IF EXISTS grades_student_id_assignment_id_idx;
+ALTER TABLE grades ADD CONSTRAINT grades_student_id_assignment_id_key UNIQUE (student_id, assignment_id);
@@ -0,0 +1,26 @@
+-- count the changes to the tables behind the list endpoints, so that their responses can be validated with an ETag
+-- without loading any rows. The counter is bumped inside the writing transaction, so a new version only becomes
+-- visible together with the rows it describes.
+CREATE TABLE table_versions(
+  table_name VARCHAR(63) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO table_versions (table_name) VALUES ('users'), ('modules'), ('assignments'), ('grades');
+
+-- bump once per statement rather than per row, so that a bulk import costs one update
+CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON users
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER modules_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON modules
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER assignments_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON assignments
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER grades_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON grades
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
@@ -0,0 +1,20 @@
+-- index the filters and sort orders accepted by the list endpoints (?module_id=, ?due_date__gte=, ?sort=due_date, ...).
+-- each index ends with the id, the tie-breaker of keyset pagination, so that pages are read in index order.
+
+-- assignments of a module in due-date order (GET /assignments/list?module_id=12&due_date__gt=...&sort=due_date);
+-- the leading module_id still serves Module.assignments and the cascade from a deleted module, replacing the V3 index
+CREATE INDEX IF NOT EXISTS assignments_module_id_due_date_id_idx ON assignments (module_id, due_date, id);
+DROP INDEX IF EXISTS assignments_module_id_idx;
+
+-- assignments of every module in due-date order (GET /assignments/list?sort=due_date)
+CREATE INDEX IF NOT EXISTS assignments_due_date_id_idx ON assignments (due_date, id);
+
+-- modules of a teacher page by page (GET /modules/list?teacher_id=3); the leading teacher_id still serves
+-- User.modules and the cascade from a deleted teacher, replacing the V3 index
+CREATE INDEX IF NOT EXISTS modules_teacher_id_id_idx ON modules (teacher_id, id);
+DROP INDEX IF EXISTS modules_teacher_id_idx;
+
+-- records created within a range, or listed by creation time (?created_at__gte=...&sort=-created_at)
+CREATE INDEX IF NOT EXISTS users_created_at_id_idx ON users (created_at, id);
+CREATE INDEX IF NOT EXISTS modules_created_at_id_idx ON modules (created_at, id);
+CREATE INDEX IF NOT EXISTS assignments_created_at_id_idx ON assignments (created_at, id);
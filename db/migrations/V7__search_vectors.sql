@@ -0,0 +1,16 @@
+-- full-text search over modules and assignments (GET /search?q=).
+-- each row keeps its search document, the English lexemes of its title (weight A) and description (weight B),
+-- in a generated column: PostgreSQL recomputes it whenever a row is inserted or its title or description updated.
+-- the GIN indexes are updated in place (fastupdate = off) rather than through a pending list merged later: writes are
+-- rare, and searches never have to scan unmerged entries
+ALTER TABLE modules ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS modules_search_vector_idx ON modules USING GIN (search_vector) WITH (fastupdate = off);
+
+ALTER TABLE assignments ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS assignments_search_vector_idx ON assignments USING GIN (search_vector) WITH (fastupdate = off);
@@ -0,0 +1,14 @@
+-- typeahead user lookup (GET /users/search?prefix=).
+-- users are searched by one lowercase document, their username, first name, last name and the part of their email
+-- before the @, preceded by a space: a prefix matches when it starts one of its words, `document LIKE '% prefix%'`.
+-- a trigram index answers those patterns without scanning the table, from the trigrams of the start of each word; the
+-- domain of the email is left out since most users share it, and every row would otherwise be a candidate.
+-- like the search vectors of V7, the index is updated in place (fastupdate = off)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS users_search_trgm_idx ON users USING GIN (
+    (
+        ' ' || lower(username) || ' ' || lower(first_name) || ' ' || lower(last_name) || ' ' ||
+        lower(split_part(email, '@', 1))
+    ) gin_trgm_ops
+) WITH (fastupdate = off);
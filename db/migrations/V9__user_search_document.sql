@@ -0,0 +1,12 @@
+-- keep each user's search document in a generated column, and move the trigram index of V8 onto it.
+-- matching a prefix shared by thousands of users rechecks every candidate row the index returns; reading the stored
+-- document is cheaper than recomputing it from four columns for each of them. PostgreSQL recomputes the column
+-- whenever a row is inserted or its username, names or email updated. adding it rewrites the users table.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS search_document TEXT GENERATED ALWAYS AS (
+    ' ' || lower(username) || ' ' || lower(first_name) || ' ' || lower(last_name) || ' ' ||
+    lower(split_part(email, '@', 1))
+) STORED;
+
+DROP INDEX IF EXISTS users_search_trgm_idx;
+CREATE INDEX IF NOT EXISTS users_search_trgm_idx ON users USING GIN (search_document gin_trgm_ops)
+    WITH (fastupdate = off);
@@ -1,6 +1,84 @@
-# Importing BaseMixin and db from the database module
-from .database import BaseMixin, db
+# Importing the in-process cache and its helpers from the cache module
+from .cache import MISSING, TTLCache, cache_stats, clear_caches
+
+# Importing the conditional GET decorator and the table change counters from the conditional module
+from .conditional import conditional, if_none_match, not_modified, table_versions, versions
+
+# Importing BaseMixin, db, Page, the View and Filter types and the COPY helper from the database module
+from .database import RANGE_OPERATORS, BaseMixin, Filter, Page, View, copy_rows, db
+
+# Importing the reader of the `fields` query parameter from the fieldsets module
+from .fieldsets import fields_arg
+
+# Importing the readers of the filter and sort query parameters from the filters module
+from .filters import filter_args, sort_arg
+
+# Importing the orjson-based JSON provider from the json_provider module
+from .json_provider import OrjsonProvider
+
+# Importing the request helpers for keyset pagination from the pagination module
+from .pagination import INVALID_PAGE_MESSAGE, page_args, paginated_response
+
+# Importing the bcrypt worker pool from the password_pool module
+from .password_pool import PasswordPool, PoolSaturated, calibrate_bcrypt_command, password_pool
+
+# Importing the in-memory index of word prefixes from the prefix_index module
+from .prefix_index import PrefixIndex
+
+# Importing the per-request SQL statement tracker from the query_tracker module
+from .query_tracker import QueryTracker, query_tracker
+
+# Importing the response cache decorator from the response_cache module
+from .response_cache import CachedResponse, cached
+
+# Importing the full-text search index and its SQLite FTS5 test stub from the search_index module
+from .search_index import SearchHit, SearchIndex, SqliteSearch, search_index, search_vector_column
+
+# Importing the readers of uploaded CSV and NDJSON files from the uploads module
+from .uploads import CSV_MEDIA_TYPE, NDJSON_MEDIA_TYPE, csv_records, ndjson_records
 
 # Defining the public interface of the package.
-# This allows other modules to access BaseMixin and db when they import this package.
-__all__ = ["BaseMixin", "db"]
+# This allows other modules to access BaseMixin, db and the shared helpers when they import this package.
+__all__ = [
+    "BaseMixin",
+    "db",
+    "Page",
+    "View",
+    "Filter",
+    "RANGE_OPERATORS",
+    "copy_rows",
+    "conditional",
+    "if_none_match",
+    "not_modified",
+    "table_versions",
+    "versions",
+    "fields_arg",
+    "filter_args",
+    "sort_arg",
+    "OrjsonProvider",
+    "PrefixIndex",
+    "INVALID_PAGE_MESSAGE",
+    "page_args",
+    "paginated_response",
+    "MISSING",
+    "TTLCache",
+    "cache_stats",
+    "clear_caches",
+    "CachedResponse",
+    "cached",
+    "PasswordPool",
+    "PoolSaturated",
+    "calibrate_bcrypt_command",
+    "password_pool",
+    "QueryTracker",
+    "query_tracker",
+    "SearchHit",
+    "SearchIndex",
+    "SqliteSearch",
+    "search_index",
+    "search_vector_column",
+    "CSV_MEDIA_TYPE",
+    "NDJSON_MEDIA_TYPE",
+    "csv_records",
+    "ndjson_records",
+]
@@ -0,0 +1,92 @@
+# Import necessary standard library modules
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any, Final, Hashable
+
+# Define a sentinel returned by TTLCache.get when a key is absent or expired
+MISSING: Final[object] = object()
+
+# Keep track of every cache created by the application, keyed by name
+_registry: dict[str, "TTLCache"] = {}
+
+
+# Define a bounded, thread-safe, in-process cache with per-entry expiry and LRU eviction
+class TTLCache(object):
+    def __init__(self, name: str, maxsize: int, ttl: float) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        # Register the cache so that its metrics can be reported and it can be cleared
+        _registry[name] = self
+
+    # Define a method to fetch a value, returning MISSING when it is absent or expired
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    # Define a method to store a value, evicting the least recently used entries beyond maxsize
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Define a method to drop the given keys
+    def delete(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    # Define a method to drop every entry
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # Define a method to report the cache's counters
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+# Define a function to report the counters of every registered cache
+def cache_stats() -> dict[str, dict[str, int | float]]:
+    return {name: cache.stats() for name, cache in sorted(_registry.items())}
+
+
+# Define a function to drop the entries of every registered cache
+def clear_caches() -> None:
+    for cache in _registry.values():
+        cache.clear()
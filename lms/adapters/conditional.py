@@ -0,0 +1,100 @@
+# Import necessary standard library modules
+import hashlib
+
+from functools import wraps
+from typing import Any, Callable, Iterable
+
+# Import Flask helpers to read the request's validators and build responses, and SQLAlchemy's count function
+from flask import Response, make_response, request
+from sqlalchemy import func
+
+from .database import db
+
+# Define the tables of change counts maintained by the database (db/migrations/V5__table_versions.sql and
+# V10__table_changes.sql). Every statement writing to a counted table appends a change in the same transaction, and
+# the changes are folded into the counters from time to time.
+table_versions = db.Table(
+    "table_versions",
+    db.Column("table_name", db.String(63), primary_key=True),
+    db.Column("version", db.BigInteger, nullable=False),
+)
+table_changes = db.Table(
+    "table_changes",
+    db.Column("id", db.BigInteger, primary_key=True),
+    db.Column("table_name", db.String(63), nullable=False),
+)
+
+
+# Define a function to read the current version of each of the given tables in one query: its counter plus its
+# changes not folded into it yet
+def versions(tables: Iterable[str]) -> dict[str, int]:
+    changes = db.select(func.count()).where(table_changes.c.table_name == table_versions.c.table_name).scalar_subquery()
+    rows = db.session.execute(
+        db.select(table_versions.c.table_name, table_versions.c.version + changes).where(
+            table_versions.c.table_name.in_(list(tables))
+        )
+    )
+    return dict(rows.tuples().all())
+
+
+# Define a function to read the versions of the given tables once per request, for the decorators of a view that
+# reads them (@cached and @conditional) to share. They are kept in the request's WSGI environment, since `g` outlives
+# the request when an application context was pushed beforehand.
+def request_versions(tables: Iterable[str]) -> dict[str, int]:
+    tables = tuple(sorted(tables))
+    read = request.environ.setdefault("lms.table_versions", {})
+    if tables not in read:
+        read[tables] = versions(tables)
+    return read[tables]
+
+
+# Define a function to derive the entity tag of the current request's response from the versions of the tables it
+# reads and any other `parts` it depends on, such as the requesting user
+def etag(tables: Iterable[str], *parts: Any) -> str:
+    key = repr((request.full_path, sorted(request_versions(tables).items()), parts))
+    return hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+
+
+# Define a function to check whether the request's If-None-Match header names the entity tag.
+# Flask-Compress appends the encoding to the tags of compressed responses (`"<tag>:gzip"`), so the suffix is ignored.
+def if_none_match(tag: str) -> bool:
+    if request.if_none_match.star_tag:
+        return True
+    return any(candidate.split(":", 1)[0] == tag for candidate in request.if_none_match.as_set(include_weak=True))
+
+
+# Define a function to build the empty 304 Not Modified response to a request naming the current tag
+def not_modified(tag: str) -> Response:
+    response = Response(status=304)
+    response.set_etag(tag, weak=True)
+    response.vary.add("Authorization")
+    return response
+
+
+# Define a decorator factory to answer conditional GET requests from the versions of `tables`.
+# A request whose If-None-Match header names the current tag gets an empty 304 Not Modified response without the view
+# running, so no rows are loaded or serialised; other successful responses carry the tag in an ETag header.
+# With `per_user`, the tag also depends on the `current_user` passed by @authorise, for views whose rows differ by user
+# (None for admin routes in hacker mode).
+def conditional(*tables: str, per_user: bool = False) -> Callable:
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs) -> Response:
+            tag = etag(tables, getattr(kwargs.get("current_user"), "id", None) if per_user else None)
+
+            # Skip the view when the client's copy is still current
+            if if_none_match(tag):
+                return not_modified(tag)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            # Validate responses by tag, and keep shared caches from serving one user's copy to another
+            response.set_etag(tag, weak=True)
+            response.vary.add("Authorization")
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,14 +1,59 @@
 # Import necessary standard library and third-party modules
+import base64
+import binascii
+import json
+
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any
+from datetime import date, datetime
+from typing import Any, Callable, ClassVar, Iterable, Iterator, NamedTuple, Sequence
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Integer
+from sqlalchemy import Integer, and_, bindparam, func, literal_column, tuple_, union_all
+
+from .cache import MISSING, TTLCache
 
 # Initialise an instance of SQLAlchemy for ORM-based interactions with the database
 db = SQLAlchemy()
 
+# Cache the statements built by BaseMixin, keyed by model and the shape of the query. Shapes come from the filters
+# and `?fields=` of requests, so the least recently used statements are evicted beyond a fixed number.
+_statements = TTLCache("statements", maxsize=512, ttl=3600.0)
+
+# Define the operators accepted as `<attribute>__<operator>` filter suffixes
+OPERATORS: dict[str, Callable[[Any, Any], Any]] = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "in": lambda column, value: column.in_(value),
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "ilike": lambda column, value: column.ilike(value),
+}
+
+
+# Define a projection: the name of one of a model's views, or a field set naming columns of its __fields__ allowlist
+View = str | tuple[str, ...]
+
+
+# Define the operators of the filters comparing a column to a range of values
+RANGE_OPERATORS: tuple[str, ...] = ("eq", "gt", "gte", "lt", "lte")
+
+
+# Define a filter clients may apply to a list endpoint with a query parameter (`?module_id=12`,
+# `?due_date__gte=2024-05-01`): the attribute it compares, the operators accepted as `<parameter>__<operator>`
+# suffixes, and the function parsing the value, which defaults to the type of the column
+class Filter(NamedTuple):
+    attribute: str
+    operators: tuple[str, ...] = ("eq", "in")
+    parse: Callable[[str], Any] | None = None
+
+
+# Define a page of records returned by BaseMixin.paginate, with the cursor of the next page if there is one
+class Page(NamedTuple):
+    records: list[Any]
+    next_cursor: str | None
+
 
 # Define a mixin class to provide common fields and methods for database models
 @dataclass
@@ -18,18 +63,361 @@ class BaseMixin(object):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Timestamp of record creation
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)  # Timestamp of last update
 
-    # Define a class method to retrieve a record by its unique identifier
+    # Define named column projections ("views") for read paths that only need a few attributes.
+    # Models declare them as e.g. {"list": ("id", "title")}; querying with `view=` returns lightweight rows.
+    # `view=` also accepts a field set, a tuple of column names such as ("id", "title").
+    __views__: ClassVar[dict[str, tuple[str, ...]]] = {}
+
+    # Define the columns clients may select as a field set (`?fields=`), never password hashes or tokens
+    __fields__: ClassVar[tuple[str, ...]] = ()
+
+    # Define the filters clients may apply to list endpoints, keyed by query parameter, and the sort orders they may
+    # request with `?sort=`. Each one is served by an index (db/migrations/V6__list_filter_indexes.sql).
+    __filters__: ClassVar[dict[str, Filter]] = {}
+    __sorts__: ClassVar[tuple[str, ...]] = ("id", "-id")
+
+    # Define the functions converting the rows of each view (by position) and entities (by attribute) to dictionaries,
+    # keyed by (view, by_position). Those of named views are generated when the model class is defined, and those of
+    # field sets when they are first used.
+    __serializers__: ClassVar[dict[tuple[View, bool], Callable[[Any], dict[str, Any]]]] = {}
+
+    # Compile the serializers of a model's views as the model class is created
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.__serializers__ = {
+            (view, by_position): _compile_serializer(names, by_position)
+            for view, names in cls.__views__.items()
+            for by_position in (True, False)
+        }
+
+    # Define a class method to return the function converting a row of a view (or an entity) to a dictionary
+    @classmethod
+    def serializer(cls, view: View, by_position: bool = True) -> Callable[[Any], dict[str, Any]]:
+        serializer = cls.__serializers__.get((view, by_position))
+        if serializer is None:
+            serializer = _compile_serializer(cls._columns(view), by_position)
+            cls.__serializers__[(view, by_position)] = serializer
+        return serializer
+
+    # Define a class method to convert rows selected with `view=` to dictionaries of the view's columns
+    @classmethod
+    def serialize(cls, rows: Iterable[Any], view: View) -> list[dict[str, Any]]:
+        return list(map(cls.serializer(view), rows))
+
+    # Define a method to convert the entity to a dictionary of the columns of a view
+    def to_dict(self, view: View) -> dict[str, Any]:
+        return self.serializer(view, by_position=False)(self)
+
+    # Define a class method to retrieve a record by its unique identifier, checking the identity map first
     @classmethod
     def get(cls, id) -> Any:
-        return cls.query.get(id)
+        return db.session.get(cls, id)
+
+    # Define a class method to retrieve the records matching a list of identifiers in one query
+    @classmethod
+    def get_many(cls, ids: Iterable[int]) -> list[Any]:
+        ids = list(ids)
+        if not ids:
+            return []
+
+        records = {record.id: record for record in cls.find_all(id__in=ids)}
+        return [records[id] for id in ids if id in records]
+
+    # Define a class method to retrieve the first record matching the provided filter criteria.
+    # With `view`, only the columns of that view are selected and a row is returned instead of an entity.
+    @classmethod
+    def find_by(cls, view: View | None = None, **kwargs) -> Any | None:
+        kind = "find_by" if view is None else ("find_by", view)
+        statement = cls._statement(kind, kwargs, lambda filters: cls._select(view).where(*filters).limit(1))
+        result = db.session.execute(statement, cls._params(kwargs))
+        return (result.scalars() if view is None else result).first()
+
+    # Define a class method to retrieve every record matching the filter criteria, optionally ordered and limited.
+    # With `view`, only the columns of that view are selected and rows are returned instead of entities.
+    @classmethod
+    def find_all(
+        cls, order_by: str | tuple[str, ...] = "id", limit: int | None = None, view: View | None = None, **kwargs
+    ) -> list[Any]:
+        order_by = (order_by,) if isinstance(order_by, str) else tuple(order_by)
+
+        def build(filters) -> Any:
+            statement = cls._select(view).where(*filters).order_by(*cls._ordering(order_by))
+            return statement if limit is None else statement.limit(bindparam("limit", type_=Integer))
+
+        statement = cls._statement(("find_all", order_by, limit is None, view), kwargs, build)
+        params = cls._params(kwargs) if limit is None else {**cls._params(kwargs), "limit": limit}
+        return cls._records(db.session.execute(statement, params), view)
+
+    # Define a class method to fetch one page of records using keyset (cursor) pagination.
+    # Records are ordered by `order_by` ("field" or "-field") with the id as a tie-breaker,
+    # and `after` is the opaque cursor returned with the previous page. With `view`, the page holds rows
+    # of the view's columns, plus the sort key when the view does not include it.
+    @classmethod
+    def paginate(
+        cls, after: str | None = None, limit: int = 100, order_by: str = "id", view: View | None = None, **kwargs
+    ) -> Page:
+        descending = order_by.startswith("-")
+        keys = tuple(dict.fromkeys((order_by.removeprefix("-"), "id")))
+        columns = [getattr(cls, key) for key in keys]
+
+        # Decode the cursor into the sort values of the last record of the previous page
+        position = _decode_cursor(after, columns) if after else None
+        state = None if position is None else ("null" if position[0] is None else "value")
+
+        def build(filters) -> Any:
+            ordering = [_order(column, descending) for column in columns]
+            statement = cls._select(view, keys).where(*filters)
+            if state is None:
+                return statement.order_by(*ordering).limit(bindparam("limit", type_=Integer))
+
+            # Past a cursor on a nullable sort key, read the remaining values and the trailing NULL values with one
+            # index scan each, rather than a single scan filtering on `(sort key, id) > cursor OR sort key IS NULL`
+            if state == "value" and len(columns) == 2 and columns[0].expression.nullable:
+                return _union_after(cls, view, statement, columns, ordering, descending)
+
+            statement = statement.where(_keyset_filter(columns, descending, state))
+            return statement.order_by(*ordering).limit(bindparam("limit", type_=Integer))
+
+        statement = cls._statement(("paginate", order_by, state, view), kwargs, build)
+        params = {**cls._params(kwargs), "limit": limit + 1}
+        if position is not None:
+            params.update({f"after_{key}": value for key, value in zip(keys, position)})
+        records = cls._records(db.session.execute(statement, params), view)
+
+        # Fetch one extra record to find out whether another page follows
+        if len(records) <= limit:
+            return Page(records=records, next_cursor=None)
+        records = records[:limit]
+        return Page(records=records, next_cursor=_encode_cursor([getattr(records[-1], key) for key in keys]))
+
+    # Define a class method to check whether any record matches, compiling to `SELECT 1 ... LIMIT 1`
+    @classmethod
+    def exists(cls, **kwargs) -> bool:
+        statement = cls._statement(
+            "exists", kwargs, lambda filters: db.select(literal_column("1")).select_from(cls).where(*filters).limit(1)
+        )
+        return db.session.execute(statement, cls._params(kwargs)).scalar() is not None
+
+    # Define a class method to count the records matching the filter criteria
+    @classmethod
+    def count(cls, **kwargs) -> int:
+        statement = cls._statement(
+            "count", kwargs, lambda filters: db.select(func.count()).select_from(cls).where(*filters)
+        )
+        return db.session.execute(statement, cls._params(kwargs)).scalar_one()
+
+    # Define a class method to select whole entities, or only the columns of a view (plus any `extra` attributes)
+    @classmethod
+    def _select(cls, view: View | None, extra: Iterable[str] = ()) -> Any:
+        if view is None:
+            return db.select(cls)
+
+        names = cls._columns(view)
+        return db.select(*(getattr(cls, name) for name in (*names, *(key for key in extra if key not in names))))
+
+    # Define a class method to resolve a view name or a field set into its column names.
+    # Raises ValueError when a field set names a column outside of the __fields__ allowlist.
+    @classmethod
+    def _columns(cls, view: View) -> tuple[str, ...]:
+        if isinstance(view, str):
+            return cls.__views__[view]
+        if not view or not set(view) <= set(cls.__fields__):
+            raise ValueError(f"Invalid field set for {cls.__name__}: {view}")
+        return view
 
-    # Define a class method to retrieve the first record matching the provided filter criteria
+    # Define a class method to read entities, or rows when a view was selected, from a result
     @classmethod
-    def find_by(cls, **kwargs) -> Any | None:
-        filters = cls._filters(kwargs)  # Generate filter conditions based on provided keyword arguments
-        return db.session.execute(db.select(cls).where(*filters)).scalars().first()
+    def _records(cls, result, view: View | None) -> list[Any]:
+        return list(result.scalars() if view is None else result)
 
-    # Define a class method to generate filter conditions for SQLAlchemy queries
+    # Define a class method to reuse the statement built for the same query shape, binding only the values
     @classmethod
-    def _filters(cls, kwargs) -> list[Any]:
-        return [getattr(cls, attr) == kwargs[attr] for attr in kwargs]
+    def _statement(cls, kind, kwargs, build: Callable[[list[Any]], Any]) -> Any:
+        shape = cls._shape(kwargs)
+        statement = _statements.get((cls, kind, shape))
+        if statement is MISSING:
+            statement = build(cls._filters(shape))
+            _statements.set((cls, kind, shape), statement)
+        return statement
+
+    # Define a class method to describe filter keyword arguments independently of their values.
+    # Raises ValueError when the value of an `__in` filter is not a collection of values.
+    @classmethod
+    def _shape(cls, kwargs) -> tuple[tuple[str, bool], ...]:
+        for key, value in kwargs.items():
+            if cls._split(key)[1] == "in" and (isinstance(value, (str, bytes)) or not isinstance(value, Iterable)):
+                raise ValueError(f"Invalid value for {key}: expected a collection, got {type(value).__name__}")
+        return tuple(sorted((key, kwargs[key] is None) for key in kwargs))
+
+    # Define a class method to generate filter conditions with bound parameters for SQLAlchemy queries
+    @classmethod
+    def _filters(cls, shape) -> list[Any]:
+        filters = []
+        for key, is_none in shape:
+            attr, operator = cls._split(key)
+            column = getattr(cls, attr)
+            if is_none and operator in ("eq", "ne"):
+                filters.append(column.is_(None) if operator == "eq" else column.is_not(None))
+            else:
+                filters.append(OPERATORS[operator](column, bindparam(key, expanding=operator == "in")))
+        return filters
+
+    # Define a class method to split a filter keyword into its attribute and operator
+    @classmethod
+    def _split(cls, key: str) -> tuple[str, str]:
+        attr, _, operator = key.rpartition("__")
+        if attr and operator in OPERATORS:
+            return attr, operator
+        return key, "eq"
+
+    # Define a class method to translate `attribute` / `-attribute` names into ORDER BY clauses
+    @classmethod
+    def _ordering(cls, order_by: tuple[str, ...]) -> list[Any]:
+        return [
+            getattr(cls, name.removeprefix("-")).desc() if name.startswith("-") else getattr(cls, name).asc()
+            for name in order_by
+        ]
+
+    # Define a class method to extract the values bound to the cached statement
+    @classmethod
+    def _params(cls, kwargs) -> dict[str, Any]:
+        return {
+            key: list(value) if cls._split(key)[1] == "in" else value
+            for key, value in kwargs.items()
+            if value is not None or cls._split(key)[1] not in ("eq", "ne")
+        }
+
+
+# Define a function to generate and compile a function building a dictionary of the `names` columns, reading them by
+# position from a row (`{"id": record[0], ...}`) or by attribute from an entity (`{"id": record.id, ...}`).
+# The generated function runs without loops or reflection.
+def _compile_serializer(names: tuple[str, ...], by_position: bool) -> Callable[[Any], dict[str, Any]]:
+    if not all(name.isidentifier() for name in names):
+        raise ValueError(f"Invalid column names in view: {names}")
+
+    values = [f"record[{index}]" if by_position else f"record.{name}" for index, name in enumerate(names)]
+    fields = ", ".join(f"{name!r}: {value}" for name, value in zip(names, values))
+    source = f"def serialize(record):\n    return {{{fields}}}\n"
+    namespace: dict[str, Any] = {}
+    exec(compile(source, f"<serializer {', '.join(names)}>", "exec"), namespace)
+    return namespace["serialize"]
+
+
+# Define a function to stream rows into the columns of a table with `COPY ... FROM STDIN` on the session's connection,
+# within its current transaction. The rows are encoded as PostgreSQL reads them, so an iterator is never held in memory.
+# Returns the number of rows copied.
+def copy_rows(table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", _CopyStream(rows))
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+# Define a read-only file object producing the COPY text format of rows on demand
+class _CopyStream(object):
+    def __init__(self, rows: Iterable[Sequence[Any]]) -> None:
+        self._lines: Iterator[bytes] = (_copy_line(row) for row in rows)
+        self._pending = b""
+
+    # Define a method to return up to `size` bytes, encoding only as many rows as needed
+    def read(self, size: int = -1) -> bytes:
+        chunks, length = [self._pending], len(self._pending)
+        for line in self._lines:
+            chunks.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+
+        data = b"".join(chunks)
+        if size < 0:
+            self._pending = b""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+
+# Define a function to encode a row in the COPY text format: tab-separated, \N for NULL, with special characters escaped
+def _copy_line(row: Sequence[Any]) -> bytes:
+    values = (
+        "\\N"
+        if value is None
+        else str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+        for value in row
+    )
+    return ("\t".join(values) + "\n").encode("utf-8")
+
+
+# Define a function to order by a column with its NULL values last in either direction. NULLS LAST is only spelled
+# out where it differs from PostgreSQL's default, so that an ascending index also serves descending orders on columns
+# that cannot be NULL.
+def _order(column: Any, descending: bool) -> Any:
+    if not descending:
+        return column.asc()
+    return column.desc().nulls_last() if column.expression.nullable else column.desc()
+
+
+# Define a function to build the condition selecting the records after the cursor position
+def _keyset_filter(columns: list[Any], descending: bool, state: str) -> Any:
+    after = [bindparam(f"after_{column.key}", type_=column.type) for column in columns]
+    compare = (lambda left, right: left < right) if descending else (lambda left, right: left > right)
+
+    # Paginating on the id alone
+    if len(columns) == 1:
+        return compare(columns[0], after[0])
+
+    # The cursor sits among the trailing NULL sort values, so only later NULL rows remain
+    sort_column, id_column = columns
+    if state == "null":
+        return and_(sort_column.is_(None), compare(id_column, after[1]))
+
+    # Compare (sort value, id) as a row value so that a composite index can serve the query
+    return compare(tuple_(sort_column, id_column), tuple_(*after))
+
+
+# Define a function to select the page after a cursor on a nullable sort key as the union of the next non-NULL values
+# and the first NULL values, each limited to a page, merged in the page's order
+def _union_after(
+    model: Any, view: View | None, statement: Any, columns: list[Any], ordering: list[Any], descending: bool
+) -> Any:
+    limit = bindparam("limit", type_=Integer)
+    union = union_all(
+        statement.where(_keyset_filter(columns, descending, "value")).order_by(*ordering).limit(limit),
+        statement.where(columns[0].is_(None)).order_by(*ordering).limit(limit),
+    )
+    union = union.order_by(*ordering).limit(limit)
+    if view is None:
+        return db.select(model).from_statement(union)
+    return union
+
+
+# Define a function to encode sort values into an opaque, URL-safe cursor
+def _encode_cursor(values: list[Any]) -> str:
+    payload = json.dumps([value.isoformat() if isinstance(value, (date, datetime)) else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+# Define a function to decode a cursor back into sort values, raising ValueError when it is malformed
+def _decode_cursor(cursor: str, columns: list[Any]) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(columns) or values[-1] is None:
+        raise ValueError("Invalid cursor")
+
+    decoded = []
+    for value, column in zip(values, columns):
+        python_type = column.type.python_type
+        try:
+            if value is None:
+                decoded.append(None)
+            elif python_type in (date, datetime):
+                decoded.append(python_type.fromisoformat(value))
+            else:
+                decoded.append(python_type(value))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+    return decoded
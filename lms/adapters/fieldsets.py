@@ -0,0 +1,25 @@
+# Import necessary modules and types
+from typing import Any
+
+from flask import request
+
+from .database import View
+
+
+# Define a function to read the `fields` query parameter of the current request (`?fields=id,title`) into a field set
+# of `model`, ordered as in the model's __fields__ allowlist, or return the `default` view when it is absent.
+# Raises ValueError naming the fields outside of the allowlist.
+def fields_arg(model: Any, default: str) -> View:
+    value = request.args.get("fields")
+    if value is None:
+        return default
+
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested - set(model.__fields__)
+    if unknown or not requested:
+        raise ValueError(
+            f"Invalid fields{': ' + ', '.join(sorted(unknown)) if unknown else ''}, "
+            f"please choose from {', '.join(model.__fields__)}"
+        )
+
+    return tuple(name for name in model.__fields__ if name in requested)
@@ -0,0 +1,55 @@
+# Import necessary modules and types
+from datetime import date, datetime
+from typing import Any, Callable, Final
+
+from flask import request
+
+from .database import Filter
+
+# Define the query parameters of list endpoints that are read by the other helpers, and never name a filter
+RESERVED_ARGS: Final[frozenset[str]] = frozenset({"after", "limit", "fields", "sort"})
+
+
+# Define a function to read the filters of the current request (`?module_id=12&due_date__gte=2024-05-01`) into
+# keyword arguments for `model.paginate`, following the model's __filters__ allowlist.
+# `<parameter>__in` takes comma-separated values. Raises ValueError naming an unknown filter or an invalid value.
+def filter_args(model: Any) -> dict[str, Any]:
+    filters = {}
+    for name, value in request.args.items():
+        if name in RESERVED_ARGS:
+            continue
+
+        parameter, _, operator = name.partition("__")
+        declared = model.__filters__.get(parameter)
+        if declared is None or (operator or "eq") not in declared.operators:
+            raise ValueError(f"Invalid filter: {name}, please choose from {', '.join(model.__filters__)}")
+
+        key = f"{declared.attribute}__{operator}" if operator else declared.attribute
+        filters[key] = _parse(model, declared, name, value, operator == "in")
+    return filters
+
+
+# Define a function to read the `sort` query parameter of the current request (`?sort=due_date`, `?sort=-created_at`),
+# or return `default` when it is absent. Raises ValueError for an order outside of the model's __sorts__ allowlist,
+# which only names orders served by an index.
+def sort_arg(model: Any, default: str = "id") -> str:
+    value = request.args.get("sort", default)
+    if value not in model.__sorts__:
+        raise ValueError(f"Invalid sort: {value}, please choose from {', '.join(model.__sorts__)}")
+    return value
+
+
+# Define a function to parse the value of a filter, or each of its comma-separated values
+def _parse(model: Any, declared: Filter, name: str, value: str, many: bool) -> Any:
+    parse = declared.parse or _column_parser(getattr(model, declared.attribute))
+    try:
+        values = [parse(item.strip()) for item in value.split(",")] if many else parse(value)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Invalid value for {name}: {value}")
+    return values
+
+
+# Define a function to return the parser of a column's values: ISO 8601 for dates and datetimes, the type otherwise
+def _column_parser(column: Any) -> Callable[[str], Any]:
+    python_type = column.type.python_type
+    return python_type.fromisoformat if python_type in (date, datetime) else python_type
@@ -0,0 +1,56 @@
+# Import necessary standard library modules
+import dataclasses
+import decimal
+
+from typing import Any
+
+# Import orjson, which encodes dictionaries, lists, dates, datetimes, UUIDs and enums natively
+import orjson
+
+# Import Flask's JSON provider interface and response class
+from flask import Response
+from flask.json.provider import JSONProvider
+
+
+# Define a function to encode the values orjson does not handle itself, as Flask's default provider would
+def _default(value: Any) -> Any:
+    # Encode decimals as strings, so that no precision is lost
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    # Encode named tuples as arrays; orjson leaves tuple subclasses to this function
+    if isinstance(value, tuple):
+        return list(value)
+    # Encode dataclasses, such as model instances, from their declared fields only
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    # Encode markup as its HTML
+    if hasattr(value, "__html__"):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# Define a JSON provider for Flask built on orjson.
+# Responses are encoded straight to bytes, keys keep their insertion order unless `sort_keys` is set, and dates and
+# datetimes are written in ISO 8601.
+class OrjsonProvider(JSONProvider):
+    # Define whether the keys of objects are sorted; Flask's default provider sorts them
+    sort_keys: bool = False
+
+    # Define the orjson options for the configuration of the provider
+    def _options(self) -> int:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_SERIALIZE_NUMPY
+        return options | orjson.OPT_SORT_KEYS if self.sort_keys else options
+
+    # Define a method to serialise data as a JSON string; Flask's keyword arguments (`indent`, `separators`) are ignored
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=self._options()).decode("utf-8")
+
+    # Define a method to deserialise JSON from a string or bytes, raising a ValueError when it is invalid
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    # Define a method to build the response of `jsonify`, encoding the body once as bytes with a trailing newline
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype="application/json")
@@ -0,0 +1,36 @@
+# Import necessary modules and types
+from typing import Any, Final
+
+from flask import Response, jsonify, request, url_for
+
+from .database import Page
+
+# Define the default and maximum number of records returned per page
+DEFAULT_PAGE_SIZE: Final[int] = 100
+MAX_PAGE_SIZE: Final[int] = 1000
+
+# Define the message returned when the pagination query parameters are invalid
+INVALID_PAGE_MESSAGE: Final[str] = "Invalid pagination parameters, please double-check them and try again"
+
+
+# Define a function to read the `after` cursor and `limit` query parameters of the current request
+def page_args() -> tuple[str | None, int]:
+    after = request.args.get("after") or None
+    limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+
+    # Reject page sizes outside the allowed range
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    return after, limit
+
+
+# Define a function to build the JSON response for a page, linking to the next page in a `Link` header
+def paginated_response(items: list[Any], page: Page) -> Response:
+    response = jsonify(items)
+
+    if page.next_cursor:
+        args = {**request.view_args, **request.args.to_dict(), "after": page.next_cursor}
+        response.headers["Link"] = f'<{url_for(request.endpoint, **args)}>; rel="next"'
+
+    return response
@@ -0,0 +1,205 @@
+# Import necessary standard library modules
+import os
+import statistics
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from typing import Any, Callable, Iterable
+
+# Import bcrypt library for password hashing, and click for the calibration command
+import bcrypt
+import click
+
+# Import the Flask class for type hinting
+from flask import Flask
+
+
+# Define the error raised when the pool's queue is full and the request should be shed
+class PoolSaturated(Exception):
+    pass
+
+
+# Define a size-limited worker pool for bcrypt work with a queue-depth limit.
+# bcrypt releases the GIL while hashing, so worker threads run in parallel with request threads
+# while capping how many cores password work can take away from every other endpoint.
+# Bulk provisioning hashes on a separate batch executor, so that it never queues ahead of interactive logins.
+class PasswordPool(object):
+    def __init__(self, app: Flask | None = None) -> None:
+        self._executor: ThreadPoolExecutor | None = None
+        self._batch_executor: ThreadPoolExecutor | None = None
+        self._slots: threading.BoundedSemaphore | None = None
+        self._batch_slot = threading.BoundedSemaphore(1)
+        self._lock = threading.Lock()
+        self._run_times: deque[float] = deque(maxlen=1024)
+        self._wait_times: deque[float] = deque(maxlen=1024)
+        self.max_workers = 0
+        self.max_queue = 0
+        self.batch_workers = 0
+        self.rounds = 12
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    # Define a method to create the workers from the application configuration
+    def init_app(self, app: Flask) -> None:
+        self.max_workers = app.config.setdefault("PASSWORD_POOL_WORKERS", 2)
+        self.max_queue = app.config.setdefault("PASSWORD_POOL_QUEUE", 16)
+        self.batch_workers = app.config.setdefault("PASSWORD_BATCH_WORKERS", os.cpu_count() or 1)
+        self.rounds = app.config.setdefault("BCRYPT_ROUNDS", 12)
+        for executor in (self._executor, self._batch_executor):
+            if executor is not None:
+                executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-pool")
+        self._batch_executor = ThreadPoolExecutor(max_workers=self.batch_workers, thread_name_prefix="password-batch")
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        app.extensions["password_pool"] = self
+
+    # Define a method to hash a password with the configured work factor, returning the hash as a string
+    def hash(self, password: str, rounds: int | None = None) -> str:
+        salt = bcrypt.gensalt(rounds or self.rounds)
+        return self._run(bcrypt.hashpw, password.encode("utf-8"), salt).decode("utf-8")
+
+    # Define a method to hash a batch of passwords across the batch workers, returning the hashes in order.
+    # One batch runs at a time; a concurrent batch is shed with PoolSaturated.
+    def hash_many(self, passwords: Iterable[str], rounds: int | None = None) -> list[str]:
+        if self._batch_executor is None:
+            raise RuntimeError("PasswordPool.init_app() must be called before use")
+
+        if not self._batch_slot.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated()
+
+        try:
+            return list(self._batch_executor.map(_hash_password, passwords, repeat(rounds or self.rounds)))
+        finally:
+            self._batch_slot.release()
+
+    # Define a method to check a password against a stored hash
+    def check(self, password: str, hashed: str) -> bool:
+        return self._run(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    # Define a method to tell whether a hash was made with a work factor other than the configured one
+    def needs_rehash(self, hashed: str) -> bool:
+        return hash_rounds(hashed) != self.rounds
+
+    # Define a method to run a function on the pool, shedding it when the queue is full
+    def _run(self, function: Callable, *args) -> Any:
+        if self._executor is None:
+            raise RuntimeError("PasswordPool.init_app() must be called before use")
+
+        # Reject the work straight away when every worker is busy and the queue is full
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated()
+
+        with self._lock:
+            self.in_flight += 1
+        submitted_at = time.perf_counter()
+
+        def timed() -> Any:
+            started_at = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                finished_at = time.perf_counter()
+                with self._lock:
+                    self._wait_times.append(started_at - submitted_at)
+                    self._run_times.append(finished_at - started_at)
+
+        try:
+            return self._executor.submit(timed).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+            self._slots.release()
+
+    # Define a method to report the pool's queue and latency metrics
+    def stats(self) -> dict[str, int | float | None]:
+        with self._lock:
+            run_times = sorted(self._run_times)
+            wait_times = sorted(self._wait_times)
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queued": max(self.in_flight - self.max_workers, 0),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "run_ms_p50": _percentile(run_times, 0.50),
+                "run_ms_p99": _percentile(run_times, 0.99),
+                "wait_ms_p50": _percentile(wait_times, 0.50),
+                "wait_ms_p99": _percentile(wait_times, 0.99),
+            }
+
+
+# Define a function to hash a password with its own salt on a batch worker
+def _hash_password(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+# Define a function to read the work factor from a bcrypt hash such as `$2b$12$...`
+def hash_rounds(hashed: str) -> int | None:
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+# Define a function to measure hashing time per work factor and pick the largest within the latency budget
+def calibrate_rounds(
+    target_ms: float, min_rounds: int = 10, max_rounds: int = 16, samples: int = 3
+) -> tuple[int, dict[int, float]]:
+    timings: dict[int, float] = {}
+    chosen = min_rounds
+
+    for rounds in range(min_rounds, max_rounds + 1):
+        salt = bcrypt.gensalt(rounds)
+        durations = []
+        for _ in range(samples):
+            started_at = time.perf_counter()
+            bcrypt.hashpw(b"calibration", salt)
+            durations.append(time.perf_counter() - started_at)
+        timings[rounds] = round(statistics.median(durations) * 1000, 3)
+
+        # Each extra round doubles the cost, so stop at the first one over budget
+        if timings[rounds] > target_ms:
+            break
+        chosen = rounds
+
+    return chosen, timings
+
+
+# Define a CLI command to calibrate BCRYPT_ROUNDS on the deployment hardware
+@click.command("calibrate-bcrypt")
+@click.option("--target-ms", type=float, default=250.0, show_default=True, help="Latency budget for one hash.")
+@click.option("--min-rounds", type=int, default=10, show_default=True, help="Lowest acceptable work factor.")
+@click.option("--max-rounds", type=int, default=16, show_default=True, help="Highest work factor to try.")
+def calibrate_bcrypt_command(target_ms: float, min_rounds: int, max_rounds: int) -> None:
+    """Measure bcrypt on this machine and recommend BCRYPT_ROUNDS."""
+    rounds, timings = calibrate_rounds(target_ms=target_ms, min_rounds=min_rounds, max_rounds=max_rounds)
+
+    for cost, duration in timings.items():
+        click.echo(f"rounds={cost:>2}: {duration:9.3f}ms")
+    if timings[min_rounds] > target_ms:
+        click.echo(f"Warning: even {min_rounds} rounds exceed the {target_ms}ms budget.")
+    click.echo(f"BCRYPT_ROUNDS={rounds}")
+
+
+# Define a function to read a percentile, in milliseconds, from sorted samples in seconds
+def _percentile(samples: list[float], fraction: float) -> float | None:
+    if not samples:
+        return None
+    return round(samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000, 3)
+
+
+# Initialise the pool shared by the application; workers are created by init_app
+password_pool = PasswordPool()
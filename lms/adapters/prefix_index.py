@@ -0,0 +1,98 @@
+# Import necessary standard library modules
+import bisect
+import heapq
+import itertools
+import threading
+
+from typing import Any, Callable, Iterable
+
+
+# Define an in-memory index finding records by the prefix of any word of a text, standing in for a trigram index
+# where none is available. Each record contributes one key per word, the text from the start of that word (truncated
+# to `length` characters), and the keys of every record are held in one sorted list: the records matching a prefix
+# are those of the contiguous run of keys starting with it, found by binary search. Records are also kept sorted by
+# `order`, the order in which searches return them, so that a prefix matching many records can be answered by walking
+# them in order until enough match, rather than ranking every match.
+class PrefixIndex(object):
+    def __init__(self, order: Callable[[Any], Any], length: int = 64) -> None:
+        self.order = order
+        self.length = length
+        self.loaded = False
+        self._keys: list[tuple[str, int]] = []
+        self._ordered: list[tuple[Any, int]] = []
+        self._documents: dict[int, tuple[list[str], Any, Any]] = {}
+        self._lock = threading.Lock()
+
+    # Define a method to replace the contents of the index with (id, text, record) documents, sorting them once
+    def load(self, documents: Iterable[tuple[int, str, Any]]) -> None:
+        with self._lock:
+            self._documents = {id: (self._words(text), self.order(record), record) for id, text, record in documents}
+            self._keys = sorted((key, id) for id, (keys, _, _) in self._documents.items() for key in keys)
+            self._ordered = sorted((position, id) for id, (_, position, _) in self._documents.items())
+            self.loaded = True
+
+    # Define a method to index a record, replacing its previous text
+    def add(self, id: int, text: str, record: Any) -> None:
+        with self._lock:
+            self._discard(id)
+            keys, position = self._words(text), self.order(record)
+            for key in keys:
+                bisect.insort(self._keys, (key, id))
+            bisect.insort(self._ordered, (position, id))
+            self._documents[id] = (keys, position, record)
+
+    # Define a method to remove a record from the index
+    def remove(self, id: int) -> None:
+        with self._lock:
+            self._discard(id)
+
+    # Define a method to drop every record, until the index is loaded again
+    def clear(self) -> None:
+        with self._lock:
+            self._keys, self._ordered, self._documents, self.loaded = [], [], {}, False
+
+    # Define a method to return the first `limit` records in order with a word starting with the prefix, and accepted
+    # by `where`
+    def search(self, prefix: str, limit: int, where: Callable[[Any], bool] | None = None) -> list[Any]:
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (prefix,))
+            end = bisect.bisect_left(self._keys, (prefix + chr(0x10FFFF),), lo=start)
+
+            # Walk the records in order when enough of them match to find `limit` sooner than by ranking the matches:
+            # with m of n keys matching, about limit * n / m records are read if the matches are spread evenly, against
+            # m matches to rank. The walk gives up after four times as many, when the matches are bunched further on or
+            # `where` rejects most of them, and the matches are ranked instead.
+            matches = end - start
+            if matches and 4 * limit * len(self._keys) < matches**2:
+                records = []
+                for _, id in itertools.islice(self._ordered, 4 * limit * len(self._keys) // matches):
+                    words, _, record = self._documents[id]
+                    if any(word.startswith(prefix) for word in words) and (where is None or where(record)):
+                        records.append(record)
+                        if len(records) == limit:
+                            return records
+
+            # Rank the matching records, keeping the first `limit` of them
+            documents = self._documents
+            candidates = (
+                (documents[id][1], id)
+                for id in {id for _, id in self._keys[start:end]}
+                if where is None or where(documents[id][2])
+            )
+            return [documents[id][2] for _, id in heapq.nsmallest(limit, candidates)]
+
+    # Define a method to return the keys of a text: the text from the start of each of its words
+    def _words(self, text: str) -> list[str]:
+        starts = [0] + [index + 1 for index, character in enumerate(text) if character == " "]
+        return list(dict.fromkeys(text[start : start + self.length] for start in starts))
+
+    # Define a method to remove the keys and the position of a record, if it is indexed
+    def _discard(self, id: int) -> None:
+        if id not in self._documents:
+            return
+
+        keys, position, _ = self._documents.pop(id)
+        for entries, entry in [*((self._keys, (key, id)) for key in keys), (self._ordered, (position, id))]:
+            index = bisect.bisect_left(entries, entry)
+            if index < len(entries) and entries[index] == entry:
+                del entries[index]
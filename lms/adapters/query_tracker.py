@@ -0,0 +1,319 @@
+# Import necessary standard library modules
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Any, Iterator
+
+# Import the Flask objects used to scope the statements to the current request
+from flask import Flask, Response, current_app, g, has_request_context, request
+
+# Import SQLAlchemy's event API and the Engine class to hook into every cursor execution
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Define the pattern of psycopg2's placeholders (`%(name)s` and `%s`) and escaped percent signs (`%%`)
+PLACEHOLDER = re.compile(r"%%|%\(([^)]+)\)s|%s")
+
+# Define the most repeated statements reported per endpoint, and the most distinct statements remembered
+TOP_REPEATED = 5
+MAX_TRACKED_STATEMENTS = 200
+
+# Define the logger for slow statements, and the logger writing their sampled plans to a rotating file
+logger = logging.getLogger(__name__)
+plan_logger = logging.getLogger(f"{__name__}.plans")
+plan_logger.propagate = False
+
+
+# Define a recorder of the SQL statements run by each request.
+# It counts the statements and their cumulative time, reports them in a `Server-Timing` header, and flags
+# statements repeated within one request (typically lazy relationship loads) as N+1 candidates.
+class QueryTracker(object):
+    def __init__(self, app: Flask | None = None) -> None:
+        self._lock = threading.Lock()
+        self._captures: ContextVar[list[str] | None] = ContextVar("query_captures", default=None)
+        self._endpoints: dict[str, dict[str, Any]] = {}
+        self._slow: dict[str, dict[str, Any]] = {}
+        self.n_plus_one_threshold = 3
+        self.slow_query_ms = 200.0
+        self.explain_sample_rate = 0.0
+
+        if app is not None:
+            self.init_app(app)
+
+    # Define a method to hook the tracker into the engine events and the request lifecycle
+    def init_app(self, app: Flask) -> None:
+        self.n_plus_one_threshold = app.config.setdefault("QUERY_N_PLUS_ONE_THRESHOLD", 3)
+        self.slow_query_ms = app.config.setdefault("SLOW_QUERY_MS", 200.0)
+        self.explain_sample_rate = app.config.setdefault("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 0.0)
+        if app.config.get("QUERY_PLAN_LOG_PATH"):
+            self.open_plan_log(app.config["QUERY_PLAN_LOG_PATH"])
+        if not event.contains(Engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+            event.listen(Engine, "handle_error", self._handle_error)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._discard_request)
+        app.extensions["query_tracker"] = self
+
+    # Define a context manager collecting the statements run on the current thread, for tests and benchmarks
+    @contextmanager
+    def capture(self) -> Iterator[list[str]]:
+        statements: list[str] = []
+        token = self._captures.set(statements)
+        try:
+            yield statements
+        finally:
+            self._captures.reset(token)
+
+    # Define a method to report the per-endpoint aggregates, busiest endpoints first
+    def stats(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            endpoints = sorted(self._endpoints.items(), key=lambda item: item[1]["db_ms"], reverse=True)
+            return {
+                endpoint: {
+                    "requests": totals["requests"],
+                    "queries": totals["queries"],
+                    "queries_per_request": round(totals["queries"] / totals["requests"], 2),
+                    "max_queries": totals["max_queries"],
+                    "db_ms": round(totals["db_ms"], 3),
+                    "db_ms_per_request": round(totals["db_ms"] / totals["requests"], 3),
+                    "n_plus_one_requests": totals["n_plus_one_requests"],
+                    "repeated_statements": [
+                        {"statement": statement, "requests": count}
+                        for statement, count in totals["repeated"].most_common(TOP_REPEATED)
+                    ],
+                }
+                for endpoint, totals in endpoints
+            }
+
+    # Define a method to report the slowest statements by total time, with their parameter shapes and endpoints
+    def slow_queries(self, limit: int = 20) -> list[dict[str, Any]]:
+        with self._lock:
+            offenders = sorted(self._slow.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:limit]
+            return [
+                {
+                    "statement": statement,
+                    "calls": totals["calls"],
+                    "total_ms": round(totals["total_ms"], 3),
+                    "mean_ms": round(totals["total_ms"] / totals["calls"], 3),
+                    "max_ms": round(totals["max_ms"], 3),
+                    "parameters": totals["parameters"],
+                    "endpoints": sorted(totals["endpoints"]),
+                    "plans_captured": totals["plans_captured"],
+                }
+                for statement, totals in offenders
+            ]
+
+    # Define a method to write the sampled query plans to a rotating file at `path`, or to stop capturing them
+    def open_plan_log(self, path: str | None, max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5) -> None:
+        for handler in list(plan_logger.handlers):
+            plan_logger.removeHandler(handler)
+            handler.close()
+        if not path:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        plan_logger.addHandler(handler)
+        plan_logger.setLevel(logging.INFO)
+
+    # Define a method to forget the aggregates
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+            self._slow.clear()
+
+    # Define the engine hook remembering when a statement started
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    # Define the engine hook recording a finished statement against the current request and captures
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        duration = time.perf_counter() - conn.info["query_started_at"].pop()
+        captured = self._captures.get()
+        if captured is not None:
+            captured.append(statement)
+        if has_request_context() and "query_log" in g:
+            g.query_log.append((statement, duration))
+        if duration * 1000 >= self.slow_query_ms:
+            self._record_slow_query(conn, statement, parameters, executemany, duration * 1000)
+
+    # Define the engine hook dropping the start time of a statement that failed
+    def _handle_error(self, context) -> None:
+        if context.connection is not None and context.connection.info.get("query_started_at"):
+            context.connection.info["query_started_at"].pop()
+
+    # Define a method to log a slow statement, add it to the offenders and, on a sample, capture its plan
+    def _record_slow_query(self, conn, statement: str, parameters, executemany: bool, duration_ms: float) -> None:
+        endpoint = request.endpoint if has_request_context() else None
+        shape = _parameter_shape(parameters, executemany)
+        logger.warning("Slow query (%.1fms) on %s: %s; parameters: %s", duration_ms, endpoint, statement, shape)
+
+        # Re-running the statement doubles its cost, so only sampled read statements are explained, when there is a
+        # plan log to write them to
+        explain = (
+            plan_logger.hasHandlers()
+            and not executemany
+            and conn.dialect.name == "postgresql"
+            and statement.lstrip().upper().startswith("SELECT")
+            and random.random() < self.explain_sample_rate
+        )
+        if explain:
+            self._explain(conn, statement, parameters, duration_ms, endpoint)
+
+        with self._lock:
+            if statement not in self._slow and len(self._slow) >= MAX_TRACKED_STATEMENTS:
+                return
+            totals = self._slow.setdefault(
+                statement,
+                {
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "parameters": shape,
+                    "endpoints": set(),
+                    "plans_captured": 0,
+                },
+            )
+            totals["calls"] += 1
+            totals["total_ms"] += duration_ms
+            totals["max_ms"] = max(totals["max_ms"], duration_ms)
+            totals["plans_captured"] += explain
+            if endpoint:
+                totals["endpoints"].add(endpoint)
+
+    # Define a method to write the `EXPLAIN (ANALYZE, BUFFERS)` plan of a statement to the plan log.
+    # The statement is prepared and explained as a generic plan, whose conditions show `$1` placeholders rather than
+    # the bound values, so that tokens and hashes never reach the log. It runs on the same connection, inside a
+    # savepoint rolled back afterwards, so that a failure cannot abort the transaction.
+    def _explain(self, conn, statement: str, parameters, duration_ms: float, endpoint: str | None) -> None:
+        prepared, arguments = _generic(statement)
+        cursor = conn.connection.cursor()
+        plan, deallocate = None, False
+        try:
+            cursor.execute("SAVEPOINT query_plan")
+            cursor.execute("SET LOCAL plan_cache_mode = force_generic_plan")
+            cursor.execute(f"PREPARE query_plan AS {prepared}")
+            deallocate = True
+            execute = f"EXECUTE query_plan ({', '.join(arguments)})" if arguments else "EXECUTE query_plan"
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {execute}", parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception:
+            logger.exception("Could not capture the plan of a slow query")
+        finally:
+            try:
+                cursor.execute("ROLLBACK TO SAVEPOINT query_plan")
+                cursor.execute("RELEASE SAVEPOINT query_plan")
+                if deallocate:
+                    cursor.execute("DEALLOCATE query_plan")
+            except Exception:
+                pass
+            cursor.close()
+
+        if plan is not None:
+            plan_logger.info("slow query (%.1fms) on %s\n%s\n%s\n", duration_ms, endpoint, statement, plan)
+
+    # Define the request hooks opening, summarising and discarding the request's statement log
+    def _start_request(self) -> None:
+        g.query_log = []
+
+    # A streamed body (such as the grade export under stream_with_context) runs its statements after this hook, into
+    # the same log, so the request is summarised once the response is closed; its headers are sent by then, so it gets
+    # no Server-Timing header.
+    def _finish_request(self, response: Response) -> Response:
+        query_log = g.get("query_log")
+        if query_log is None:
+            return response
+
+        endpoint, app_logger = request.endpoint or "<unmatched>", current_app.logger
+        if response.is_streamed:
+            response.call_on_close(lambda: self._summarise(endpoint, query_log, app_logger))
+            return response
+
+        g.pop("query_log")
+        db_ms = self._summarise(endpoint, query_log, app_logger)
+        response.headers.add("Server-Timing", f'db;dur={db_ms:.2f};desc="{len(query_log)} queries"')
+        return response
+
+    def _discard_request(self, exception: BaseException | None) -> None:
+        g.pop("query_log", None)
+
+    # Define a method to flag the statements a request repeated and add it to the totals of its endpoint.
+    # Returns the request's database time in milliseconds.
+    def _summarise(self, endpoint: str, query_log: list[tuple[str, float]], app_logger: logging.Logger) -> float:
+        db_ms = sum(duration for _, duration in query_log) * 1000
+        repeated = [
+            statement
+            for statement, count in Counter(statement for statement, _ in query_log).items()
+            if count >= self.n_plus_one_threshold
+        ]
+        for statement in repeated:
+            app_logger.warning("Possible N+1 query on %s: %s", endpoint, statement)
+
+        self._aggregate(endpoint, len(query_log), db_ms, repeated)
+        return db_ms
+
+    # Define a method to add one request to the totals of its endpoint
+    def _aggregate(self, endpoint: str, queries: int, db_ms: float, repeated: list[str]) -> None:
+        with self._lock:
+            totals = self._endpoints.setdefault(
+                endpoint,
+                {
+                    "requests": 0,
+                    "queries": 0,
+                    "max_queries": 0,
+                    "db_ms": 0.0,
+                    "n_plus_one_requests": 0,
+                    "repeated": Counter(),
+                },
+            )
+            totals["requests"] += 1
+            totals["queries"] += queries
+            totals["max_queries"] = max(totals["max_queries"], queries)
+            totals["db_ms"] += db_ms
+            totals["n_plus_one_requests"] += bool(repeated)
+            for statement in repeated:
+                if statement in totals["repeated"] or len(totals["repeated"]) < MAX_TRACKED_STATEMENTS:
+                    totals["repeated"][statement] += 1
+
+
+# Define a function to rewrite a statement with psycopg2 placeholders for PREPARE, numbering each distinct parameter.
+# Returns the statement and the placeholders of the arguments to EXECUTE it with, in order.
+def _generic(statement: str) -> tuple[str, list[str]]:
+    arguments: list[str] = []
+
+    def number(match: re.Match) -> str:
+        if match.group(0) == "%%":
+            return "%"
+        placeholder = match.group(0)
+        if placeholder == "%s" or placeholder not in arguments:
+            arguments.append(placeholder)
+            return f"${len(arguments)}"
+        return f"${arguments.index(placeholder) + 1}"
+
+    return PLACEHOLDER.sub(number, statement), arguments
+
+
+# Define a function to describe bound parameters by name and type, without logging their values
+def _parameter_shape(parameters, executemany: bool) -> Any:
+    if executemany:
+        rows = list(parameters)
+        return {"rows": len(rows), "row": _parameter_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+# Initialise the tracker shared by the application; it is hooked in by init_app
+query_tracker = QueryTracker()
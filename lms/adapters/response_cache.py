@@ -0,0 +1,57 @@
+# Import necessary standard library modules
+from functools import wraps
+from typing import Callable, NamedTuple
+
+# Import Flask helpers to read the request and build responses
+from flask import Response, current_app, make_response, request
+
+from .cache import MISSING, TTLCache
+from .conditional import if_none_match, not_modified, request_versions
+
+
+# Define a response stored by @cached: the entity tag set by @conditional, the headers, and the encoded body
+class CachedResponse(NamedTuple):
+    tag: str | None
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+# Define a decorator factory to serve the successful responses of a view from `cache`, keyed by endpoint, query
+# arguments, the role of the `current_user` passed by @authorise (None for admin routes in hacker mode), the accepted
+# encodings, and the versions of the `tables` the view reads.
+# Responses are stored serialised and already compressed, so a hit neither runs the view nor Flask-Compress; a request
+# whose If-None-Match header names the stored tag gets a 304 Not Modified response.
+# A write to the tables by any process changes their versions, so the stored responses are no longer looked up.
+def cached(cache: TTLCache, *tables: str) -> Callable:
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs) -> Response:
+            key = (
+                tuple(sorted(request_versions(tables).items())),
+                request.endpoint,
+                tuple(sorted(request.view_args.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                getattr(kwargs.get("current_user"), "role_id", None),
+                request.headers.get("Accept-Encoding", ""),
+            )
+
+            # Serve a hit without loading any rows
+            entry = cache.get(key)
+            if entry is not MISSING:
+                if entry.tag and if_none_match(entry.tag):
+                    return not_modified(entry.tag)
+                return Response(entry.body, status=200, headers=entry.headers)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            # Compress the body once, as Flask-Compress would for this request, and store the result
+            tag, _ = response.get_etag()
+            response = current_app.extensions["compress"].after_request(response)
+            cache.set(key, CachedResponse(tag=tag, headers=list(response.headers.items()), body=response.get_data()))
+            return response
+
+        return wrapper
+
+    return decorator
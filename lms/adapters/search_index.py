@@ -0,0 +1,185 @@
+# Import necessary standard library modules
+import re
+import sqlite3
+import threading
+
+from typing import Any, Final, Iterable, NamedTuple
+
+# Import the Flask class for type hinting, and the SQLAlchemy constructs of the PostgreSQL search statement
+from flask import Flask
+from sqlalchemy import Computed, Integer, bindparam, func, literal, literal_column, union_all
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+
+from .conditional import versions
+from .database import db
+
+# Define the search document of a row, as computed by PostgreSQL (db/migrations/V7__search_vectors.sql): the English
+# lexemes of the title, weighted A, and of the description, weighted B
+SEARCH_DOCUMENT: Final[str] = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+# Define the weights of the title and description columns in the SQLite ranking, in the ratio of PostgreSQL's default
+# weights for A and B (1.0 and 0.4)
+SQLITE_WEIGHTS: Final[tuple[float, float]] = (2.5, 1.0)
+
+# Define the pattern of the words of a query
+WORD: Final[re.Pattern] = re.compile(r"\w+")
+
+
+# Define a search result: the kind of record ("module", "assignment"), its id and title, and its rank, higher first
+class SearchHit(NamedTuple):
+    kind: str
+    id: int
+    title: str
+    rank: float
+
+
+# Define a function to declare a model's search document column, generated by the database from its title and
+# description and loaded only when accessed
+def search_vector_column() -> Any:
+    return deferred(db.Column(TSVECTOR, Computed(SEARCH_DOCUMENT, persisted=True)))
+
+
+# Define an in-memory full-text index of titles and descriptions built on SQLite FTS5, a test stub of PostgreSQL's
+# `tsvector` search rather than a replacement for it. Documents of each kind live in their own FTS5 table, keyed by the
+# record id, with Porter stemming; matches must contain every word of the query and are ranked with BM25.
+class SqliteSearch(object):
+    def __init__(self, path: str = ":memory:") -> None:
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._tables: set[str] = set()
+
+    # Define a method to index many records of a kind as (id, title, description) tuples in one transaction
+    def add_many(self, kind: str, documents: Iterable[tuple[int, str | None, str | None]]) -> None:
+        with self._lock, self._connection:
+            table = self._table(kind)
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO {table} (rowid, title, description) VALUES (?, ?, ?)",
+                ((id, title or "", description or "") for id, title, description in documents),
+            )
+
+    # Define a method to return the best `limit` matches of the query among the records of `kinds`
+    def search(self, query: str, kinds: Iterable[str], limit: int = 20) -> list[SearchHit]:
+        words = WORD.findall(query)
+        if not words:
+            return []
+
+        # Quote every word, so that the query syntax of FTS5 (AND, NEAR, *, column filters) is never interpreted
+        match = " ".join(f'"{word}"' for word in words)
+        with self._lock:
+            selects = [
+                f"SELECT '{kind}', rowid, title, -bm25({table}, {SQLITE_WEIGHTS[0]}, {SQLITE_WEIGHTS[1]}) AS rank "
+                f"FROM {table} WHERE {table} MATCH :match"
+                for kind, table in ((kind, self._table(kind)) for kind in kinds)
+            ]
+            if not selects:
+                return []
+            statement = " UNION ALL ".join(selects) + " ORDER BY rank DESC, 1, 2 LIMIT :limit"
+            rows = self._connection.execute(statement, {"match": match, "limit": limit}).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+    # Define a method to return the FTS5 table of a kind, creating it on first use
+    def _table(self, kind: str) -> str:
+        if not kind.isidentifier():
+            raise ValueError(f"Invalid search kind: {kind}")
+
+        table = f"documents_{kind}"
+        if table not in self._tables:
+            columns = "title, description, tokenize = 'porter unicode61'"
+            self._connection.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({columns})")
+            self._tables.add(table)
+        return table
+
+
+# Define the full-text search over the models registered as sources, by kind.
+# With the "postgres" backend, records are matched against their generated `search_vector` column through its GIN
+# index and ranked with ts_rank_cd; the database keeps the column current on every insert and update. The "sqlite"
+# backend is a stub for tests that exercise the search without PostgreSQL's text search configuration: it still reads
+# the records and their table versions from PostgreSQL, and loads every record into a new SqliteSearch index on the
+# first search after any write to their tables, so it does not suit production.
+class SearchIndex(object):
+    def __init__(self, app: Flask | None = None) -> None:
+        self.backend = "postgres"
+        self._sources: dict[str, Any] = {}
+        self._statements: dict[tuple[str, ...], Any] = {}
+        self._documents: SqliteSearch | None = None
+        self._versions: dict[str, int] | None = None
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    # Define a method to select the backend from the application configuration
+    def init_app(self, app: Flask) -> None:
+        self.backend = app.config.setdefault("SEARCH_BACKEND", "postgres")
+        if self.backend not in ("postgres", "sqlite"):
+            raise ValueError(f"Unknown search backend: {self.backend}, please choose from postgres, sqlite")
+
+        with self._lock:
+            self._documents = SqliteSearch() if self.backend == "sqlite" else None
+            self._versions = None
+
+    # Define a method to register a model with `title`, `description` and `search_vector` columns under a kind
+    def register(self, kind: str, model: Any) -> None:
+        self._sources[kind] = model
+        self._statements.clear()
+
+    # Define the kinds of records that can be searched
+    @property
+    def kinds(self) -> tuple[str, ...]:
+        return tuple(self._sources)
+
+    # Define a method to return the best `limit` matches of the query among the records of `kinds`, or of every kind
+    def search(self, query: str, kinds: Iterable[str] | None = None, limit: int = 20) -> list[SearchHit]:
+        kinds = tuple(kind for kind in self._sources if kinds is None or kind in kinds)
+        if not kinds:
+            return []
+
+        if self._documents is None:
+            rows = db.session.execute(self._statement(kinds), {"query": query, "limit": limit})
+            return [SearchHit(*row) for row in rows]
+
+        return self._load().search(query, kinds, limit)
+
+    # Define a method to return the SQLite index, first loading every record of the registered models into a new one
+    # when their tables changed since it was loaded, so that records written or deleted by any process are followed
+    def _load(self) -> SqliteSearch:
+        current = versions(model.__tablename__ for model in self._sources.values())
+        with self._lock:
+            if current != self._versions:
+                documents = SqliteSearch()
+                for kind, model in self._sources.items():
+                    rows = db.session.execute(db.select(model.id, model.title, model.description))
+                    documents.add_many(kind, rows)
+                self._documents, self._versions = documents, current
+            return self._documents
+
+    # Define a method to build the statement searching the records of `kinds`, once per set of kinds
+    def _statement(self, kinds: tuple[str, ...]) -> Any:
+        statement = self._statements.get(kinds)
+        if statement is None:
+            query = func.plainto_tsquery("english", bindparam("query"))
+            selects = [
+                db.select(
+                    literal(kind).label("kind"),
+                    model.id,
+                    model.title,
+                    func.ts_rank_cd(model.search_vector, query).label("rank"),
+                ).where(model.search_vector.op("@@")(query))
+                for kind, model in self._sources.items()
+                if kind in kinds
+            ]
+            statement = (
+                union_all(*selects)
+                .order_by(literal_column("rank").desc(), literal_column("kind"), literal_column("id"))
+                .limit(bindparam("limit", type_=Integer))
+            )
+            self._statements[kinds] = statement
+        return statement
+
+
+# Create the application's search index; the models register themselves as sources
+search_index = SearchIndex()
@@ -0,0 +1,33 @@
+# Import necessary standard library modules for parsing uploaded files
+import csv
+import json
+
+from typing import Any, Iterable, Iterator, Sequence
+
+# Define the media types of the line-based files accepted by bulk endpoints
+CSV_MEDIA_TYPE: str = "text/csv"
+NDJSON_MEDIA_TYPE: str = "application/x-ndjson"
+
+
+# Define a function to read the records of a CSV file with a header row, as (line number, record) pairs.
+# Lines are decoded as they are read, so the file is never held in memory as a whole.
+# Raises ValueError when the header does not name every one of `fields`.
+def csv_records(lines: Iterable[bytes], fields: Sequence[str]) -> Iterator[tuple[int, dict[str, Any] | None]]:
+    reader = csv.DictReader(line.decode("utf-8-sig", errors="replace") for line in lines)
+    if not set(fields) <= set(reader.fieldnames or ()):
+        raise ValueError(f"The CSV header must name the {', '.join(fields[:-1])} and {fields[-1]} columns")
+
+    return ((reader.line_num, record) for record in reader)
+
+
+# Define a function to read the records of a newline-delimited JSON file, as (line number, record) pairs.
+# A line that is not a JSON object yields None; blank lines are skipped.
+def ndjson_records(lines: Iterable[bytes]) -> Iterator[tuple[int, dict[str, Any] | None]]:
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record if isinstance(record, dict) else None
@@ -6,22 +6,33 @@ from typing import Final, Literal
 from flask import Response, jsonify, request
 
 # Importing domain-specific modules to be used as blueprints in the Flask application
-from lms.domains import UserService, assignment_domain, feature_switch_domain, grade_domain, module_domain, user_domain
+from lms.domains import (
+    UserService,
+    admin_domain,
+    assignment_domain,
+    feature_switch_domain,
+    grade_domain,
+    module_domain,
+    search_domain,
+    user_domain,
+)
+from lms.domains.user.user_auth import read_access_token
 from lms.make_app import make_app
 
 # Define constants for file paths
 HERE: Final[str] = os.path.dirname(os.path.realpath(__file__))  # The directory of this script
-AUTH_TOKEN_PATH = f"{HERE}/../.auth"  # The path to the authentication token file
 
 # Initialise the Flask application
 app = make_app()
 
 # Registering blueprints (domain modules) with the Flask application
 for domain in (
+    admin_domain,
     assignment_domain,
     feature_switch_domain,
     grade_domain,
     module_domain,
+    search_domain,
     user_domain,
 ):
     app.register_blueprint(domain)
@@ -47,10 +58,15 @@ def login() -> Response:
         username = login_data.get("username")
         password = login_data.get("password")
 
-        # Authenticate the user and obtain a response message and status code
-        message, status = UserService().login(username=username, password=password)
+        # Authenticate the user and obtain a response message, status code and bearer token
+        message, status, token = UserService().login(username=username, password=password)
 
-        # Return a JSON response with the authentication result
+        # Return a JSON response with the authentication result, including the token on success
+        if token:
+            return jsonify({"message": message, "token": token}), status
+        # Ask clients to back off when the password worker pool is saturated
+        if status == 503:
+            return jsonify({"message": message}), status, {"Retry-After": "1"}
         return jsonify({"message": message}), status
 
     # If login data is not provided, return a bad request response
@@ -61,9 +77,8 @@ def login() -> Response:
 @app.put("/logout")
 def logout() -> tuple[Response, Literal[200]]:
     """Handle logout requests."""
-    # If the authentication token file exists, remove it to log out
-    if os.path.exists(AUTH_TOKEN_PATH):
-        os.remove(AUTH_TOKEN_PATH)
+    # Revoke the bearer token sent with the request, if any
+    UserService().logout(access_token=read_access_token())
 
     # Return a JSON response indicating a successful logout
     return jsonify({"message": "Successfully logged-out of the app"}), 200
@@ -1,27 +1,34 @@
 # Importing necessary classes and functions from different modules within the same package
 
+from .admin import admin_domain
 from .assignment import Assignment, AssignmentService, assignment_domain
 from .feature_switch import FeatureSwitch, feature_switch_domain
-from .grade import Grade, GradeService, grade_domain
-from .module import Module, ModuleService, module_domain
-from .user import User, UserRole, UserService, user_domain
+from .grade import Grade, GradeImport, GradeService, grade_domain
+from .module import Gradebook, Module, ModuleService, module_domain
+from .search import search_domain
+from .user import Principal, User, UserRole, UserService, user_domain
 
 # Defining a list of public objects that should be accessible when this package is imported
 
 __all__ = [
+    "admin_domain",
     "assignment_domain",
     "Assignment",
     "AssignmentService",
     "FeatureSwitch",
     "feature_switch_domain",
     "Grade",
+    "GradeImport",
     "GradeService",
     "grade_domain",
+    "Principal",
     "User",
     "UserRole",
     "user_domain",
     "UserService",
+    "Gradebook",
     "Module",
     "ModuleService",
     "module_domain",
+    "search_domain",
 ]
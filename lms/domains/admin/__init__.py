@@ -0,0 +1,3 @@
+from .admin import admin_domain
+
+__all__ = ["admin_domain"]
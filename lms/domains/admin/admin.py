@@ -0,0 +1,47 @@
+# Import necessary modules and classes
+from typing import Literal
+
+from flask import Blueprint, Response, jsonify
+
+# Import the cache metrics helper, the password worker pool and the SQL statement tracker
+from lms.adapters import cache_stats, password_pool, query_tracker
+
+# Import the custom decorator for authorisation
+from lms.decorators import authorise
+from lms.domains.user.user_model import UserRole
+
+# Create a Flask Blueprint to group operational endpoints
+admin_domain = Blueprint("admin_domain", __name__, url_prefix="/admin")
+
+
+# Define a route to report the application's in-process metrics, accessible only by admin users
+@admin_domain.get("/metrics")
+@authorise(UserRole.ADMIN)
+def metrics(current_user) -> tuple[Response, Literal[200]]:
+    """
+    Handle the retrieval of the application's in-process metrics.
+    """
+    # Return the counters of every in-process cache and the password pool as a JSON response with a 200 OK status
+    return jsonify({"caches": cache_stats(), "password_pool": password_pool.stats()}), 200
+
+
+# Define a route to report the SQL statements run per endpoint, accessible only by admin users
+@admin_domain.get("/queries")
+@authorise(UserRole.ADMIN)
+def queries(current_user) -> tuple[Response, Literal[200]]:
+    """
+    Handle the retrieval of the per-endpoint query counts, database time and N+1 candidates.
+    """
+    # Return the aggregates of every endpoint, the busiest first, as a JSON response with a 200 OK status
+    return jsonify(query_tracker.stats()), 200
+
+
+# Define a route to report the slowest SQL statements by total time, accessible only by admin users
+@admin_domain.get("/slow_queries")
+@authorise(UserRole.ADMIN)
+def slow_queries(current_user) -> tuple[Response, Literal[200]]:
+    """
+    Handle the retrieval of the statements that crossed the slow query threshold, the costliest first.
+    """
+    # Return the top offenders as a JSON response with a 200 OK status
+    return jsonify(query_tracker.slow_queries()), 200
@@ -5,11 +5,17 @@ from typing import Final, Literal
 
 from flask import Blueprint, Response, jsonify, request
 
-# Import the authorise_teacher decorator from the lms.decorators module
-from lms.decorators import authorise_teacher
+# Import the keyset pagination, field set, filter and sort helpers
+from lms.adapters import INVALID_PAGE_MESSAGE, fields_arg, filter_args, page_args, paginated_response, sort_arg
+
+# Import the authorise and conditional decorators from the lms.decorators module, the user roles and the grade
+# statistics helper
+from lms.decorators import authorise, cached, conditional
+from lms.domains.grade.grade_stats import grade_stats
+from lms.domains.user.user_model import UserRole
 
 # Import Assignment model and AssignmentService from the current package
-from .assignment_model import Assignment
+from .assignment_model import Assignment, assignment_list_cache
 from .assignment_service import AssignmentService
 
 # Define a constant to hold the directory path of this script
@@ -19,9 +25,9 @@ HERE: Final[str] = os.path.dirname(os.path.realpath(__file__))
 assignment_domain = Blueprint("assignment_domain", __name__, url_prefix="/assignments")
 
 
-# Define a route to create a new assignment, and protect it with the authorise_teacher decorator
+# Define a route to create a new assignment, and restrict it to teachers
 @assignment_domain.post("/create")
-@authorise_teacher
+@authorise(UserRole.TEACHER)
 def create_assignment(current_user) -> tuple[Response, Literal[422] | Literal[201]]:
     # Parse JSON data from the request body
     data = request.get_json()
@@ -32,21 +38,48 @@ def create_assignment(current_user) -> tuple[Response, Literal[422] | Literal[20
     return jsonify({"message": message}), status
 
 
-# Define a route to list all available assignments, and protect it with the authorise_teacher decorator
+# Define a route to list all available assignments, answering 304 Not Modified while they are unchanged, and restrict
+# it to teachers
 @assignment_domain.get("/list")
-@authorise_teacher
-def list_available_assignment(current_user) -> tuple[Response, Literal[200]]:
-    # Query the database to fetch all assignment records
-    assignments = Assignment.query.all()
-
-    # Build a list of dictionaries, each representing an assignment with specific attributes
-    assignments = [
-        {
-            "id": assignment.id,
-            "title": assignment.title,
-        }
-        for assignment in assignments
-    ]
-
-    # Return the list of assignments as a JSON response with a 200 OK status
-    return jsonify(assignments), 200
+@authorise(UserRole.TEACHER)
+@cached(assignment_list_cache, "assignments")
+@conditional("assignments")
+def list_available_assignment(current_user) -> tuple[Response, Literal[200]] | tuple[Response, Literal[400]]:
+    # Read the columns requested with `?fields=`, defaulting to the list view, and the filters and sort order
+    try:
+        view = fields_arg(Assignment, default="list")
+        filters, order_by = filter_args(Assignment), sort_arg(Assignment)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    # Query the database to fetch the requested page of assignment records, selecting only those columns
+    try:
+        after, limit = page_args()
+        page = Assignment.paginate(after=after, limit=limit, order_by=order_by, view=view, **filters)
+    except ValueError:
+        return jsonify({"message": INVALID_PAGE_MESSAGE}), 400
+
+    # Convert the rows to dictionaries with the compiled serializer of the selected columns
+    assignments = Assignment.serialize(page.records, view=view)
+
+    # Return the list of assignments as a JSON response with a 200 OK status, linking to the next page
+    return paginated_response(assignments, page), 200
+
+
+# Define a route to view the statistics of the assignment's grades and restrict it to teachers
+@assignment_domain.get("/<int:assignment_id>/stats")
+@authorise(UserRole.TEACHER)
+def view_stats(assignment_id, current_user) -> tuple[Response, Literal[200]] | tuple[Response, Literal[422]]:
+    """
+    Handle the retrieval of the count, mean, median, standard deviation, percentiles and histogram of the
+    grades of an assignment.
+    """
+    # Compute the statistics, or read them from the cache
+    stats = grade_stats(Assignment, assignment_id)
+
+    # If the assignment does not exist, return an error message with a 422 Unprocessable Entity status
+    if stats is None:
+        return jsonify({"message": "No assignment found, please try again"}), 422
+
+    # Return the statistics as a JSON response with a 200 OK status
+    return jsonify({"assignment_id": assignment_id, **stats}), 200
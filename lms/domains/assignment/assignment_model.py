@@ -6,8 +6,11 @@ from datetime import date
 from sqlalchemy import Date, ForeignKey, Text
 from sqlalchemy.orm import relationship
 
-# Import base mixin and database instance from lms.adapters
-from lms.adapters import BaseMixin, db
+# Import base mixin, database instance and in-process cache from lms.adapters
+from lms.adapters import RANGE_OPERATORS, BaseMixin, Filter, TTLCache, db, search_index, search_vector_column
+
+# Cache the responses of the assignment list endpoint, by the version of the assignments table
+assignment_list_cache = TTLCache("assignment_lists", maxsize=256, ttl=60.0)
 
 
 # Define a data class to represent an Assignment
@@ -15,16 +18,42 @@ from lms.adapters import BaseMixin, db
 class Assignment(BaseMixin, db.Model):
     # Specify the table name for this model in the database
     __tablename__ = "assignments"
+    # Declare the indexes created by the V6 and V7 migrations
+    __table_args__ = (
+        db.Index("assignments_module_id_due_date_id_idx", "module_id", "due_date", "id"),
+        db.Index("assignments_due_date_id_idx", "due_date", "id"),
+        db.Index("assignments_created_at_id_idx", "created_at", "id"),
+        db.Index(
+            "assignments_search_vector_idx",
+            "search_vector",
+            postgresql_using="gin",
+            postgresql_with={"fastupdate": "off"},
+        ),
+    )
 
     # Define the columns for the Assignment table
     title: str = db.Column(db.String(255), nullable=False)  # Store the title, cannot be null
     description: str = db.Column(Text, nullable=True)  # Store the description, can be null
     module_id: int = db.Column(db.Integer, ForeignKey("modules.id"), nullable=True)  # Store module ID as a foreign key
     due_date: date = db.Column(Date, nullable=True)  # Store the due date, can be null
+    search_vector = search_vector_column()  # Store the search document, generated by the database
 
     # Establish a relationship with the Module table, creating a back reference for assignments
     module = relationship("Module", backref="assignments")
 
+    # Define the columns selected by the read-only list endpoints
+    __views__ = {"list": ("id", "title")}
+    # Define the columns clients may select with `?fields=`
+    __fields__ = ("id", "title", "description", "module_id", "due_date", "created_at", "updated_at")
+    # Define the filters and sort orders of the list endpoint. NULL due dates sort last, so `-due_date` would not be
+    # served by the ascending index and is left out.
+    __filters__ = {
+        "module_id": Filter("module_id"),
+        "due_date": Filter("due_date", RANGE_OPERATORS),
+        "created_at": Filter("created_at", RANGE_OPERATORS),
+    }
+    __sorts__ = ("id", "-id", "due_date", "created_at", "-created_at")
+
     # Initialise an Assignment object
     def __init__(self, title: str, description: str, module_id: int, due_date: date) -> None:
         self.title = title
@@ -43,3 +72,7 @@ class Assignment(BaseMixin, db.Model):
         db.session.commit()
         # Return the created assignment object
         return assignment
+
+
+# Search assignments by title and description
+search_index.register("assignment", Assignment)
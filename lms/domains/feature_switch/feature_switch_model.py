@@ -2,7 +2,10 @@
 from dataclasses import dataclass
 
 # Import base mixin and database instance from lms.adapters
-from lms.adapters import BaseMixin, db
+from lms.adapters import BaseMixin, TTLCache, db
+
+# Cache the active status of feature switches by name
+feature_switch_cache = TTLCache("feature_switches", maxsize=64, ttl=5.0)
 
 
 # Define a data class to represent a feature switch
@@ -29,6 +32,8 @@ class FeatureSwitch(BaseMixin, db.Model):
         db.session.add(feature_switch)
         # Commit the changes to the database
         db.session.commit()
+        # Invalidate the cached status of the switch
+        feature_switch_cache.delete(name)
         # Return the created feature switch object
         return feature_switch
 
@@ -36,3 +41,5 @@ class FeatureSwitch(BaseMixin, db.Model):
     def set_value(self, active: int) -> None:
         self.active = active
         db.session.commit()
+        # Invalidate the cached status of the switch
+        feature_switch_cache.delete(self.name)
@@ -1,5 +1,5 @@
 from .grade import grade_domain
-from .grade_model import Grade
+from .grade_model import Grade, GradeImport
 from .grade_service import GradeService
 
-__all__ = ["grade_domain", "Grade", "GradeService"]
+__all__ = ["grade_domain", "Grade", "GradeImport", "GradeService"]
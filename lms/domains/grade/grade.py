@@ -3,12 +3,16 @@ import os
 
 from typing import Final
 
-from flask import Blueprint, Response, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 
-# Import custom decorators for authorisation
-from lms.decorators import authorise_teacher, authorise_user
+# Import the reader of the `fields` query parameter, and the custom decorators for authorisation and conditional
+# requests
+from lms.adapters import fields_arg
+from lms.decorators import authorise, conditional
+from lms.domains.user.user_model import UserRole
 
-# Import the GradeService class from the current package
+# Import the Grade model and GradeService class from the current package
+from .grade_model import Grade
 from .grade_service import GradeService
 
 # Define a constant to hold the directory path of this script
@@ -18,9 +22,9 @@ HERE: Final[str] = os.path.dirname(os.path.realpath(__file__))
 grade_domain = Blueprint("grade_domain", __name__, url_prefix="/grades")
 
 
-# Define a route to create a new grade and protect it with the authorise_teacher decorator
+# Define a route to create a new grade and restrict it to teachers
 @grade_domain.post("/create")
-@authorise_teacher
+@authorise(UserRole.TEACHER)
 def create_grade(current_user) -> tuple[Response, int]:
     """
     Handle the creation of a new grade.
@@ -34,9 +38,25 @@ def create_grade(current_user) -> tuple[Response, int]:
     return jsonify({"message": message}), status
 
 
-# Define a route to view all grades for a student and protect it with the authorise_user decorator
+# Define a route to create or update many grades from a CSV or NDJSON file and restrict it to teachers
+@grade_domain.post("/bulk")
+@authorise(UserRole.TEACHER)
+def bulk_create_grades(current_user) -> tuple[Response, int]:
+    """
+    Handle the import of many grades from a CSV or NDJSON file.
+    """
+    # Read the request body line by line, so that large files are streamed into the database
+    report, status = GradeService().bulk_create(lines=request.stream, media_type=request.mimetype)
+
+    # Return the import report as a JSON response with the appropriate status code
+    return jsonify(report), status
+
+
+# Define a route to view all grades for a student, answering 304 Not Modified while grades are unchanged, and open
+# it to any authenticated user
 @grade_domain.get("/view")
-@authorise_user
+@authorise()
+@conditional("grades", per_user=True)
 def view_grades(current_user) -> tuple[Response, int]:
     """
     Handle the retrieval of all grades for a student.
@@ -46,5 +66,33 @@ def view_grades(current_user) -> tuple[Response, int]:
         # Return an error message and a 422 Unprocessable Entity status code if the user is not a student
         return jsonify({"message": "You are not a student, so there are no grades to view"}), 422
 
+    # Read the columns requested with `?fields=`, defaulting to the student view
+    try:
+        view = fields_arg(Grade, default="student")
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    # Fetch the selected columns of the student's grades from the database
+    grades = Grade.find_all(view=view, student_id=current_user.id)
+
     # Return the student's grades as a JSON response with a 200 OK status code
-    return jsonify(current_user.grades), 200
+    return jsonify(Grade.serialize(grades, view=view)), 200
+
+
+# Define a route to export grades as a CSV or NDJSON file and restrict it to teachers
+@grade_domain.get("/export")
+@authorise(UserRole.TEACHER)
+def export_grades(current_user) -> tuple[Response, int]:
+    """
+    Handle the export of grades, filtered by module, assignment or creation time.
+    """
+    # Check the export parameters before anything is sent
+    try:
+        media_type, chunks = GradeService().export(params=request.args)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    # Stream the file as its rows are read from the database, keeping the request context open until the end
+    filename = f"grades.{request.args.get('format', 'csv')}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return Response(stream_with_context(chunks), mimetype=media_type, headers=headers), 200
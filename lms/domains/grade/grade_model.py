@@ -1,12 +1,43 @@
 # Import the dataclass decorator for creating data classes
 from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable, Iterator, NamedTuple, Sequence
 
 # Import necessary SQLAlchemy classes for defining the model
-from sqlalchemy import Float, ForeignKey
+from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, MetaData, Table, and_, exists, func, literal_column
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import relationship
 
-# Import base mixin and database instance from lms.adapters
-from lms.adapters import BaseMixin, db
+# Import base mixin, the in-process cache, the COPY helper and database instance from lms.adapters
+from lms.adapters import BaseMixin, TTLCache, copy_rows, db
+from lms.domains.assignment.assignment_model import Assignment
+from lms.domains.user.user_model import User, UserRole
+
+# Cache grade statistics by the versions of the grades and assignments tables, and ("assignments", id) or
+# ("modules", id); a write to either table by any process changes the versions, so stale entries are never read
+grade_stats_cache = TTLCache("grade_stats", maxsize=1024, ttl=300.0)
+
+# Define the temporary table bulk imports are copied into before being merged into grades.
+# It has its own metadata so that it is never created alongside the application's tables.
+grades_staging = Table(
+    "grades_staging",
+    MetaData(),
+    Column("line", Integer, nullable=False),
+    Column("student_id", Integer, nullable=False),
+    Column("assignment_id", Integer, nullable=False),
+    Column("score", Float, nullable=False),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+# Define the outcome of a bulk import: the grades created and updated, and the rows naming an unknown student or
+# assignment as (line, known student, known assignment) tuples, of which at most `max_rejected` are listed
+class GradeImport(NamedTuple):
+    created: int
+    updated: int
+    rejected: list[tuple[int, bool, bool]]
+    rejected_count: int
 
 
 # Define a data class to represent a grade
@@ -14,6 +45,11 @@ from lms.adapters import BaseMixin, db
 class Grade(BaseMixin, db.Model):
     # Specify the table name for this model in the database
     __tablename__ = "grades"
+    # Declare the one-grade-per-student-and-assignment constraint (V4) and the indexes created by the V3 migration
+    __table_args__ = (
+        db.UniqueConstraint("student_id", "assignment_id", name="grades_student_id_assignment_id_key"),
+        db.Index("grades_assignment_id_idx", "assignment_id"),
+    )
 
     # Define the columns for the Grade table
     student_id: int = db.Column(db.Integer, ForeignKey("users.id"), nullable=True)
@@ -21,6 +57,11 @@ class Grade(BaseMixin, db.Model):
     score: float = db.Column(Float, nullable=False)
     assignment = relationship("Assignment", backref="grades")
 
+    # Define the columns a student sees when viewing their grades
+    __views__ = {"student": ("student_id", "assignment_id", "score")}
+    # Define the columns clients may select with `?fields=`
+    __fields__ = ("id", "student_id", "assignment_id", "score", "created_at", "updated_at")
+
     # Initialise a Grade object
     def __init__(self, score: float, student_id: int, assignment_id: int) -> None:
         self.score = score
@@ -38,3 +79,115 @@ class Grade(BaseMixin, db.Model):
         db.session.commit()
         # Return the created grade object
         return grade
+
+    # Define a class method to insert a grade, or update the score of the student's existing grade for the assignment,
+    # in one statement. Returns the grade's id and whether the row was created.
+    @classmethod
+    def upsert(cls, score: float, student_id: int, assignment_id: int) -> tuple[int, bool]:
+        statement = insert(cls).values(score=score, student_id=student_id, assignment_id=assignment_id)
+        statement = statement.on_conflict_do_update(
+            constraint="grades_student_id_assignment_id_key",
+            set_={"score": statement.excluded.score, "updated_at": datetime.utcnow()},
+        )
+        # A row inserted by this statement has no deleting transaction yet, so its xmax is 0
+        statement = statement.returning(cls.id, literal_column("xmax = 0").label("created"))
+
+        grade_id, created = db.session.execute(statement).one()
+        db.session.commit()
+        return grade_id, created
+
+    # Define a class method to insert or update many grades in one transaction from (line, student ID, assignment ID,
+    # score) rows. The rows are streamed with COPY into a staging table, the ones naming an unknown student or
+    # assignment are rejected in one query, and the others are merged into grades in one statement.
+    # When several rows grade the same student and assignment, the last one wins.
+    @classmethod
+    def bulk_upsert(cls, rows: Iterable[tuple[int, int, int, float]], max_rejected: int = 1000) -> GradeImport:
+        # Roll back a failed COPY or merge, so that the session is usable by the next request
+        try:
+            grades_staging.create(db.session.connection())
+            copy_rows(grades_staging.name, grades_staging.columns.keys(), rows)
+
+            staging = grades_staging.c
+            known_student = exists().where(User.id == staging.student_id, User.role_id == UserRole.STUDENT.value)
+            known_assignment = exists().where(Assignment.id == staging.assignment_id)
+
+            # List the first rejected rows, with the number of rejected rows counted before the limit applies
+            rejected = db.session.execute(
+                db.select(staging.line, known_student, known_assignment, func.count().over())
+                .where(~and_(known_student, known_assignment))
+                .order_by(staging.line)
+                .limit(max_rejected)
+            ).all()
+
+            # Merge the last row of each student and assignment, and count the grades created and updated
+            latest = (
+                db.select(staging.student_id, staging.assignment_id, staging.score)
+                .where(known_student, known_assignment)
+                .distinct(staging.student_id, staging.assignment_id)
+                .order_by(staging.student_id, staging.assignment_id, staging.line.desc())
+            )
+            statement = insert(cls).from_select(["student_id", "assignment_id", "score"], latest)
+            merged = (
+                statement.on_conflict_do_update(
+                    constraint="grades_student_id_assignment_id_key",
+                    set_={"score": statement.excluded.score, "updated_at": datetime.utcnow()},
+                )
+                .returning(literal_column("xmax = 0", Boolean).label("created"))
+                .cte("merged")
+            )
+            created, updated = db.session.execute(
+                db.select(func.count().filter(merged.c.created), func.count().filter(~merged.c.created))
+            ).one()
+
+            grades_staging.drop(db.session.connection())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return GradeImport(
+            created=created,
+            updated=updated,
+            rejected=[(line, student, assignment) for line, student, assignment, _ in rejected],
+            rejected_count=rejected[0][3] if rejected else 0,
+        )
+
+    # Define a class method to read grades for an export, optionally limited to a module, an assignment, and a range
+    # of creation times (`since` inclusive, `until` exclusive), in batches of `batch_size` rows ordered by id.
+    # The rows are fetched from a server-side cursor, so only one batch is held in memory at a time.
+    @classmethod
+    def export(
+        cls,
+        module_id: int | None = None,
+        assignment_id: int | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Sequence[Any]]:
+        statement = (
+            db.select(
+                cls.id,
+                cls.student_id,
+                cls.assignment_id,
+                Assignment.module_id,
+                cls.score,
+                cls.created_at,
+                cls.updated_at,
+            )
+            .join(Assignment, Assignment.id == cls.assignment_id)
+            .order_by(cls.id)
+        )
+        if module_id is not None:
+            statement = statement.where(Assignment.module_id == module_id)
+        if assignment_id is not None:
+            statement = statement.where(cls.assignment_id == assignment_id)
+        if since is not None:
+            statement = statement.where(cls.created_at >= since)
+        if until is not None:
+            statement = statement.where(cls.created_at < until)
+
+        result = db.session.execute(statement.execution_options(yield_per=batch_size))
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
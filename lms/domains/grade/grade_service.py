@@ -1,10 +1,49 @@
+# Import necessary standard library modules for validating bulk imports and writing exports
+import csv
+import io
+import math
+
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Iterator, Mapping, Sequence
+
+# Import orjson, the encoder of the JSON responses, which writes datetimes as ISO 8601 strings natively
+import orjson
+
+# Import the readers of uploaded CSV and NDJSON files
+from lms.adapters import CSV_MEDIA_TYPE, NDJSON_MEDIA_TYPE, csv_records, ndjson_records
+
 # Import the Grade model from the grade_model module within the current package
 from .grade_model import Grade
 
+# Define the fields of a grade in a bulk import, and the largest value of an integer identifier column
+GRADE_FIELDS: tuple[str, ...] = ("student_id", "assignment_id", "score")
+MAX_ID = 2**31 - 1
+
+# Define the number of rejected rows listed in a bulk import report; the others are only counted
+MAX_REPORTED_ERRORS = 1000
+
+# Define the readers of the file types accepted by a bulk import
+BULK_FORMATS: dict[str, Callable[[Iterable[bytes]], Iterator[tuple[int, dict[str, Any] | None]]]] = {
+    CSV_MEDIA_TYPE: lambda lines: csv_records(lines, GRADE_FIELDS),
+    NDJSON_MEDIA_TYPE: ndjson_records,
+}
+
+# Define the columns of a grade export, and the media type of each export format
+EXPORT_COLUMNS: tuple[str, ...] = (
+    "id",
+    "student_id",
+    "assignment_id",
+    "module_id",
+    "score",
+    "created_at",
+    "updated_at",
+)
+EXPORT_FORMATS: dict[str, str] = {"csv": CSV_MEDIA_TYPE, "ndjson": NDJSON_MEDIA_TYPE}
+
 
 # Define a service class to handle operations related to grades
 class GradeService:
-    # Define a method to create a new grade entry
+    # Define a method to record a grade, replacing the score of an existing grade for the same student and assignment
     def create(self, params: dict[str, int | float]) -> tuple[str, int]:
         # Extract student ID, assignment ID, and score from the provided parameters
         student_id = params.get("student_id")
@@ -16,8 +55,144 @@ class GradeService:
             # Return an error message and a 422 status code if any parameter is missing
             return "Something doesn't look right, please double-check the parameters and try again", 422
 
-        # Create a new grade entry in the database
-        Grade.create(student_id=student_id, assignment_id=assignment_id, score=score)
+        # Insert or update the grade in one statement, so that retried submissions do not create duplicates
+        _, created = Grade.upsert(student_id=student_id, assignment_id=assignment_id, score=score)
+
+        # Return a success message with a 201 status code for a new grade, or a 200 status code for an update
+        if created:
+            return f"Grade for student {student_id} and assignment {assignment_id} successfully created", 201
+        return f"Grade for student {student_id} and assignment {assignment_id} successfully updated", 200
+
+    # Define a method to create or update the grades of a CSV or NDJSON file, read line by line from `lines`.
+    # Valid rows are imported and invalid ones reported by line number; the file is never held in memory as a whole.
+    def bulk_create(self, lines: Iterable[bytes], media_type: str) -> tuple[dict[str, Any], int]:
+        # Check that the file is in a supported format
+        parse = BULK_FORMATS.get(media_type)
+        if parse is None:
+            return {"message": "Unsupported file type, please upload a text/csv or application/x-ndjson file"}, 415
+
+        # Check the CSV header before importing anything
+        try:
+            records = parse(lines)
+        except ValueError as error:
+            return {"message": str(error)}, 422
+
+        # Pass the valid rows on to the import as they are parsed, and keep the first invalid ones for the report
+        errors: list[tuple[int, str]] = []
+        invalid = 0
+
+        def rows() -> Iterator[tuple[int, int, int, float]]:
+            nonlocal invalid
+            for line, record in records:
+                row = _grade_row(record)
+                if isinstance(row, str):
+                    invalid += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append((line, row))
+                    continue
+                yield line, *row
+
+        result = Grade.bulk_upsert(rows(), max_rejected=MAX_REPORTED_ERRORS)
+
+        # Report the rows naming a student or an assignment that does not exist
+        for line, known_student, known_assignment in result.rejected:
+            errors.append((line, "Unknown student" if not known_student else "Unknown assignment"))
+        rejected = invalid + result.rejected_count
+
+        return {
+            "message": f"{result.created} grades created, {result.updated} updated and {rejected} rows rejected",
+            "created": result.created,
+            "updated": result.updated,
+            "rejected": rejected,
+            "errors": [{"line": line, "message": message} for line, message in sorted(errors)[:MAX_REPORTED_ERRORS]],
+        }, 200
+
+    # Define a method to export grades in the `format` parameter (csv or ndjson, csv by default), filtered by the
+    # optional `module_id`, `assignment_id`, `since` and `until` parameters. Returns the media type and a generator
+    # of the file's chunks, which runs the query only once the header has been sent.
+    # Raises ValueError when a parameter is invalid.
+    def export(self, params: Mapping[str, str]) -> tuple[str, Iterator[bytes]]:
+        # Check the format of the file
+        export_format = params.get("format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError("The format must be csv or ndjson")
+
+        # Read the filters, with times in UTC as they are stored
+        filters: dict[str, Any] = {}
+        for name in ("module_id", "assignment_id"):
+            if params.get(name):
+                filters[name] = _identifier(params[name])
+                if filters[name] is None:
+                    raise ValueError(f"{name} must be a positive integer")
+        for name in ("since", "until"):
+            if params.get(name):
+                try:
+                    value = datetime.fromisoformat(params[name])
+                except ValueError:
+                    raise ValueError(f"{name} must be an ISO 8601 date or date and time")
+                filters[name] = value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+        write = _csv_chunks if export_format == "csv" else _ndjson_chunks
+        return EXPORT_FORMATS[export_format], write(Grade.export(**filters))
+
+
+# Define a function to write batches of exported grades as CSV chunks, starting with the header row
+def _csv_chunks(batches: Iterable[Sequence[Sequence[Any]]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(EXPORT_COLUMNS)
+    yield _drain(buffer)
+    for rows in batches:
+        writer.writerows([value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows)
+        yield _drain(buffer)
+
+
+# Define a function to write batches of exported grades as NDJSON chunks, one JSON object per grade
+def _ndjson_chunks(batches: Iterable[Sequence[Sequence[Any]]]) -> Iterator[bytes]:
+    for rows in batches:
+        yield b"".join(orjson.dumps(dict(zip(EXPORT_COLUMNS, row)), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+# Define a function to return the text written to a buffer as UTF-8 bytes, and empty the buffer
+def _drain(buffer: io.StringIO) -> bytes:
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text.encode("utf-8")
+
+
+# Define a function to validate a record into a (student ID, assignment ID, score) row, or return why it is invalid
+def _grade_row(record: dict[str, Any] | None) -> tuple[int, int, float] | str:
+    if record is None:
+        return "Not a JSON object"
+
+    missing = [field for field in GRADE_FIELDS if record.get(field) in (None, "")]
+    if missing:
+        return f"Missing {', '.join(missing)}"
+
+    student_id, assignment_id = _identifier(record["student_id"]), _identifier(record["assignment_id"])
+    if student_id is None:
+        return "student_id must be a positive integer"
+    if assignment_id is None:
+        return "assignment_id must be a positive integer"
+
+    try:
+        score = float(record["score"]) if not isinstance(record["score"], bool) else math.nan
+    except (TypeError, ValueError):
+        score = math.nan
+    if not math.isfinite(score):
+        return "score must be a number"
+
+    return student_id, assignment_id, score
+
 
-        # Return a success message and a 201 status code
-        return f"Grade for student {student_id} and assignment {assignment_id} successfully created", 201
+# Define a function to read a positive integer identifier from a JSON number or a CSV field, or None if it is not one
+def _identifier(value: Any) -> int | None:
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    try:
+        identifier = int(value)
+    except ValueError:
+        return None
+    return identifier if 0 < identifier <= MAX_ID else None
@@ -0,0 +1,87 @@
+# Import necessary modules and types
+from functools import cache
+from typing import Any
+
+# Import NumPy to compute the statistics over the scores as one array
+import numpy as np
+
+# Import SQLAlchemy's aggregate function namespace
+from sqlalchemy import bindparam, func
+
+# Import the base mixin, the sentinel for cache misses, the database instance and the reader of table versions
+from lms.adapters import MISSING, BaseMixin, db, versions
+from lms.domains.assignment.assignment_model import Assignment
+
+# Import the Grade model and the statistics cache from the current package
+from .grade_model import Grade, grade_stats_cache
+
+# Define the fixed histogram bins: ten bins of ten points from 0 to 100, the last one including 100.
+# Scores outside of 0-100 count towards every statistic except the histogram.
+HISTOGRAM_EDGES: np.ndarray = np.linspace(0, 100, 11)
+
+# Define the percentiles reported alongside the median
+PERCENTILES: tuple[int, ...] = (10, 25, 75, 90)
+
+# Define the tables the statistics are computed from: the grades, and the assignments that place them in a module
+STATS_TABLES: tuple[str, ...] = ("assignments", "grades")
+
+
+# Define a function to compute the statistics of a set of scores
+def score_statistics(scores: np.ndarray) -> dict[str, Any]:
+    counts, _ = np.histogram(scores, bins=HISTOGRAM_EDGES)
+    histogram = {"edges": HISTOGRAM_EDGES.tolist(), "counts": counts.tolist()}
+
+    # Without any score there is nothing else to report
+    if not scores.size:
+        return {
+            "count": 0,
+            "mean": None,
+            "median": None,
+            "stddev": None,
+            "min": None,
+            "max": None,
+            "percentiles": {f"p{p}": None for p in PERCENTILES},
+            "histogram": histogram,
+        }
+
+    percentiles = np.percentile(scores, (50, *PERCENTILES))
+    return {
+        "count": int(scores.size),
+        "mean": float(scores.mean()),
+        "median": float(percentiles[0]),
+        "stddev": float(scores.std()),
+        "min": float(scores.min()),
+        "max": float(scores.max()),
+        "percentiles": {f"p{p}": float(value) for p, value in zip(PERCENTILES, percentiles[1:])},
+        "histogram": histogram,
+    }
+
+
+# Define a function to return the statistics of the grades of an assignment (`model` is Assignment) or of every
+# assignment of a module (`model` is Module), or None if there is no such record
+def grade_stats(model: type[BaseMixin], id: int) -> dict[str, Any] | None:
+    key = (tuple(sorted(versions(STATS_TABLES).items())), model.__tablename__, id)
+    stats = grade_stats_cache.get(key)
+    if stats is not MISSING:
+        return stats
+
+    # Pull the scores as a single array aggregate instead of one row per grade
+    scores = db.session.execute(_scores_statement(model.__tablename__), {"id": id}).scalar()
+    if scores is None and not model.exists(id=id):
+        return None
+
+    stats = score_statistics(np.asarray(scores or (), dtype=np.float64))
+    grade_stats_cache.set(key, stats)
+    return stats
+
+
+# Define the query collecting the scores of an assignment, served by the grades (assignment_id) index,
+# or of a module's assignments, served by the assignments (module_id) index
+@cache
+def _scores_statement(table: str) -> Any:
+    statement = db.select(func.array_agg(Grade.score))
+    if table == Assignment.__tablename__:
+        return statement.where(Grade.assignment_id == bindparam("id"))
+    return statement.join(Assignment, Grade.assignment_id == Assignment.id).where(
+        Assignment.module_id == bindparam("id")
+    )
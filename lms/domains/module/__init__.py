@@ -1,5 +1,5 @@
 from .module import module_domain
-from .module_model import Module
+from .module_model import Gradebook, Module
 from .module_service import ModuleService
 
-__all__ = ["module_domain", "Module", "ModuleService"]
+__all__ = ["module_domain", "Gradebook", "Module", "ModuleService"]
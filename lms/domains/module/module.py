@@ -5,11 +5,16 @@ from typing import Final, Literal
 
 from flask import Blueprint, Response, jsonify, request
 
-# Import custom decorator for authorisation
-from lms.decorators import authorise_teacher
+# Import the keyset pagination, field set, filter and sort helpers
+from lms.adapters import INVALID_PAGE_MESSAGE, fields_arg, filter_args, page_args, paginated_response, sort_arg
+
+# Import custom decorators for authorisation and conditional requests, the user roles and the grade statistics helper
+from lms.decorators import authorise, cached, conditional
+from lms.domains.grade.grade_stats import grade_stats
+from lms.domains.user.user_model import UserRole
 
 # Import the Module model and ModuleService from the current package
-from .module_model import Module
+from .module_model import Module, module_list_cache
 from .module_service import ModuleService
 
 # Define a constant to hold the directory path of this script
@@ -19,9 +24,9 @@ HERE: Final[str] = os.path.dirname(os.path.realpath(__file__))
 module_domain = Blueprint("module_domain", __name__, url_prefix="/modules")
 
 
-# Define a route to create a new module and protect it with the authorise_teacher decorator
+# Define a route to create a new module and restrict it to teachers
 @module_domain.post("/create")
-@authorise_teacher
+@authorise(UserRole.TEACHER)
 def create_module(current_user) -> tuple[Response, Literal[422] | Literal[201]]:
     """
     Handle the creation of a new module.
@@ -35,23 +40,79 @@ def create_module(current_user) -> tuple[Response, Literal[422] | Literal[201]]:
     return jsonify({"message": message}), status
 
 
-# Define a route to list all available modules and protect it with the authorise_teacher decorator
+# Define a route to list all available modules, answering 304 Not Modified while they are unchanged, and restrict
+# it to teachers
 @module_domain.get("/list")
-@authorise_teacher
-def list_available_modules(current_user) -> tuple[Response, Literal[200]]:
-    """
-    Handle the retrieval of all available modules.
-    """
-    # Fetch all module records from the database
-    modules = Module.query.all()
-
-    # Construct a list of modules with specific attributes to be returned
-    modules = [
-        {
-            "id": module.id,
-            "title": module.title,
-        }
-        for module in modules
-    ]
-    # Return the list of modules as a JSON response with a 200 OK status
-    return jsonify(modules), 200
+@authorise(UserRole.TEACHER)
+@cached(module_list_cache, "modules")
+@conditional("modules")
+def list_available_modules(current_user) -> tuple[Response, Literal[200]] | tuple[Response, Literal[400]]:
+    """
+    Handle the retrieval of one page of available modules.
+    """
+    # Read the columns requested with `?fields=`, defaulting to the list view, and the filters and sort order
+    try:
+        view = fields_arg(Module, default="list")
+        filters, order_by = filter_args(Module), sort_arg(Module)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    # Fetch the requested page of module records from the database, selecting only those columns
+    try:
+        after, limit = page_args()
+        page = Module.paginate(after=after, limit=limit, order_by=order_by, view=view, **filters)
+    except ValueError:
+        return jsonify({"message": INVALID_PAGE_MESSAGE}), 400
+
+    # Convert the rows to dictionaries with the compiled serializer of the selected columns
+    modules = Module.serialize(page.records, view=view)
+    # Return the list of modules as a JSON response with a 200 OK status, linking to the next page
+    return paginated_response(modules, page), 200
+
+
+# Define a route to view the gradebook of a module and restrict it to teachers
+@module_domain.get("/<int:module_id>/gradebook")
+@authorise(UserRole.TEACHER)
+def view_gradebook(module_id, current_user) -> tuple[Response, Literal[200]] | tuple[Response, Literal[422]]:
+    """
+    Handle the retrieval of a module's students-by-assignments score matrix.
+    """
+    # Build the gradebook of the module from a single query
+    gradebook = Module.gradebook(module_id)
+
+    # If the module does not exist, return an error message with a 422 Unprocessable Entity status
+    if gradebook is None:
+        return jsonify({"message": "No module found, please try again"}), 422
+
+    # Return the matrix in a columnar encoding: the student ids of the rows, the assignment ids of the columns,
+    # and the scores flattened row by row, with null where a student has no grade for an assignment
+    return (
+        jsonify(
+            {
+                "module_id": module_id,
+                "students": gradebook.students,
+                "assignments": gradebook.assignments,
+                "scores": gradebook.scores,
+            }
+        ),
+        200,
+    )
+
+
+# Define a route to view the statistics of the module's grades and restrict it to teachers
+@module_domain.get("/<int:module_id>/stats")
+@authorise(UserRole.TEACHER)
+def view_stats(module_id, current_user) -> tuple[Response, Literal[200]] | tuple[Response, Literal[422]]:
+    """
+    Handle the retrieval of the count, mean, median, standard deviation, percentiles and histogram of the
+    grades of every assignment of a module.
+    """
+    # Compute the statistics, or read them from the cache
+    stats = grade_stats(Module, module_id)
+
+    # If the module does not exist, return an error message with a 422 Unprocessable Entity status
+    if stats is None:
+        return jsonify({"message": "No module found, please try again"}), 422
+
+    # Return the statistics as a JSON response with a 200 OK status
+    return jsonify({"module_id": module_id, **stats}), 200
@@ -1,12 +1,30 @@
 # Import the dataclass decorator to facilitate the creation of data classes
 from dataclasses import dataclass
+from functools import cache
+from typing import Any, NamedTuple
 
 # Import necessary components from SQLAlchemy for database interaction
-from sqlalchemy import ForeignKey, Text
+from sqlalchemy import Float, ForeignKey, Integer, Text, bindparam, cast, func, literal_column, null, union_all
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from sqlalchemy.orm import relationship
 
-# Import the base mixin and database instance from the lms.adapters module
-from lms.adapters import BaseMixin, db
+# Import the base mixin, database instance and in-process cache from the lms.adapters module
+from lms.adapters import RANGE_OPERATORS, BaseMixin, Filter, TTLCache, db, search_index, search_vector_column
+
+# Import the models whose rows make up a module's gradebook
+from lms.domains.assignment.assignment_model import Assignment
+from lms.domains.grade.grade_model import Grade
+
+# Cache the responses of the module list endpoint, by the version of the modules table
+module_list_cache = TTLCache("module_lists", maxsize=256, ttl=60.0)
+
+
+# Define a module's gradebook as a students-by-assignments matrix: `scores` holds one row per student,
+# flattened in row-major order, with None where the student has no grade for the assignment
+class Gradebook(NamedTuple):
+    students: list[int]
+    assignments: list[int]
+    scores: list[float | None]
 
 
 # Define a data class to represent a Module in the database
@@ -14,6 +32,14 @@ from lms.adapters import BaseMixin, db
 class Module(BaseMixin, db.Model):
     # Specify the table name in the database for this model
     __tablename__ = "modules"
+    # Declare the indexes created by the V6 and V7 migrations
+    __table_args__ = (
+        db.Index("modules_teacher_id_id_idx", "teacher_id", "id"),
+        db.Index("modules_created_at_id_idx", "created_at", "id"),
+        db.Index(
+            "modules_search_vector_idx", "search_vector", postgresql_using="gin", postgresql_with={"fastupdate": "off"}
+        ),
+    )
 
     # Define the columns for the Module table
     # Store the title of the module, must not be null
@@ -22,10 +48,20 @@ class Module(BaseMixin, db.Model):
     description: str = db.Column(Text, nullable=True)
     # Store the teacher's ID, creating a foreign key relationship
     teacher_id: int = db.Column(db.Integer, ForeignKey("users.id"), nullable=True)
+    # Store the search document of the title and description, generated by the database
+    search_vector = search_vector_column()
 
     # Create a relationship with the User table, establishing a back reference for modules
     teacher = relationship("User", backref="modules")
 
+    # Define the columns selected by the list endpoint, skipping the unbounded description
+    __views__ = {"list": ("id", "title")}
+    # Define the columns clients may select with `?fields=`
+    __fields__ = ("id", "title", "description", "teacher_id", "created_at", "updated_at")
+    # Define the filters and sort orders of the list endpoint
+    __filters__ = {"teacher_id": Filter("teacher_id"), "created_at": Filter("created_at", RANGE_OPERATORS)}
+    __sorts__ = ("id", "-id", "created_at", "-created_at")
+
     # Initialise the Module object with the provided attributes
     def __init__(self, title: str, description: str, teacher_id: int) -> None:
         self.title = title
@@ -43,3 +79,48 @@ class Module(BaseMixin, db.Model):
         db.session.commit()
         # Return the created module
         return module
+
+    # Define a class method to build the gradebook of a module from a single query, or None if there is no such module
+    @classmethod
+    def gradebook(cls, module_id: int) -> Gradebook | None:
+        header, *students = db.session.execute(_gradebook_statement(), {"module_id": module_id}).all()
+        if header.assignment_ids is None:
+            return Gradebook(students=[], assignments=[], scores=[]) if cls.exists(id=module_id) else None
+
+        # Number the columns of the matrix by assignment id
+        assignments = header.assignment_ids
+        columns = {assignment_id: index for index, assignment_id in enumerate(assignments)}
+        width = len(assignments)
+
+        # Fill in each student's row, leaving None where the student has no grade for an assignment
+        scores: list[float | None] = [None] * (len(students) * width)
+        for row, student in enumerate(students):
+            for assignment_id, score in zip(student.assignment_ids, student.scores):
+                scores[row * width + columns[assignment_id]] = score
+
+        return Gradebook(students=[student.student_id for student in students], assignments=assignments, scores=scores)
+
+
+# Search modules by title and description
+search_index.register("module", Module)
+
+
+# Define the gradebook query. The first row lists the module's assignment ids in order, and each following row
+# aggregates one student's grades into arrays, in student id order. Aggregating in the database sends one row
+# per student instead of one per grade; the arrays are left unsorted and placed by assignment id in Python.
+# It is served by the assignments (module_id) and grades (assignment_id) indexes.
+@cache
+def _gradebook_statement() -> Any:
+    module_id = bindparam("module_id", type_=Integer)
+    header = db.select(
+        cast(null(), Integer).label("student_id"),
+        func.array_agg(aggregate_order_by(Assignment.id, Assignment.id)).label("assignment_ids"),
+        cast(null(), ARRAY(Float)).label("scores"),
+    ).where(Assignment.module_id == module_id)
+    students = (
+        db.select(Grade.student_id, func.array_agg(Grade.assignment_id), func.array_agg(Grade.score))
+        .join(Assignment, Grade.assignment_id == Assignment.id)
+        .where(Assignment.module_id == module_id, Grade.student_id.is_not(None))
+        .group_by(Grade.student_id)
+    )
+    return union_all(header, students).order_by(literal_column("student_id").asc().nulls_first())
@@ -0,0 +1,3 @@
+from .search import search_domain
+
+__all__ = ["search_domain"]
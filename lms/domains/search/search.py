@@ -0,0 +1,46 @@
+# Import necessary modules and types
+from typing import Final, Literal
+
+from flask import Blueprint, Response, jsonify, request
+
+# Import the search index and the conditional GET decorator
+from lms.adapters import conditional, search_index
+
+# Import the custom decorator for authorisation and the user roles
+from lms.decorators import authorise
+from lms.domains.user.user_model import UserRole
+
+# Define the default and maximum number of results, and the maximum length of a query
+DEFAULT_RESULTS: Final[int] = 20
+MAX_RESULTS: Final[int] = 100
+MAX_QUERY_LENGTH: Final[int] = 200
+
+# Create a Flask Blueprint to group the search endpoints
+search_domain = Blueprint("search_domain", __name__)
+
+
+# Define a route to search modules and assignments by title and description, answering 304 Not Modified while they
+# are unchanged, and restrict it to teachers
+@search_domain.get("/search")
+@authorise(UserRole.TEACHER)
+@conditional("modules", "assignments")
+def search(current_user) -> tuple[Response, Literal[200]] | tuple[Response, Literal[400]]:
+    """
+    Handle the retrieval of the modules and assignments best matching a query, the most relevant first.
+    """
+    # Read the query, the kinds of records to search (`?kind=module,assignment`) and the number of results
+    query = request.args.get("q", "").strip()
+    kinds = request.args.get("kind", ",".join(search_index.kinds)).split(",")
+    limit = request.args.get("limit", str(DEFAULT_RESULTS))
+
+    # Reject an empty or overlong query, unknown kinds and result counts outside the allowed range
+    if not query or len(query) > MAX_QUERY_LENGTH:
+        return jsonify({"message": f"Please enter a search query of at most {MAX_QUERY_LENGTH} characters"}), 400
+    if not set(kinds) <= set(search_index.kinds):
+        return jsonify({"message": f"Invalid kind, please choose from {', '.join(search_index.kinds)}"}), 400
+    if not limit.isdigit() or not 1 <= int(limit) <= MAX_RESULTS:
+        return jsonify({"message": f"limit must be between 1 and {MAX_RESULTS}"}), 400
+
+    # Return the ranked matches as a JSON response with a 200 OK status
+    hits = search_index.search(query, kinds=kinds, limit=int(limit))
+    return jsonify([hit._asdict() for hit in hits]), 200
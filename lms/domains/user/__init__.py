@@ -1,5 +1,5 @@
 from .user import user_domain
-from .user_model import User, UserRole
+from .user_model import Principal, User, UserRole
 from .user_service import UserService
 
-__all__ = ["user_domain", "User", "UserRole", "UserService"]
+__all__ = ["user_domain", "Principal", "User", "UserRole", "UserService"]
@@ -6,11 +6,22 @@ from typing import Final, Literal
 # Import relevant components from Flask
 from flask import Blueprint, Response, jsonify, request
 
-# Import authorisation decorators from the lms.common module
-from lms.common import authorise_admin, authorise_admin_or_teacher
-
-# Import User model and UserRole enumeration
-from .user_model import User, UserRole
+# Import the keyset pagination, field set, filter and sort helpers and the conditional GET decorator
+from lms.adapters import (
+    INVALID_PAGE_MESSAGE,
+    conditional,
+    fields_arg,
+    filter_args,
+    page_args,
+    paginated_response,
+    sort_arg,
+)
+
+# Import the authorisation decorator
+from .user_auth import authorise
+
+# Import User model, UserRole enumeration and the shortest and longest prefixes users can be searched by
+from .user_model import MAX_PREFIX_LENGTH, MIN_PREFIX_LENGTH, User, UserRole
 
 # Import UserService for user-related operations
 from .user_service import UserService
@@ -18,69 +29,90 @@ from .user_service import UserService
 # Define a constant for the directory where this script is located
 HERE: Final[str] = os.path.dirname(os.path.realpath(__file__))
 
+# Define the default and maximum number of users returned by a search
+DEFAULT_MATCHES: Final[int] = 10
+MAX_MATCHES: Final[int] = 50
+
 # Create a Blueprint object to organise a group of related views and other code
 user_domain = Blueprint("user_domain", __name__, url_prefix="/users")
 
 
 # Define a route to create a new user, accessible only by admin users
 @user_domain.post("/create")
-@authorise_admin
-def create_user() -> tuple[Response, Literal[422] | Literal[201]]:
+@authorise(UserRole.ADMIN)
+def create_user(current_user) -> tuple[Response, Literal[422] | Literal[201]]:
     # Retrieve user data from the request's JSON payload
     user_data = request.get_json()
     # Call the create method from UserService to handle the creation of the user
     message, status = UserService().create(params=user_data)
 
+    # Ask clients to back off when the password worker pool is saturated
+    if status == 503:
+        return jsonify({"message": message}), status, {"Retry-After": "1"}
+
     # Return a JSON response with the appropriate message and status code
     return jsonify({"message": message}), status
 
 
-# Define a route to list all users, accessible by admin users and teachers
+# Define a route to create the users of a roster, accessible only by admin users
+@user_domain.post("/bulk")
+@authorise(UserRole.ADMIN)
+def bulk_create_users(current_user) -> tuple[Response, Literal[200, 415, 422, 503]]:
+    # Create the users of the JSON array, CSV or NDJSON roster sent as the request body
+    report, status = UserService().bulk_create(lines=request.stream, media_type=request.mimetype)
+
+    # Ask clients to back off when another roster is being hashed
+    if status == 503:
+        return jsonify(report), status, {"Retry-After": "1"}
+
+    # Return the import report as a JSON response with the appropriate status code
+    return jsonify(report), status
+
+
+# Define a route to list all users, answering 304 Not Modified while they are unchanged, accessible by admin users
+# and teachers
 @user_domain.get("/list")
-@authorise_admin_or_teacher
-def get_all_users() -> tuple[Response, Literal[200]]:
-    # Retrieve all user records from the database
-    users = User.query.all()
-
-    # Construct a list of users with specific attributes to be returned
-    users = [
-        {
-            "id": user.id,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "email": user.email,
-            "username": user.username,
-            "role_id": user.role_id,
-        }
-        for user in users
-    ]
-
-    # Return the list of users as a JSON response with a 200 OK status
-    return jsonify(users), 200
+@authorise(UserRole.ADMIN, UserRole.TEACHER)
+@conditional("users")
+def get_all_users(current_user) -> tuple[Response, Literal[200]] | tuple[Response, Literal[400]]:
+    # Read the columns requested with `?fields=`, defaulting to the list view, and the filters and sort order
+    try:
+        view = fields_arg(User, default="list")
+        filters, order_by = filter_args(User), sort_arg(User)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    # Retrieve the requested page of user records from the database, selecting only those columns
+    try:
+        after, limit = page_args()
+        page = User.paginate(after=after, limit=limit, order_by=order_by, view=view, **filters)
+    except ValueError:
+        return jsonify({"message": INVALID_PAGE_MESSAGE}), 400
+
+    # Convert the rows to dictionaries with the compiled serializer of the selected columns
+    users = User.serialize(page.records, view=view)
+
+    # Return the list of users as a JSON response with a 200 OK status, linking to the next page
+    return paginated_response(users, page), 200
 
 
 # Define a route to get details of a specific user, accessible only by admin users
 @user_domain.get("/<int:user_id>")
-@authorise_admin
-def get_user(user_id) -> tuple[Response, Literal[200]] | tuple[Response, Literal[422]]:
-    # Retrieve a user by their ID
-    user = User.get(user_id)
+@authorise(UserRole.ADMIN)
+def get_user(user_id, current_user) -> tuple[Response, Literal[200]] | tuple[Response, Literal[422]]:
+    # Read the columns requested with `?fields=`, defaulting to the detail view
+    try:
+        view = fields_arg(User, default="detail")
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    # Retrieve the requested columns of a user by their ID
+    user = User.find_by(view=view, id=user_id)
 
     # Check if the user exists
     if user:
         # Return the user's details as a JSON response with a 200 OK status
-        return (
-            jsonify(
-                {
-                    "first_name": user.first_name,
-                    "last_name": user.last_name,
-                    "email": user.email,
-                    "username": user.username,
-                    "role_id": user.role_id,
-                }
-            ),
-            200,
-        )
+        return jsonify(User.serializer(view)(user)), 200
 
     # If the user does not exist, return an error message with a 422 Unprocessable Entity status
     return jsonify({"message": "No user found, please try again"}), 422
@@ -88,8 +120,8 @@ def get_user(user_id) -> tuple[Response, Literal[200]] | tuple[Response, Literal
 
 # Define a route to update user details, accessible only by admin users
 @user_domain.put("/<int:user_id>")
-@authorise_admin
-def update_user(user_id) -> tuple[Response, Literal[422, 200]]:
+@authorise(UserRole.ADMIN)
+def update_user(user_id, current_user) -> tuple[Response, Literal[422, 200]]:
     # Retrieve user data from the request's JSON payload
     user_data = request.get_json()
     # Call the update method from UserService to handle updating the user's details
@@ -99,22 +131,56 @@ def update_user(user_id) -> tuple[Response, Literal[422, 200]]:
     return jsonify({"message": message}), status
 
 
-# Define a route to list all students, accessible by admin users and teachers
+# Define a route to list all students, answering 304 Not Modified while users are unchanged, accessible by admin
+# users and teachers
 @user_domain.get("/list_students")
-@authorise_admin_or_teacher
-def list_all_students() -> tuple[Response, Literal[200]]:
-    # Retrieve all user records where the role is 'STUDENT'
-    students = User.query.where(User.role_id == UserRole.STUDENT.value).all()
-
-    # Construct a list of students with specific attributes to be returned
-    students = [
-        {
-            "id": student.id,
-            "first_name": student.first_name,
-            "last_name": student.last_name,
-        }
-        for student in students
-    ]
-
-    # Return the list of students as a JSON response with a 200 OK status
-    return jsonify(students), 200
+@authorise(UserRole.ADMIN, UserRole.TEACHER)
+@conditional("users")
+def list_all_students(current_user) -> tuple[Response, Literal[200]] | tuple[Response, Literal[400]]:
+    # Read the columns requested with `?fields=`, defaulting to the student view, and the filters and sort order
+    try:
+        view = fields_arg(User, default="student")
+        filters, order_by = filter_args(User), sort_arg(User)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    # Retrieve the requested page of user records where the role is 'STUDENT', selecting only those columns
+    try:
+        after, limit = page_args()
+        filters["role_id"] = UserRole.STUDENT.value
+        page = User.paginate(after=after, limit=limit, order_by=order_by, view=view, **filters)
+    except ValueError:
+        return jsonify({"message": INVALID_PAGE_MESSAGE}), 400
+
+    # Convert the rows to dictionaries with the compiled serializer of the selected columns
+    students = User.serialize(page.records, view=view)
+
+    # Return the list of students as a JSON response with a 200 OK status, linking to the next page
+    return paginated_response(students, page), 200
+
+
+# Define a route to look users up by the start of their username, name or email as it is typed, answering 304 Not
+# Modified while users are unchanged, accessible by admin users and teachers
+@user_domain.get("/search")
+@authorise(UserRole.ADMIN, UserRole.TEACHER)
+@conditional("users")
+def search_users(current_user) -> tuple[Response, Literal[200]] | tuple[Response, Literal[400]]:
+    # Read the prefix, the role of the users to search (`?role=student`) and the number of users to return
+    prefix = request.args.get("prefix", "").strip()
+    role = request.args.get("role")
+    limit = request.args.get("limit", str(DEFAULT_MATCHES))
+
+    # Reject a short or overlong prefix, unknown roles and user counts outside the allowed range
+    if len(prefix.partition("@")[0].strip()) < MIN_PREFIX_LENGTH or len(prefix) > MAX_PREFIX_LENGTH:
+        message = f"Please enter a prefix of {MIN_PREFIX_LENGTH} to {MAX_PREFIX_LENGTH} characters, before any @"
+        return jsonify({"message": message}), 400
+    if role and role.upper() not in UserRole.__members__:
+        return jsonify({"message": f"Invalid role: {role}, please choose from admin, teacher, student"}), 400
+    if not limit.isdigit() or not 1 <= int(limit) <= MAX_MATCHES:
+        return jsonify({"message": f"limit must be between 1 and {MAX_MATCHES}"}), 400
+
+    # Retrieve the first matching users by username, selecting the columns of the list view
+    rows = User.search(prefix, role_id=UserRole[role.upper()].value if role else None, limit=int(limit))
+
+    # Return the matching users as a JSON response with a 200 OK status
+    return jsonify(User.serialize(rows, view="list")), 200
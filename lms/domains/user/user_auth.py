@@ -0,0 +1,171 @@
+from functools import cache, wraps
+from typing import Any, Callable, NamedTuple
+
+from flask import current_app, request
+from sqlalchemy import bindparam, literal
+from sqlalchemy.orm import aliased
+
+from lms.adapters import MISSING, db
+from lms.common import AUTH_TOKEN_PATH
+from lms.domains.feature_switch.feature_switch_model import FeatureSwitch, feature_switch_cache
+
+from .user_model import Principal, User, UserRole, principal_cache
+
+# Define the name of the feature switch that bypasses authorisation
+HACKER_MODE: str = "hacker_mode"
+
+# Define the error responses returned by the authorisation engine
+INVALID_TOKEN_MESSAGE = (
+    "It appears you provided an invalid token. " "Please double-check your authorisation and try again."
+)
+NOT_AUTHORISED_MESSAGE = (
+    "It appears you are not authorised to perform this action. " "Please double-check your authorisation and try again."
+)
+NO_IMPERSONATED_USER_MESSAGE = (
+    "It appears hacker mode has no '{}' user to impersonate. " "Please create the user and try again."
+)
+
+# Define the user impersonated while hacker mode is on by the routes of each first allowed role, as the per-role
+# decorators did: teacher routes run as the teacher, student routes as the admin, and admin routes as nobody
+IMPERSONATED_ROLES: dict[UserRole, UserRole | None] = {
+    UserRole.ADMIN: None,
+    UserRole.TEACHER: UserRole.TEACHER,
+    UserRole.STUDENT: UserRole.ADMIN,
+}
+
+
+# Define the result of resolving a request's authorisation state
+class AuthState(NamedTuple):
+    hacker_mode: bool
+    principal: Principal | None
+    impersonated: Principal | None
+
+
+def authorise(*roles: UserRole) -> Callable:
+    """
+    A decorator factory to authorise users holding one of the given roles.
+    When no roles are given, any authenticated user is allowed.
+    The authenticated principal is passed to the route as `current_user`.
+    While hacker mode is on, the route is passed the user impersonated for its first role (the teacher when any user
+    is allowed), or None for admin routes.
+    """
+    # Pre-compute the allowed role ids and the user impersonated while hacker mode is on
+    allowed_role_ids = frozenset(role.value for role in roles)
+    impersonated_role = IMPERSONATED_ROLES[roles[0]] if roles else UserRole.TEACHER
+    impersonated_username = impersonated_role.name.lower() if impersonated_role else None
+
+    def decorator(function) -> Any:
+        @wraps(function)
+        def check_auth(*args, **kwargs) -> Any:
+            # Resolve the hacker_mode switch and the principal in a single database round trip
+            state = resolve_auth_state(access_token=read_access_token(), impersonate=impersonated_username)
+
+            # If hacker mode is active, bypass the authorisation and impersonate the default user for the route,
+            # returning an error message and a 401 status code when that user does not exist
+            if state.hacker_mode:
+                if impersonated_username and not state.impersonated:
+                    return {"message": NO_IMPERSONATED_USER_MESSAGE.format(impersonated_username)}, 401
+                return function(*args, **kwargs, current_user=state.impersonated)
+
+            # If no user is found, return an error message and a 401 status code
+            if not state.principal:
+                return {"message": INVALID_TOKEN_MESSAGE}, 401
+
+            # If the user holds none of the allowed roles, return an error message and a 401 status code
+            if allowed_role_ids and state.principal.role_id not in allowed_role_ids:
+                return {"message": NOT_AUTHORISED_MESSAGE}, 401
+
+            # If all checks pass, proceed to the original function
+            return function(*args, **kwargs, current_user=state.principal)
+
+        return check_auth
+
+    return decorator
+
+
+def read_access_token() -> str | None:
+    """
+    Read the access token from the request's `Authorization: Bearer` header.
+    Falls back to the legacy token file only when AUTH_TOKEN_FILE_FALLBACK is enabled.
+    """
+    # Parse the bearer token sent by the client
+    scheme, _, access_token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and access_token.strip():
+        return access_token.strip()
+
+    # If the legacy file mode is enabled, read the token stored by the last successful login
+    if current_app.config["AUTH_TOKEN_FILE_FALLBACK"]:
+        try:
+            with open(AUTH_TOKEN_PATH, "r") as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            pass
+
+    return None
+
+
+def resolve_auth_state(access_token: str | None, impersonate: str | None) -> AuthState:
+    """
+    Resolve the hacker_mode switch and the principal from the caches when they are warm,
+    otherwise fetch the switch, the token holder and the impersonated user in one query.
+    """
+    # Serve the request without touching the database when the caches already hold the answer
+    hacker_mode = feature_switch_cache.get(HACKER_MODE)
+    if hacker_mode is not MISSING:
+        if hacker_mode and impersonate is None:
+            return AuthState(hacker_mode=True, principal=None, impersonated=None)
+        if hacker_mode:
+            impersonated = principal_cache.get(("username", impersonate))
+            if impersonated is not MISSING:
+                return AuthState(hacker_mode=True, principal=None, impersonated=impersonated)
+        elif access_token:
+            principal = principal_cache.get(("token", access_token))
+            if principal is not MISSING:
+                return AuthState(hacker_mode=False, principal=principal, impersonated=None)
+
+    row = db.session.execute(_auth_state_statement(), {"access_token": access_token, "impersonate": impersonate}).one()
+    state = AuthState(
+        hacker_mode=bool(row.hacker_mode),
+        principal=_principal(row.user_id, row.user_role_id, row.user_username),
+        impersonated=_principal(row.impersonated_id, row.impersonated_role_id, row.impersonated_username),
+    )
+
+    # Warm the caches with everything the query resolved
+    feature_switch_cache.set(HACKER_MODE, state.hacker_mode)
+    if state.principal:
+        principal_cache.set(("token", access_token), state.principal)
+    if state.impersonated:
+        principal_cache.set(("username", impersonate), state.impersonated)
+
+    return state
+
+
+@cache
+def _auth_state_statement() -> Any:
+    # Anchor the query on a single-row select so every outer join is optional
+    anchor = db.select(literal(1).label("anchor")).subquery("anchor")
+    token_user = aliased(User, name="token_user")
+    impersonated_user = aliased(User, name="impersonated_user")
+
+    return (
+        db.select(
+            FeatureSwitch.active.label("hacker_mode"),
+            token_user.id.label("user_id"),
+            token_user.role_id.label("user_role_id"),
+            token_user.username.label("user_username"),
+            impersonated_user.id.label("impersonated_id"),
+            impersonated_user.role_id.label("impersonated_role_id"),
+            impersonated_user.username.label("impersonated_username"),
+        )
+        .select_from(anchor)
+        .outerjoin(FeatureSwitch, FeatureSwitch.name == HACKER_MODE)
+        .outerjoin(token_user, token_user.auth_token == bindparam("access_token"))
+        .outerjoin(impersonated_user, impersonated_user.username == bindparam("impersonate"))
+        .limit(1)
+    )
+
+
+def _principal(id: int | None, role_id: int | None, username: str | None) -> Principal | None:
+    if id is None:
+        return None
+    return Principal(id=id, role_id=role_id, username=username)
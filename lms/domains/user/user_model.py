@@ -1,12 +1,17 @@
 import enum
+import secrets
 
 # Import the necessary libraries and modules
 from dataclasses import dataclass
+from typing import Any, Final, Iterable
 
+from flask import current_app
+from sqlalchemy import Computed, Integer, bindparam, func, or_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
-from lms.adapters import BaseMixin, db
+from lms.adapters import MISSING, RANGE_OPERATORS, BaseMixin, Filter, PrefixIndex, TTLCache, db, versions
 
 
 # Define the UserRole enumeration for managing user roles
@@ -16,11 +21,75 @@ class UserRole(enum.Enum):
     STUDENT = 3
 
 
+# Define a mixin providing role checks for anything that carries a role_id
+class RoleMixin(object):
+    __slots__ = ()
+
+    role_id: int
+
+    # Define methods to check the user's role
+    def is_admin(self) -> bool:
+        return self.role_id == UserRole.ADMIN.value
+
+    def is_teacher(self) -> bool:
+        return self.role_id == UserRole.TEACHER.value
+
+    def is_student(self) -> bool:
+        return self.role_id == UserRole.STUDENT.value
+
+
+# Define a lightweight, read-only record of the authenticated user handed to protected routes
+@dataclass(frozen=True, slots=True)
+class Principal(RoleMixin):
+    id: int
+    role_id: int
+    username: str
+
+
+# Cache principals by ("token", auth_token) and ("username", username) to skip the database on warm requests
+principal_cache = TTLCache("principals", maxsize=10_000, ttl=60.0)
+
+# Define the document users are searched by, as stored and indexed by PostgreSQL
+# (db/migrations/V9__user_search_document.sql): their username, names and the part of their email before the @,
+# lowercased. A prefix matches a user when it starts one of the words of the document, which is preceded by a space so
+# that the first word starts after one too.
+USER_SEARCH_DOCUMENT: Final[str] = (
+    "' ' || lower(username) || ' ' || lower(first_name) || ' ' || lower(last_name) || ' ' || "
+    "lower(split_part(email, '@', 1))"
+)
+
+# Define the shortest and longest prefixes users can be searched by, before any @. Shorter prefixes give the trigram
+# index only the trigrams of the start of a word, which match a large share of the users, so they are not searched.
+MIN_PREFIX_LENGTH: Final[int] = 3
+MAX_PREFIX_LENGTH: Final[int] = 64
+
+# Cache search results by (users table version, prefix, role_id, limit), so that a write to users by any process
+# retires them; writes by this process also drop every entry
+user_search_cache = TTLCache("user_searches", maxsize=4096, ttl=60.0)
+
+# Index the search documents of users in memory when USER_SEARCH_BACKEND is "memory", loaded on the first search, with
+# the rows of the list view (id, first_name, last_name, email, username, role_id) in order of username.
+# The index only follows the writes of its own process, so the memory backend is for single-process deployments.
+user_prefix_index = PrefixIndex(order=lambda row: row[4], length=MAX_PREFIX_LENGTH)
+
+
 # Utilise the dataclass decorator to automatically generate special methods
 @dataclass
-class User(BaseMixin, db.Model):
+class User(RoleMixin, BaseMixin, db.Model):
     # Set the table name for the User model
     __tablename__ = "users"
+    # Declare the indexes created by the V3, V6 and V9 migrations
+    __table_args__ = (
+        db.Index("users_role_id_id_idx", "role_id", "id"),
+        db.Index("users_created_at_id_idx", "created_at", "id"),
+        db.Index(
+            "users_search_trgm_idx",
+            "search_document",
+            postgresql_using="gin",
+            postgresql_ops={"search_document": "gin_trgm_ops"},
+            postgresql_with={"fastupdate": "off"},
+        ),
+    )
 
     # Define the User model attributes with their respective data types and constraints
     username: str = db.Column(db.String, unique=True, nullable=False)
@@ -30,10 +99,28 @@ class User(BaseMixin, db.Model):
     last_name: str = db.Column(db.String, nullable=False)
     email: str = db.Column(db.String, unique=True, nullable=False)
     auth_token: str = db.Column(db.String(255), unique=True)
+    # Declare the search document generated by the database, loaded only when accessed
+    search_document = deferred(db.Column(db.Text, Computed(USER_SEARCH_DOCUMENT, persisted=True)))
 
     # Establish a relationship with the Grade model
     grades = relationship("Grade", backref="users")
 
+    # Define the columns selected by the list endpoints and returned by the details endpoint, never password hashes or
+    # auth tokens
+    __views__ = {
+        "list": ("id", "first_name", "last_name", "email", "username", "role_id"),
+        "student": ("id", "first_name", "last_name"),
+        "detail": ("first_name", "last_name", "email", "username", "role_id"),
+    }
+    # Define the columns clients may select with `?fields=`
+    __fields__ = ("id", "first_name", "last_name", "email", "username", "role_id", "created_at", "updated_at")
+    # Define the filters and sort orders of the list endpoints; roles are filtered by name (`?role=teacher`)
+    __filters__ = {
+        "role": Filter("role_id", parse=lambda name: UserRole[name.upper()].value),
+        "created_at": Filter("created_at", RANGE_OPERATORS),
+    }
+    __sorts__ = ("id", "-id", "created_at", "-created_at")
+
     # Define the constructor for initialising User objects
     def __init__(
         self,
@@ -69,10 +156,112 @@ class User(BaseMixin, db.Model):
         )
         db.session.add(user)
         db.session.commit()
+
+        # Make the new user searchable
+        cls._searchable(user.id, username, first_name, last_name, email, role_id)
         return user
 
+    # Define a class method to find which of the given emails and usernames already belong to users, in one query
+    @classmethod
+    def taken(cls, emails: Iterable[str], usernames: Iterable[str]) -> tuple[set[str], set[str]]:
+        emails, usernames = set(emails), set(usernames)
+        rows = db.session.execute(
+            db.select(cls.email, cls.username).where(or_(cls.email.in_(emails), cls.username.in_(usernames)))
+        ).all()
+        taken_emails = {email for email, _ in rows if email in emails}
+        taken_usernames = {username for _, username in rows if username in usernames}
+        return taken_emails, taken_usernames
+
+    # Define a class method to insert many users with multi-row INSERT statements and commit them.
+    # Users conflicting with an existing username, email or token are skipped rather than failing the batch.
+    # Returns the (id, username, email) rows of the users created.
+    @classmethod
+    def bulk_create(cls, users: list[dict[str, Any]]) -> list[Any]:
+        if not users:
+            return []
+
+        statement = insert(cls).on_conflict_do_nothing().returning(cls.id, cls.username, cls.email)
+        created = db.session.execute(statement, users).all()
+        db.session.commit()
+
+        # Make the new users searchable
+        by_username = {user["username"]: user for user in users}
+        for id, username, email in created:
+            user = by_username[username]
+            cls._searchable(id, username, user["first_name"], user["last_name"], email, user["role_id"])
+        return created
+
+    # Define a class method to return the first `limit` users, by username, whose username, first name, last name,
+    # full name or email starts with the prefix, regardless of case, optionally only those of a role.
+    # Returns rows of the list view, none for a prefix shorter than MIN_PREFIX_LENGTH before any @; results are cached
+    # per prefix until the users table changes.
+    @classmethod
+    def search(cls, prefix: str, role_id: int | None = None, limit: int = 10) -> list[tuple]:
+        prefix = " ".join(prefix.lower().split())[:MAX_PREFIX_LENGTH]
+        key = (versions(["users"]).get("users"), prefix, role_id, limit)
+        rows = user_search_cache.get(key)
+        if rows is MISSING:
+            search = cls._search_memory if current_app.config["USER_SEARCH_BACKEND"] == "memory" else cls._search_table
+            rows = search(prefix, role_id, limit) if len(prefix.partition("@")[0]) >= MIN_PREFIX_LENGTH else []
+            user_search_cache.set(key, rows)
+        return rows
+
+    # Define a class method to search the users table, through the trigram index of their search document.
+    # An email prefix matches the words of the local part of the email first, then the whole email.
+    # The matches are collected in a materialised CTE before the first `limit` are taken by username: the planner
+    # otherwise walks the username index, expecting to find them early, and filters most of the table when the users
+    # matching the prefix sort last.
+    @classmethod
+    def _search_table(cls, prefix: str, role_id: int | None, limit: int) -> list[tuple]:
+        email = "@" in prefix
+        filters = {} if role_id is None else {"role_id": role_id}
+
+        def build(conditions) -> Any:
+            conditions.append(cls.search_document.like(bindparam("pattern"), escape="\\"))
+            if email:
+                conditions.append(func.lower(cls.email).like(bindparam("email"), escape="\\"))
+            matches = db.select(cls.id, cls.username).where(*conditions).cte("matches").prefix_with("MATERIALIZED")
+            first = db.select(matches.c.id).order_by(matches.c.username).limit(bindparam("limit", type_=Integer))
+            return cls._select("list").where(cls.id.in_(first)).order_by(cls.username)
+
+        statement = cls._statement(("search", email), filters, build)
+        params = {**cls._params(filters), "pattern": f"% {_like(prefix.partition('@')[0])}%", "limit": limit}
+        if email:
+            params["email"] = f"{_like(prefix)}%"
+        return [tuple(row) for row in db.session.execute(statement, params)]
+
+    # Define a class method to search the users indexed in memory, loading every user on the first search
+    @classmethod
+    def _search_memory(cls, prefix: str, role_id: int | None, limit: int) -> list[tuple]:
+        if not user_prefix_index.loaded:
+            rows = db.session.execute(cls._select("list")).all()
+            user_prefix_index.load(
+                (row.id, _search_document(row.username, row.first_name, row.last_name, row.email), tuple(row))
+                for row in rows
+            )
+
+        # Keep the rows of the role, and those whose email starts with an email prefix
+        email = "@" in prefix
+
+        def where(row) -> bool:
+            return (role_id is None or row[5] == role_id) and (not email or row[3].lower().startswith(prefix))
+
+        filtered = role_id is not None or email
+        return user_prefix_index.search(prefix.partition("@")[0], limit, where=where if filtered else None)
+
+    # Define a class method to make a user's current details searchable
+    @classmethod
+    def _searchable(cls, id: int, username: str, first_name: str, last_name: str, email: str, role_id: int) -> None:
+        user_search_cache.clear()
+        if user_prefix_index.loaded:
+            document = _search_document(username, first_name, last_name, email)
+            user_prefix_index.add(id, document, (id, first_name, last_name, email, username, role_id))
+
     # Define a method to update user attributes and save changes to the database
     def update(self, update_params: dict) -> "User":
+        # Remember the identity the cached principals are keyed by
+        previous = (self.username, self.role_id)
+
         self.username = update_params.get("username", self.username)
         self.role_id = update_params.get("role_id", self.role_id)
         self.first_name = update_params.get("first_name", self.first_name)
@@ -85,14 +274,36 @@ class User(BaseMixin, db.Model):
             db.session.rollback()
             raise ValueError("Invalid params")
 
+        # Invalidate the cached principal when its username or role changed
+        if (self.username, self.role_id) != previous:
+            principal_cache.delete(("token", self.auth_token), ("username", previous[0]), ("username", self.username))
+
+        # Search the user by their new details
+        self._searchable(self.id, self.username, self.first_name, self.last_name, self.email, self.role_id)
+
         return self
 
-    # Define methods to check the user's role
-    def is_admin(self) -> bool:
-        return self.role_id == UserRole.ADMIN.value
+    # Define a method to replace the user's password hash
+    def set_password(self, password: str) -> None:
+        self.password = password
+        db.session.commit()
 
-    def is_teacher(self) -> bool:
-        return self.role_id == UserRole.TEACHER.value
+    # Define a method to replace the user's auth token, revoking the previous one
+    def rotate_auth_token(self) -> str:
+        previous_token = self.auth_token
+        self.auth_token = secrets.token_hex(24)
+        db.session.commit()
 
-    def is_student(self) -> bool:
-        return self.role_id == UserRole.STUDENT.value
+        # Invalidate the principal cached for the revoked token
+        principal_cache.delete(("token", previous_token))
+        return self.auth_token
+
+
+# Define a function to build the search document of a user as PostgreSQL does, without the leading space
+def _search_document(username: str, first_name: str, last_name: str, email: str) -> str:
+    return f"{username} {first_name} {last_name} {email.split('@')[0]}".lower()
+
+
+# Define a function to escape the wildcards of a LIKE pattern
+def _like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
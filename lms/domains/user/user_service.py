@@ -1,12 +1,17 @@
-# Import necessary modules for file and random operations.
+# Import necessary modules for file, random and JSON operations.
+import json
 import os
 import secrets
 
 # Import types for code clarity and static type checking.
-from typing import Final, Literal
+from typing import Any, Final, Iterable, Literal
 
-# Import bcrypt library for password hashing.
-import bcrypt
+# Import the Flask application proxy to read configuration.
+from flask import current_app
+
+# Import the worker pool that runs bcrypt off the request thread, the upload readers, and the legacy token file path.
+from lms.adapters import CSV_MEDIA_TYPE, NDJSON_MEDIA_TYPE, PoolSaturated, csv_records, ndjson_records, password_pool
+from lms.common import AUTH_TOKEN_PATH
 
 # Import User and UserRole classes from the user_model module within the same package.
 from .user_model import User, UserRole
@@ -14,11 +19,17 @@ from .user_model import User, UserRole
 # Determine and set the path for the current file.
 HERE: Final[str] = os.path.dirname(os.path.realpath(__file__))
 
+# Define the message returned when the password worker pool sheds a request.
+BUSY_MESSAGE: Final[str] = "The service is busy right now, please try again in a moment"
+
+# Define the fields of a user in a bulk roster.
+USER_FIELDS: Final[tuple[str, ...]] = ("username", "password", "role", "first_name", "last_name", "email")
+
 
 # Create the UserService class to handle user-related operations.
 class UserService:
     # Define a method to create a new user.
-    def create(self, params: dict[str, str | int]) -> tuple[str, Literal[422] | Literal[201]]:
+    def create(self, params: dict[str, str | int]) -> tuple[str, Literal[422] | Literal[201] | Literal[503]]:
         # Extract user details from the input parameters.
         username = params.get("username")
         password = params.get("password")
@@ -32,8 +43,7 @@ class UserService:
             return "Something doesn't look right, please double-check the parameters and try again", 422
 
         # Check if a user with the given email already exists.
-        user = User.find_by(email=email)
-        if user:
+        if User.exists(email=email):
             return f"User with email {email} already exists, please double-check the parameters and try again", 422
 
         # Convert role string to its corresponding enum value.
@@ -42,13 +52,16 @@ class UserService:
         except KeyError:
             return "You've specified an invalid role, please double-check the parameters and try again", 422
 
-        # Hash the user's password.
-        hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+        # Hash the user's password on the worker pool.
+        try:
+            hashed_password = password_pool.hash(password)
+        except PoolSaturated:
+            return BUSY_MESSAGE, 503
 
         # Save the new user in the database.
         User.create(
             username=username,
-            password=hashed_password.decode("utf-8"),
+            password=hashed_password,
             role_id=role_id,
             first_name=first_name,
             last_name=last_name,
@@ -58,6 +71,77 @@ class UserService:
 
         return f"User with email {email} successfully created", 201
 
+    # Define a method to create the users of a roster: a JSON array of users, or a CSV or NDJSON file read from `lines`.
+    # Invalid rows and rows naming a taken email or username are reported by their position in the roster,
+    # starting at 1, while the other users are created.
+    def bulk_create(
+        self, lines: Iterable[bytes], media_type: str
+    ) -> tuple[dict[str, Any], Literal[200, 415, 422, 503]]:
+        # Read the roster's users in order
+        try:
+            records = _roster_records(lines, media_type)
+        except json.JSONDecodeError:
+            return {"message": "The roster is not valid JSON"}, 422
+        except ValueError as error:
+            return {"message": str(error)}, 422
+        if records is None:
+            message = "Unsupported file type, please upload an application/json, text/csv or application/x-ndjson file"
+            return {"message": message}, 415
+
+        # Validate every row, rejecting the later rows that repeat an email or username of the roster
+        errors: dict[int, str] = {}
+        users: dict[int, dict[str, Any]] = {}
+        emails, usernames = set(), set()
+        for row, record in enumerate(records, start=1):
+            user = _roster_user(record)
+            if isinstance(user, str):
+                errors[row] = user
+            elif user["email"] in emails:
+                errors[row] = f"Email {user['email']} appears earlier in the roster"
+            elif user["username"] in usernames:
+                errors[row] = f"Username {user['username']} appears earlier in the roster"
+            else:
+                users[row] = user
+                emails.add(user["email"])
+                usernames.add(user["username"])
+
+        # Reject the users whose email or username is already taken, checked in one query
+        taken_emails, taken_usernames = User.taken(emails=emails, usernames=usernames)
+        for row, user in list(users.items()):
+            if user["email"] in taken_emails:
+                errors[row] = f"User with email {user['email']} already exists"
+            elif user["username"] in taken_usernames:
+                errors[row] = f"User with username {user['username']} already exists"
+            else:
+                continue
+            del users[row]
+
+        # Hash the passwords across the batch workers
+        try:
+            hashes = password_pool.hash_many(user["password"] for user in users.values())
+        except PoolSaturated:
+            return {"message": BUSY_MESSAGE}, 503
+        for user, hashed_password in zip(users.values(), hashes):
+            user["password"] = hashed_password
+
+        # Insert the users, reporting those taken by a concurrent request since the check
+        created = {user.email: user for user in User.bulk_create(list(users.values()))}
+        for row, user in users.items():
+            if user["email"] not in created:
+                errors[row] = f"User with email {user['email']} or username {user['username']} already exists"
+
+        return {
+            "message": f"{len(created)} users created and {len(errors)} rows rejected",
+            "created": len(created),
+            "rejected": len(errors),
+            "users": [
+                {"row": row, "id": created[user["email"]].id, "username": user["username"]}
+                for row, user in users.items()
+                if user["email"] in created
+            ],
+            "errors": [{"row": row, "message": message} for row, message in sorted(errors.items())],
+        }, 200
+
     # Define a method to update existing user information.
     def update(self, user_id: int, params: dict[str, str | int]) -> tuple[str, Literal[422] | Literal[200]]:
         # Default error message and status code.
@@ -93,21 +177,96 @@ class UserService:
 
         return message, status_code
 
-    # Define a method to log a user in.
+    # Define a method to log a user in, returning the bearer token on success.
     def login(
         self, username: str, password: str
-    ) -> tuple[Literal["Successfully logged-in"], Literal[200]] | tuple[str, Literal[422]]:
+    ) -> tuple[Literal["Successfully logged-in"], Literal[200], str] | tuple[str, Literal[422] | Literal[503], None]:
         # Fetch the user using the given username.
         user = User.find_by(username=username)
 
         # Check if user exists and the password matches.
         if user:
-            user_password = password.encode("utf-8")
-            if bcrypt.checkpw(user_password, user.password.encode("utf-8")):
-                # Store the user auth token in a file (not recommended for production systems).
-                with open(f"{HERE}/../../../.auth", "w") as file:
-                    file.write(user.auth_token)
-                return "Successfully logged-in", 200
+            # Verify the password on the worker pool.
+            try:
+                password_matches = password_pool.check(password, user.password)
+            except PoolSaturated:
+                return BUSY_MESSAGE, 503, None
+
+            if password_matches:
+                # Transparently rehash passwords stored with a work factor other than the configured one.
+                if password_pool.needs_rehash(user.password):
+                    try:
+                        user.set_password(password_pool.hash(password))
+                    except PoolSaturated:
+                        pass
+
+                # Issue a token to users created before tokens were mandatory.
+                if not user.auth_token:
+                    user.rotate_auth_token()
+
+                # Store the user auth token in the shared file when the legacy file mode is enabled.
+                if current_app.config["AUTH_TOKEN_FILE_FALLBACK"]:
+                    with open(AUTH_TOKEN_PATH, "w") as file:
+                        file.write(user.auth_token)
+                return "Successfully logged-in", 200, user.auth_token
 
         # Return an error if login fails.
-        return "An error occurred while trying to log-in, please double-check your credentials and try again.", 422
+        return (
+            "An error occurred while trying to log-in, please double-check your credentials and try again.",
+            422,
+            None,
+        )
+
+    # Define a method to log a user out by revoking their bearer token.
+    def logout(self, access_token: str | None) -> None:
+        # Rotate the token so that it can no longer be used.
+        if access_token:
+            user = User.find_by(auth_token=access_token)
+            if user:
+                user.rotate_auth_token()
+
+        # Remove the shared token file when the legacy file mode is enabled.
+        if current_app.config["AUTH_TOKEN_FILE_FALLBACK"] and os.path.exists(AUTH_TOKEN_PATH):
+            os.remove(AUTH_TOKEN_PATH)
+
+
+# Define a function to read the records of a roster in order, or return None when its file type is not supported.
+# Raises ValueError when the roster is not a JSON array or its CSV header lacks a field.
+def _roster_records(lines: Iterable[bytes], media_type: str) -> list[dict[str, Any] | None] | None:
+    if media_type == "application/json":
+        roster = json.loads(b"".join(lines))
+        if not isinstance(roster, list):
+            raise ValueError("The roster must be a JSON array of users")
+        return [record if isinstance(record, dict) else None for record in roster]
+    if media_type == CSV_MEDIA_TYPE:
+        return [record for _, record in csv_records(lines, USER_FIELDS)]
+    if media_type == NDJSON_MEDIA_TYPE:
+        return [record for _, record in ndjson_records(lines)]
+    return None
+
+
+# Define a function to validate a roster record into the columns of a new user, or return why it is invalid.
+def _roster_user(record: dict[str, Any] | None) -> dict[str, Any] | str:
+    if record is None:
+        return "Not a JSON object"
+
+    missing = [field for field in USER_FIELDS if record.get(field) in (None, "")]
+    if missing:
+        return f"Missing {', '.join(missing)}"
+    if not all(isinstance(record[field], str) for field in USER_FIELDS):
+        return "Every field must be a string"
+
+    try:
+        role_id = UserRole[record["role"].upper()].value
+    except KeyError:
+        return f"Invalid role {record['role']}"
+
+    return {
+        "username": record["username"],
+        "password": record["password"],
+        "role_id": role_id,
+        "first_name": record["first_name"],
+        "last_name": record["last_name"],
+        "email": record["email"],
+        "auth_token": secrets.token_hex(24),
+    }
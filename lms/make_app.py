@@ -17,8 +17,9 @@ from flask_compress import Compress
 # Import CORS to handle Cross-Origin Resource Sharing.
 from flask_cors import CORS
 
-# Import the db object from the lms.adapters module.
-from lms.adapters import db
+# Import the JSON provider, the db object, the bcrypt worker pool, the SQL statement tracker and the search index from
+# the lms.adapters module.
+from lms.adapters import OrjsonProvider, calibrate_bcrypt_command, db, password_pool, query_tracker, search_index
 
 # Define the path to the directory containing this script.
 HERE: Final[str] = os.path.dirname(os.path.realpath(__file__))
@@ -32,8 +33,13 @@ def make_app() -> Flask:
     app = Flask(__name__)
     # Generate and set a secret key for the application.
     app.secret_key = secrets.token_hex(24)
-    # Initialise compression for the application.
+    # Encode and decode JSON with orjson rather than the standard library.
+    app.json = OrjsonProvider(app)
+    # Initialise compression for the application, never buffering a streamed response (an export) to compress it.
+    app.config["COMPRESS_STREAMS"] = False
     compress.init_app(app)
+    # Register the compression object, so that cached responses can be stored already compressed.
+    app.extensions["compress"] = compress
 
     # Enable and configure CORS for the application.
     CORS(app)
@@ -44,6 +50,9 @@ def make_app() -> Flask:
     app.config["SESSION_COOKIE_SECURE"] = True
     app.config["SESSION_COOKIE_HTTPONLY"] = True
 
+    # Configure whether the legacy shared .auth token file is honoured alongside bearer tokens.
+    app.config["AUTH_TOKEN_FILE_FALLBACK"] = os.environ.get("AUTH_TOKEN_FILE_FALLBACK", "0") == "1"
+
     # Configure SQLAlchemy settings for the application.
     app.config["SQLALCHEMY_DATABASE_URI"] = database_uri()
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
@@ -52,6 +61,32 @@ def make_app() -> Flask:
     # Initialise the database with the application.
     db.init_app(app)
 
+    # Record the SQL statements run by each request; statements repeated this many times are flagged as N+1.
+    app.config["QUERY_N_PLUS_ONE_THRESHOLD"] = int(os.environ.get("QUERY_N_PLUS_ONE_THRESHOLD", 3))
+    # Log statements slower than SLOW_QUERY_MS, writing the EXPLAIN ANALYZE plan of a sample of them to a file
+    # when QUERY_PLAN_LOG_PATH is set.
+    app.config["SLOW_QUERY_MS"] = float(os.environ.get("SLOW_QUERY_MS", 200))
+    app.config["SLOW_QUERY_EXPLAIN_SAMPLE_RATE"] = float(os.environ.get("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 0.1))
+    app.config["QUERY_PLAN_LOG_PATH"] = os.environ.get("QUERY_PLAN_LOG_PATH")
+    query_tracker.init_app(app)
+
+    # Configure and start the worker pool that runs bcrypt off the request threads.
+    app.config["PASSWORD_POOL_WORKERS"] = int(os.environ.get("PASSWORD_POOL_WORKERS", 2))
+    app.config["PASSWORD_POOL_QUEUE"] = int(os.environ.get("PASSWORD_POOL_QUEUE", 16))
+    # Configure the workers hashing the passwords of bulk-provisioned users, one per core by default.
+    app.config["PASSWORD_BATCH_WORKERS"] = int(os.environ.get("PASSWORD_BATCH_WORKERS", os.cpu_count() or 1))
+    # Configure the bcrypt work factor; use `flask calibrate-bcrypt` to pick one for the hardware.
+    app.config["BCRYPT_ROUNDS"] = int(os.environ.get("BCRYPT_ROUNDS", 12))
+    password_pool.init_app(app)
+    app.cli.add_command(calibrate_bcrypt_command)
+
+    # Configure the full-text search on PostgreSQL's tsvector columns; only tests switch SEARCH_BACKEND to the SQLite
+    # stub
+    search_index.init_app(app)
+    # Configure the user search backend: PostgreSQL's trigram index, or an in-memory index of word prefixes that only
+    # follows the writes of its own process.
+    app.config["USER_SEARCH_BACKEND"] = os.environ.get("USER_SEARCH_BACKEND", "postgres")
+
     # Return the configured Flask application.
     return app
 
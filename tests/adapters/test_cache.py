@@ -0,0 +1,57 @@
+import pytest
+
+from lms.adapters import MISSING, TTLCache, cache_stats
+
+
+class TestTTLCache:
+    def test_get_and_set(self) -> None:
+        # Test storing and retrieving a value
+        cache = TTLCache("test_get_and_set", maxsize=2, ttl=60)
+        cache.set("key", "value")
+
+        assert cache.get("key") == "value"
+        assert cache.get("unknown") is MISSING
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        # Test that the least recently used entry is evicted once maxsize is exceeded
+        cache = TTLCache("test_eviction", maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_expired_entry_is_dropped(self, monkeypatch) -> None:
+        # Test that entries older than the ttl are treated as missing
+        cache = TTLCache("test_expiry", maxsize=2, ttl=10)
+        monkeypatch.setattr("lms.adapters.cache.time.monotonic", lambda: 100.0)
+        cache.set("key", "value")
+        monkeypatch.setattr("lms.adapters.cache.time.monotonic", lambda: 111.0)
+
+        assert cache.get("key") is MISSING
+        assert cache.stats()["expirations"] == 1
+        assert cache.stats()["size"] == 0
+
+    def test_delete_and_stats(self) -> None:
+        # Test deleting entries and reporting registered caches
+        cache = TTLCache("test_delete", maxsize=2, ttl=60)
+        cache.set("key", "value")
+        cache.delete("key", "unknown")
+
+        assert cache.get("key") is MISSING
+        assert "test_delete" in cache_stats()
+
+    @pytest.mark.parametrize("maxsize", [1, 3])
+    def test_size_is_bounded(self, maxsize) -> None:
+        # Test that the cache never grows beyond maxsize
+        cache = TTLCache(f"test_bounded_{maxsize}", maxsize=maxsize, ttl=60)
+        for key in range(10):
+            cache.set(key, key)
+
+        assert cache.stats()["size"] == maxsize
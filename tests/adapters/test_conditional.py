@@ -0,0 +1,94 @@
+from sqlalchemy import text
+
+from lms.adapters import conditional
+from lms.adapters import db as _db
+from lms.adapters import versions
+from lms.domains import Module
+from tests.factories import ModuleFactory
+
+
+class TestConditional:
+    def test_versions_are_bumped_by_writes(self, db, teacher_user) -> None:
+        # Test that every statement writing to a table bumps its version, and leaves the other tables alone
+        before = versions(["modules", "grades"])
+        ModuleFactory.create()
+
+        after = versions(["modules", "grades"])
+
+        assert after["modules"] > before["modules"]
+        assert after["grades"] == before["grades"]
+
+    def test_versions_count_every_change_across_folds(self, db) -> None:
+        # Test that folding the changes into the counters, every 128th change, keeps each version exact
+        before = versions(["modules", "grades"])
+        for _ in range(300):
+            db.session.execute(text("UPDATE modules SET title = title WHERE false"))
+
+        after = versions(["modules", "grades"])
+
+        assert after == {"modules": before["modules"] + 300, "grades": before["grades"]}
+        assert db.session.execute(text("SELECT count(*) FROM table_changes")).scalar() < 300
+
+    def test_concurrent_writers_do_not_wait(self, app) -> None:
+        # Test that a transaction writing to a counted table does not block another one until it commits
+        with _db.engine.connect() as first, _db.engine.connect() as second:
+            first.execute(text("UPDATE modules SET title = title WHERE false"))
+            second.execute(text("SET LOCAL lock_timeout = '1s'"))
+            second.execute(text("UPDATE modules SET title = title WHERE false"))
+            first.rollback()
+            second.rollback()
+
+    def test_not_modified(self, client, teacher_user, query_budget) -> None:
+        # Test that a request naming the current tag gets an empty 304 without the rows being loaded
+        response = client.get("/modules/list")
+        tag = response.headers["ETag"]
+
+        with query_budget(2):
+            not_modified = client.get("/modules/list", headers={"If-None-Match": tag})
+
+        assert response.status_code == 200
+        assert tag.startswith('W/"')
+        assert not_modified.status_code == 304
+        assert not_modified.data == b""
+        assert not_modified.headers["ETag"] == tag
+        assert "Authorization" in not_modified.headers["Vary"]
+
+    def test_compressed_tag(self, client, teacher_user) -> None:
+        # Test that the tag of a compressed response, suffixed with its encoding, still validates
+        ModuleFactory.create_batch(20)
+        response = client.get("/modules/list", headers={"Accept-Encoding": "gzip"})
+
+        not_modified = client.get("/modules/list", headers={"If-None-Match": response.headers["ETag"]})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["ETag"].endswith(':gzip"')
+        assert not_modified.status_code == 304
+
+    def test_modified(self, client, teacher_user) -> None:
+        # Test that a write changes the tag, and that the tag depends on the query string
+        response = client.get("/modules/list")
+        Module.create(title="Algebra", description="", teacher_id=teacher_user.id)
+
+        modified = client.get("/modules/list", headers={"If-None-Match": response.headers["ETag"]})
+        other_page = client.get("/modules/list?limit=1", headers={"If-None-Match": modified.headers["ETag"]})
+
+        assert modified.status_code == 200
+        assert modified.headers["ETag"] != response.headers["ETag"]
+        assert other_page.status_code == 200
+
+    def test_errors_are_not_tagged(self, client, teacher_user) -> None:
+        # Test that error responses carry no tag
+        response = client.get("/modules/list?limit=0")
+
+        assert response.status_code == 400
+        assert "ETag" not in response.headers
+
+    def test_per_user_without_a_current_user(self, app, db) -> None:
+        # Test that a per-user view passed no user, as admin routes are in hacker mode, is still tagged
+        view = conditional("grades", per_user=True)(lambda current_user: [])
+
+        with app.test_request_context("/grades/view"):
+            response = view(current_user=None)
+
+        assert response.status_code == 200
+        assert response.headers["ETag"].startswith('W/"')
@@ -0,0 +1,205 @@
+from datetime import date
+
+import pytest
+
+from sqlalchemy import text
+
+from lms.adapters import query_tracker
+from lms.adapters.database import _statements, copy_rows
+from lms.domains import Assignment, User
+from tests.factories import AssignmentFactory, StudentFactory, UserFactory
+
+
+@pytest.mark.usefixtures("wipe_users_table")
+class TestBaseMixin:
+    def test_find_by_reuses_the_statement(self) -> None:
+        # Test that find_by builds one statement per model and attribute set
+        user = UserFactory.create()
+        another_user = UserFactory.create()
+
+        assert User.find_by(email=user.email).id == user.id
+        statement = _statements.get((User, "find_by", (("email", False),)))
+        assert User.find_by(email=another_user.email).id == another_user.id
+        assert _statements.get((User, "find_by", (("email", False),))) is statement
+
+    def test_find_by_with_none(self) -> None:
+        # Test that None values compile to IS NULL
+        user = StudentFactory.create(auth_token=None)
+
+        assert User.find_by(auth_token=None, username=user.username).id == user.id
+        assert User.find_by(username="unknown") is None
+
+    def test_get_uses_the_identity_map(self, db) -> None:
+        # Test that get skips the database for objects already in the session
+        user = UserFactory.create()
+        User.get(user.id)
+
+        with query_tracker.capture() as statements:
+            assert User.get(user.id) is user
+
+        assert statements == []
+
+    def test_find_all_with_operators_ordering_and_limit(self) -> None:
+        # Test operator-suffixed filters together with ordering and limits
+        users = [UserFactory.create(username=f"user {index}") for index in range(4)]
+        ids = [user.id for user in users]
+
+        assert [user.id for user in User.find_all(id__in=ids, order_by="-id")] == ids[::-1]
+        assert [user.id for user in User.find_all(id__gte=ids[1], id__lt=ids[3])] == ids[1:3]
+        assert [user.id for user in User.find_all(username__ilike="USER%", limit=2)] == ids[:2]
+        assert User.find_all(id__in=ids, id__ne=ids[0], limit=10) == users[1:]
+
+    @pytest.mark.parametrize("value", [None, 1, "1,2"])
+    def test_find_all_rejects_in_filters_without_a_collection(self, value) -> None:
+        # Test that an `__in` filter given a single value is rejected with a clear error
+        with pytest.raises(ValueError, match="Invalid value for id__in"):
+            User.find_all(id__in=value)
+
+    def test_exists(self) -> None:
+        # Test that exists compiles to a `SELECT 1 ... LIMIT 1` query
+        email = UserFactory.create().email
+
+        with query_tracker.capture() as statements:
+            assert User.exists(email=email)
+            assert not User.exists(email="unknown@example.com")
+
+        assert statements[0].startswith("SELECT 1")
+        assert "LIMIT" in statements[0]
+
+    def test_count(self) -> None:
+        # Test counting the records matching the filters
+        StudentFactory.create()
+        StudentFactory.create()
+        UserFactory.create()
+
+        assert User.count() == 3
+        assert User.count(role_id__in=[2, 3]) == 2
+
+    def test_get_many(self) -> None:
+        # Test fetching several records in one query, in the order requested
+        user_ids = [UserFactory.create().id for _ in range(3)]
+
+        with query_tracker.capture() as statements:
+            fetched = User.get_many([user_ids[2], 987654321, user_ids[0]])
+
+        assert [user.id for user in fetched] == [user_ids[2], user_ids[0]]
+        assert len(statements) == 1
+        assert User.get_many([]) == []
+
+    def test_paginate_walks_every_page(self) -> None:
+        # Test that following the cursors returns every matching record exactly once, in order
+        ids = [StudentFactory.create().id for _ in range(5)]
+        UserFactory.create()
+
+        page = User.paginate(limit=2, role_id=3)
+        seen = [user.id for user in page.records]
+        while page.next_cursor:
+            page = User.paginate(after=page.next_cursor, limit=2, role_id=3)
+            seen += [user.id for user in page.records]
+
+        assert seen == ids
+        assert User.paginate(limit=5, role_id=3).next_cursor is None
+
+    def test_paginate_descending(self) -> None:
+        # Test paginating from the newest record backwards
+        ids = [UserFactory.create().id for _ in range(3)]
+
+        first = User.paginate(limit=2, order_by="-id")
+        second = User.paginate(after=first.next_cursor, limit=2, order_by="-id")
+
+        assert [user.id for user in first.records + second.records] == ids[::-1]
+        assert second.next_cursor is None
+
+    def test_views_select_only_their_columns(self) -> None:
+        # Test that querying a view returns rows of its columns without loading the other ones
+        ids = [StudentFactory.create().id for _ in range(3)]
+
+        with query_tracker.capture() as statements:
+            rows = User.find_all(view="student", role_id=3)
+            page = User.paginate(limit=2, order_by="-id", view="student")
+
+        assert [row._asdict() for row in rows][0].keys() == {"id", "first_name", "last_name"}
+        assert [row.id for row in rows] == ids
+        assert [row.id for row in page.records] == ids[:0:-1]
+        assert User.paginate(after=page.next_cursor, limit=2, order_by="-id", view="student").records[0].id == ids[0]
+        assert all("password" not in statement and "auth_token" not in statement for statement in statements)
+
+    def test_views_include_the_sort_key(self) -> None:
+        # Test that paginating a view on a column outside of it still selects the sort key for the cursor
+        users = [UserFactory.create(username=f"user {index}") for index in (2, 1)]
+
+        page = User.paginate(limit=1, order_by="username", view="student")
+
+        assert page.records[0]._fields == ("id", "first_name", "last_name", "username")
+        assert page.records[0].id == users[1].id
+        assert User.paginate(after=page.next_cursor, limit=1, order_by="username").records[0].id == users[0].id
+
+    def test_serialize_views(self) -> None:
+        # Test that the compiled serializers convert rows of a view, and entities, to dictionaries of its columns
+        user = UserFactory.create(username="user 1")
+
+        page = User.paginate(limit=1, order_by="username", view="student")
+
+        assert User.serialize(page.records, view="student") == [
+            {"id": user.id, "first_name": user.first_name, "last_name": user.last_name}
+        ]
+        assert user.to_dict(view="detail") == {
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "email": user.email,
+            "username": "user 1",
+            "role_id": user.role_id,
+        }
+        assert User.__serializers__[("student", True)].__code__.co_filename == "<serializer id, first_name, last_name>"
+
+    def test_field_sets(self) -> None:
+        # Test that a field set is selected like a view, and that its serializer is compiled once
+        user = UserFactory.create()
+        user_id = user.id
+
+        with query_tracker.capture() as statements:
+            row = User.find_by(view=("id", "email"), id=user_id)
+            page = User.paginate(limit=1, order_by="-id", view=("email",))
+
+        assert User.serializer(("id", "email"))(row) == {"id": user.id, "email": user.email}
+        assert User.serializer(("id", "email")) is User.serializer(("id", "email"))
+        assert User.serialize(page.records, view=("email",)) == [{"email": user.email}]
+        assert statements[0].startswith("SELECT users.id, users.email \nFROM users")
+        with pytest.raises(ValueError):
+            User.find_by(view=("id", "password"), id=user.id)
+
+    def test_paginate_invalid_cursor(self) -> None:
+        # Test that malformed cursors are rejected
+        with pytest.raises(ValueError):
+            User.paginate(after="not a cursor")
+        with pytest.raises(ValueError):
+            User.paginate(after="WyJhIl0")
+
+
+@pytest.mark.usefixtures("wipe_assignments_table")
+@pytest.mark.parametrize(
+    "order_by, view, order", [("due_date", None, (2, 4, 0, 1, 3)), ("-due_date", "list", (0, 4, 2, 3, 1))]
+)
+def test_paginate_on_a_nullable_sort_key(order_by, view, order) -> None:
+    # Test paginating on a nullable column, with the NULL values sorted last in either direction
+    due_dates = [date(2030, 1, 3), None, date(2030, 1, 1), None, date(2030, 1, 1)]
+    assignments = [AssignmentFactory.create(due_date=due_date) for due_date in due_dates]
+    expected = [assignments[index].id for index in order]
+
+    seen, cursor = [], None
+    while True:
+        page = Assignment.paginate(after=cursor, limit=2, order_by=order_by, view=view)
+        seen += [assignment.id for assignment in page.records]
+        if not (cursor := page.next_cursor):
+            break
+
+    assert seen == expected
+
+
+def test_copy_rows(db) -> None:
+    # Test streaming rows into a table with COPY, escaping special characters and NULL values
+    db.session.execute(text("CREATE TEMPORARY TABLE copied (id integer, label text, score float) ON COMMIT DROP"))
+    rows = [(1, "plain", 1.5), (2, "tab\tnew\nline\\slash", None), (3, None, -2.0)]
+
+    assert copy_rows("copied", ("id", "label", "score"), iter(rows * 2000)) == 6000
+    assert db.session.execute(text("SELECT DISTINCT * FROM copied ORDER BY id")).all() == rows
@@ -0,0 +1,50 @@
+from collections import namedtuple
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import jsonify
+
+from lms.domains.user.user_model import UserRole
+
+
+class TestOrjsonProvider:
+    def test_dumps(self, app) -> None:
+        # Test that dates, datetimes, decimals, enums, named tuples and dataclasses are encoded, keeping key order
+        Point = namedtuple("Point", "x y")
+
+        @dataclass
+        class Score:
+            value: float
+
+        data = {
+            "z": date(2024, 5, 1),
+            "a": datetime(2024, 5, 1, 12, 30),
+            1: Decimal("0.10"),
+            "role": UserRole.TEACHER,
+            "point": Point(1, 2),
+            "score": Score(9.5),
+        }
+
+        assert app.json.dumps(data) == (
+            '{"z":"2024-05-01","a":"2024-05-01T12:30:00","1":"0.10","role":2,"point":[1,2],"score":{"value":9.5}}'
+        )
+
+    def test_loads(self, app) -> None:
+        # Test that JSON is decoded from strings and bytes
+        assert app.json.loads('{"a": [1, 2.5, null]}') == {"a": [1, 2.5, None]}
+        assert app.json.loads(b"[true]") == [True]
+
+    def test_jsonify(self, app) -> None:
+        # Test that jsonify encodes the body once, with a trailing newline
+        with app.test_request_context():
+            response = jsonify(message="ok")
+
+        assert response.mimetype == "application/json"
+        assert response.data == b'{"message":"ok"}\n'
+
+    def test_invalid_request_body(self, client, teacher_user) -> None:
+        # Test that a request body that is not valid JSON is rejected with a 400 Bad Request
+        response = client.post("/modules/create", data="{not json", content_type="application/json")
+
+        assert response.status_code == 400
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from flask import Flask
+
+from lms.adapters import PasswordPool, PoolSaturated
+from lms.adapters.password_pool import calibrate_rounds, hash_rounds
+
+
+@pytest.fixture
+def pool() -> PasswordPool:
+    # Create a pool with a single worker and no queue
+    app = Flask(__name__)
+    app.config.update(PASSWORD_POOL_WORKERS=1, PASSWORD_POOL_QUEUE=0, PASSWORD_BATCH_WORKERS=2)
+    return PasswordPool(app)
+
+
+class TestPasswordPool:
+    def test_hash_and_check(self, pool) -> None:
+        # Test hashing a password and checking it on the pool
+        hashed = pool.hash("secret", rounds=4)
+
+        assert hashed.startswith("$2b$04$")
+        assert pool.check("secret", hashed)
+        assert not pool.check("invalid", hashed)
+        assert pool.stats()["completed"] == 3
+        assert pool.stats()["run_ms_p99"] is not None
+
+    def test_saturated_pool_rejects_work(self, pool) -> None:
+        # Test that work beyond the worker and queue limits is rejected straight away
+        started, release = threading.Event(), threading.Event()
+
+        def block() -> None:
+            started.set()
+            release.wait()
+
+        worker = threading.Thread(target=pool._run, args=(block,))
+        worker.start()
+        started.wait()
+
+        with pytest.raises(PoolSaturated):
+            pool.hash("secret", rounds=4)
+
+        release.set()
+        worker.join()
+
+        assert pool.stats()["rejected"] == 1
+        assert pool.stats()["in_flight"] == 0
+
+    def test_hash_many(self, pool) -> None:
+        # Test hashing a batch of passwords, each with its own salt, in order
+        hashes = pool.hash_many(["first", "second", "first"], rounds=4)
+
+        assert [pool.check(password, hashed) for password, hashed in zip(["first", "second", "first"], hashes)] == [
+            True,
+            True,
+            True,
+        ]
+        assert hashes[0] != hashes[2]
+
+    def test_concurrent_batch_is_rejected(self, pool) -> None:
+        # Test that a batch is shed while another one is being hashed
+        pool._batch_slot.acquire()
+        try:
+            with pytest.raises(PoolSaturated):
+                pool.hash_many(["secret"], rounds=4)
+        finally:
+            pool._batch_slot.release()
+
+        assert pool.stats()["rejected"] == 1
+        assert len(pool.hash_many(["secret"], rounds=4)) == 1
+
+    def test_needs_rehash(self, pool) -> None:
+        # Test detecting hashes made with a work factor other than the configured one
+        pool.rounds = 4
+
+        assert hash_rounds("$2b$12$nWgf5G0gVy.gTz2vK2IPSe.PeCHr2yRZPybuLY19ZOC9qlavSVi7y") == 12
+        assert pool.needs_rehash("$2b$12$nWgf5G0gVy.gTz2vK2IPSe.PeCHr2yRZPybuLY19ZOC9qlavSVi7y")
+        assert not pool.needs_rehash(pool.hash("secret"))
+
+    def test_calibrate_rounds(self) -> None:
+        # Test that calibration stops at the first work factor over budget
+        rounds, timings = calibrate_rounds(target_ms=0.0, min_rounds=4, max_rounds=6, samples=1)
+
+        assert rounds == 4
+        assert list(timings) == [4]
+
+    def test_calibrate_bcrypt_command(self, app) -> None:
+        # Test the calibration CLI command
+        result = app.test_cli_runner().invoke(args=["calibrate-bcrypt", "--min-rounds", "4", "--max-rounds", "5"])
+
+        assert result.exit_code == 0
+        assert "rounds= 4" in result.output
+        assert "BCRYPT_ROUNDS=" in result.output
+
+    def test_pool_requires_init_app(self) -> None:
+        # Test that an uninitialised pool refuses work
+        with pytest.raises(RuntimeError):
+            PasswordPool().hash("secret", rounds=4)
+        with pytest.raises(RuntimeError):
+            PasswordPool().hash_many(["secret"], rounds=4)
@@ -0,0 +1,71 @@
+import pytest
+
+from lms.adapters import PrefixIndex
+
+
+@pytest.fixture
+def index() -> PrefixIndex:
+    index = PrefixIndex(order=lambda record: record, length=16)
+    index.load(
+        [
+            (1, "jdoe john doe jdoe", "jdoe"),
+            (2, "asmith anna smith anna.smith", "asmith"),
+            (3, "jsmith jane smith-jones jane", "jsmith"),
+        ]
+    )
+    return index
+
+
+class TestPrefixIndex:
+    def test_search_matches_the_start_of_every_word(self, index) -> None:
+        # Test that a prefix matches the start of any word, or of several words, but not the middle of a word
+        assert index.search("smith", 10) == ["asmith", "jsmith"]
+        assert index.search("j", 10) == ["jdoe", "jsmith"]
+        assert index.search("john d", 10) == ["jdoe"]
+        assert index.search("mith", 10) == []
+        assert index.search("jones", 10) == []
+
+    def test_search_orders_filters_and_limits(self, index) -> None:
+        # Test that matches are returned in order, filtered by `where` and limited, each record appearing once
+        assert index.search("j", 1) == ["jdoe"]
+        assert index.search("j", 10, where=lambda record: record != "jdoe") == ["jsmith"]
+        assert index.search("jdoe", 10) == ["jdoe"]
+
+    @pytest.mark.parametrize("where", [None, lambda record: record % 7 == 0, lambda record: record == 4])
+    def test_search_walks_records_in_order_when_most_match(self, where) -> None:
+        # Test that prefixes matching most records, whether walked in order or sorted, return the same records
+        index = PrefixIndex(order=lambda record: -record)
+        index.load((id, f"user{id} {'common' if id % 5 else 'rare'}", id) for id in range(1, 1001))
+
+        expected = [id for id in range(1000, 0, -1) if id % 5 and (where is None or where(id))][:10]
+
+        assert index.search("com", 10, where=where) == expected
+        assert index.search("rare", 3) == [1000, 995, 990]
+
+    def test_add_replaces_and_remove_deletes(self, index) -> None:
+        # Test that indexing a record again replaces its words and position, and that removed records are no longer
+        # found
+        index.add(1, "jdoe johnny doe-ray", "zjohnny")
+        index.remove(2)
+        index.remove(4)
+
+        assert index.search("john", 10) == ["zjohnny"]
+        assert index.search("johnny d", 10) == ["zjohnny"]
+        assert index.search("j", 10) == ["jsmith", "zjohnny"]
+        assert index.search("smith", 10) == ["jsmith"]
+        assert index.search("anna", 10) == []
+
+    def test_words_are_truncated(self, index) -> None:
+        # Test that prefixes up to the length of the keys match words longer than it
+        index.add(4, "abcdefghijklmnopqrstuvwxyz", "alphabet")
+
+        assert index.search("abcdefghijklmnop", 10) == ["alphabet"]
+
+    def test_clear(self, index) -> None:
+        # Test that clearing the index drops every record until it is loaded again
+        assert index.loaded
+
+        index.clear()
+
+        assert not index.loaded
+        assert index.search("j", 10) == []
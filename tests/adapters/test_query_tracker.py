@@ -0,0 +1,123 @@
+import pytest
+
+from lms.adapters import query_tracker
+from lms.domains.module.module_model import module_list_cache
+from tests.factories import AssignmentFactory, GradeFactory, StudentFactory
+
+
+@pytest.mark.usefixtures("wipe_modules_table")
+class TestQueryTracker:
+    def test_server_timing_header(self, client, teacher_user) -> None:
+        # Test that each response reports its query count and database time
+        response = client.get("/modules/list")
+
+        assert response.status_code == 200
+        assert response.headers["Server-Timing"].startswith("db;dur=")
+        assert response.headers["Server-Timing"].endswith('desc="3 queries"')
+
+    def test_aggregates_per_endpoint(self, client, teacher_user) -> None:
+        # Test that the statements are totalled per endpoint; the second request is served from the caches after
+        # reading the version of the modules table
+        query_tracker.reset()
+        client.get("/modules/list")
+        client.get("/modules/list")
+
+        stats = query_tracker.stats()["module_domain.list_available_modules"]
+
+        assert stats["requests"] == 2
+        assert stats["queries"] == 4
+        assert stats["max_queries"] == 3
+        assert stats["n_plus_one_requests"] == 0
+
+    @pytest.mark.usefixtures("wipe_grades_table")
+    def test_counts_statements_of_streamed_responses(self, client, teacher_user) -> None:
+        # Test that the statements run while a response streams, after the request hooks, are counted once the
+        # response is closed
+        assignment = AssignmentFactory.create()
+        GradeFactory.create(student_id=StudentFactory.create().id, assignment_id=assignment.id)
+        query_tracker.reset()
+
+        response = client.get(f"/grades/export?assignment_id={assignment.id}")
+        lines = response.data.decode().splitlines()
+        response.close()
+
+        stats = query_tracker.stats()["grade_domain.export_grades"]
+
+        assert len(lines) == 2
+        assert "Server-Timing" not in response.headers
+        assert stats["requests"] == 1
+        assert stats["queries"] == 2
+
+    def test_flags_repeated_statements(self, client, teacher_user, monkeypatch) -> None:
+        # Test that a statement repeated within one request is reported as an N+1 candidate
+        query_tracker.reset()
+        client.get("/modules/list")
+        assert query_tracker.stats()["module_domain.list_available_modules"]["n_plus_one_requests"] == 0
+
+        monkeypatch.setattr(query_tracker, "n_plus_one_threshold", 1)
+        module_list_cache.clear()
+        client.get("/modules/list")
+        stats = query_tracker.stats()["module_domain.list_available_modules"]
+
+        assert stats["n_plus_one_requests"] == 1
+        assert any(
+            repeated["statement"].startswith("SELECT modules.id, modules.title")
+            for repeated in stats["repeated_statements"]
+        )
+
+    def test_slow_query_log_and_plans(self, app, client, teacher_user, monkeypatch, tmp_path) -> None:
+        # Test that statements over the threshold are reported and their sampled plans written to the plan log
+        query_tracker.reset()
+        monkeypatch.setattr(query_tracker, "slow_query_ms", 0.0)
+        monkeypatch.setattr(query_tracker, "explain_sample_rate", 1.0)
+        query_tracker.open_plan_log(str(tmp_path / "plans.log"))
+
+        try:
+            response = client.get("/modules/list?limit=5")
+        finally:
+            query_tracker.open_plan_log(app.config["QUERY_PLAN_LOG_PATH"])
+
+        offenders = {offender["statement"]: offender for offender in query_tracker.slow_queries()}
+        page_query = next(offender for statement, offender in offenders.items() if "FROM modules" in statement)
+        plans = (tmp_path / "plans.log").read_text()
+
+        assert response.status_code == 200
+        assert page_query["calls"] == 1
+        assert page_query["parameters"] == {"limit": "int"}
+        assert page_query["endpoints"] == ["module_domain.list_available_modules"]
+        assert page_query["plans_captured"] == 1
+        assert "Execution Time" in plans
+        assert "FROM modules" in plans
+
+    def test_plans_leave_out_bound_values(self, app, client, teacher_user, monkeypatch, tmp_path) -> None:
+        # Test that plans are generic, so that the bearer token looked up by the authorisation query never reaches
+        # the plan log
+        monkeypatch.setattr(query_tracker, "slow_query_ms", 0.0)
+        monkeypatch.setattr(query_tracker, "explain_sample_rate", 1.0)
+        query_tracker.open_plan_log(str(tmp_path / "plans.log"))
+
+        try:
+            response = client.get("/modules/list")
+        finally:
+            query_tracker.open_plan_log(app.config["QUERY_PLAN_LOG_PATH"])
+
+        plans = (tmp_path / "plans.log").read_text()
+
+        assert response.status_code == 200
+        assert "token_user.auth_token = %(access_token)s" in plans
+        assert "(auth_token)::text = $3" in plans
+        assert teacher_user.auth_token not in plans
+
+    def test_slow_query_threshold(self, client, teacher_user) -> None:
+        # Test that fast statements are not reported
+        query_tracker.reset()
+        client.get("/modules/list")
+
+        assert query_tracker.slow_queries() == []
+
+    def test_capture_outside_requests(self, db) -> None:
+        # Test that statements are captured without a request
+        with query_tracker.capture() as statements:
+            db.session.execute(db.select(db.literal(1)))
+
+        assert len(statements) == 1
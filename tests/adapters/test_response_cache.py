@@ -0,0 +1,86 @@
+import pytest
+
+from sqlalchemy import text
+
+from lms.adapters import cached
+from lms.domains import Module
+from lms.domains.module.module_model import module_list_cache
+from tests.factories import ModuleFactory
+
+
+@pytest.mark.usefixtures("wipe_modules_table")
+class TestResponseCache:
+    def test_hit_is_served_compressed(self, app, client, teacher_user, monkeypatch, query_budget) -> None:
+        # Test that a hit returns the stored compressed body, reading only the version it is keyed by, without
+        # compressing again
+        ModuleFactory.create_batch(20)
+        response = client.get("/modules/list", headers={"Accept-Encoding": "gzip"})
+        hits = module_list_cache.stats()["hits"]
+
+        def compress(*args) -> None:
+            raise AssertionError("The cached body was compressed again")
+
+        monkeypatch.setattr(app.extensions["compress"], "compress", compress)
+        with query_budget(1):
+            cached = client.get("/modules/list", headers={"Accept-Encoding": "gzip"})
+
+        assert cached.headers["Content-Encoding"] == "gzip"
+        assert cached.data == response.data
+        assert cached.headers["ETag"] == response.headers["ETag"]
+        assert module_list_cache.stats()["hits"] == hits + 1
+
+    def test_hit_is_not_modified(self, client, teacher_user, query_budget) -> None:
+        # Test that a hit naming the stored tag gets a 304 Not Modified response
+        response = client.get("/modules/list")
+
+        with query_budget(1):
+            not_modified = client.get("/modules/list", headers={"If-None-Match": response.headers["ETag"]})
+
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == response.headers["ETag"]
+
+    def test_keyed_by_arguments_and_encoding(self, client, teacher_user) -> None:
+        # Test that pages and encodings are stored apart
+        ModuleFactory.create_batch(20)
+        client.get("/modules/list", headers={"Accept-Encoding": "gzip"})
+        page = client.get("/modules/list?limit=1", headers={"Accept-Encoding": "gzip"})
+        identity = client.get("/modules/list", headers={"Accept-Encoding": "identity"})
+
+        assert len(page.json) == 1
+        assert "Content-Encoding" not in identity.headers
+        assert len(identity.json) == 20
+        assert module_list_cache.stats()["size"] == 3
+
+    def test_invalidated_by_writes(self, client, db, teacher_user) -> None:
+        # Test that the stored lists are no longer served once a module is created, or updated bypassing the model as
+        # another worker's write would
+        client.get("/modules/list")
+        module = Module.create(title="Algebra", description="", teacher_id=teacher_user.id)
+        hits = module_list_cache.stats()["hits"]
+
+        created = client.get("/modules/list")
+        db.session.execute(text("UPDATE modules SET title = 'Geometry' WHERE id = :id"), {"id": module.id})
+        db.session.commit()
+        updated = client.get("/modules/list")
+
+        assert [module["title"] for module in created.json] == ["Algebra"]
+        assert [module["title"] for module in updated.json] == ["Geometry"]
+        assert module_list_cache.stats()["hits"] == hits
+
+    def test_errors_are_not_stored(self, client, teacher_user) -> None:
+        # Test that error responses are not cached
+        client.get("/modules/list?limit=0")
+
+        assert module_list_cache.stats()["size"] == 0
+
+    def test_without_a_current_user(self, app) -> None:
+        # Test that a view passed no user, as admin routes are in hacker mode, is still served and stored
+        view = cached(module_list_cache, "modules")(lambda current_user: [])
+
+        with app.test_request_context("/modules/list"):
+            response = view(current_user=None)
+            hits = module_list_cache.stats()["hits"]
+            hit = view(current_user=None)
+
+        assert response.status_code == hit.status_code == 200
+        assert module_list_cache.stats()["hits"] == hits + 1
@@ -0,0 +1,54 @@
+import pytest
+
+from lms.adapters import SqliteSearch
+
+
+@pytest.fixture
+def documents() -> SqliteSearch:
+    documents = SqliteSearch()
+    documents.add_many(
+        "module",
+        [
+            (1, "Organic chemistry", "Reactions of carbon compounds"),
+            (2, "Physics", "Mechanics and organic electronics"),
+        ],
+    )
+    documents.add_many("assignment", [(1, "Lab report", "Write up the titration experiments")])
+    return documents
+
+
+class TestSqliteSearch:
+    def test_search_ranks_titles_first(self, documents) -> None:
+        # Test that a match in the title ranks above a match in the description
+        hits = documents.search("organic", kinds=("module", "assignment"))
+
+        assert [(hit.kind, hit.id, hit.title) for hit in hits] == [
+            ("module", 1, "Organic chemistry"),
+            ("module", 2, "Physics"),
+        ]
+        assert hits[0].rank > hits[1].rank > 0
+
+    def test_search_stems_and_requires_every_word(self, documents) -> None:
+        # Test that words match their inflections, and that every word of the query must match
+        assert [hit.id for hit in documents.search("experiment", kinds=("assignment",))] == [1]
+        assert [hit.id for hit in documents.search("carbon reaction", kinds=("module",))] == [1]
+        assert documents.search("carbon mechanics", kinds=("module",)) == []
+
+    def test_search_only_the_requested_kinds(self, documents) -> None:
+        # Test that records of other kinds are left out, and that the number of results is limited
+        assert documents.search("lab", kinds=("module",)) == []
+        assert len(documents.search("organic", kinds=("module",), limit=1)) == 1
+        assert documents.search("organic", kinds=()) == []
+
+    @pytest.mark.parametrize(
+        "query, ids",
+        [('"', []), ("organic*", [1, 2]), ("NEAR(organic", []), ("description: carbon", []), ("   ", []), ("(-)", [])],
+    )
+    def test_search_ignores_query_syntax(self, documents, query, ids) -> None:
+        # Test that FTS5 operators in a query are matched as words rather than interpreted
+        assert [hit.id for hit in documents.search(query, kinds=("module",))] == ids
+
+    def test_invalid_kind(self, documents) -> None:
+        # Test that kinds are checked before being used as table names
+        with pytest.raises(ValueError):
+            documents.add_many("module; DROP TABLE x", [(1, "Title", "")])
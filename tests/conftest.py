@@ -1,21 +1,18 @@
-import os
-
-from typing import Generator
+from contextlib import contextmanager
+from typing import Callable, Generator
 
 import pytest
 
 from flask import Flask
 from sqlalchemy import text
 
+from lms.adapters import clear_caches
 from lms.adapters import db as _db
+from lms.adapters import query_tracker
 from lms.app import app as _app
-from lms.common import HERE
 from lms.domains import FeatureSwitch
 from tests.factories import StudentFactory, TeacherFactory, UserFactory
 
-# Define the path to the authentication token file.
-AUTH_TOKEN_PATH = f"{HERE}/../.auth"
-
 
 # Create a fixture for the Flask application.
 @pytest.fixture
@@ -25,6 +22,39 @@ def app(request) -> Generator:
         yield app
 
 
+# Create a fixture writing the plans of slow queries to a temporary file rather than the checkout.
+@pytest.fixture(scope="session", autouse=True)
+def query_plan_log(tmp_path_factory) -> Generator:
+    path = str(tmp_path_factory.mktemp("logs") / "query_plans.log")
+    _app.config["QUERY_PLAN_LOG_PATH"] = path
+    query_tracker.open_plan_log(path)
+    yield path
+    query_tracker.open_plan_log(None)
+
+
+# Create a fixture dropping in-process caches, since tables are truncated behind the models' backs.
+@pytest.fixture(autouse=True)
+def empty_caches() -> Generator:
+    clear_caches()
+    yield
+    clear_caches()
+
+
+# Create a fixture asserting a query budget: `with query_budget(2): client.get(...)` fails the test
+# when the block runs more SQL statements than allowed, listing the statements it ran.
+@pytest.fixture
+def query_budget() -> Callable:
+    @contextmanager
+    def budget(limit: int) -> Generator:
+        with query_tracker.capture() as statements:
+            yield statements
+        assert len(statements) <= limit, f"{len(statements)} queries over a budget of {limit}:\n" + "\n".join(
+            statements
+        )
+
+    return budget
+
+
 # Create a fixture for the Flask test client.
 @pytest.fixture()
 def client(app) -> Flask:
@@ -95,28 +125,28 @@ def wipe_feature_switch_table(db) -> Generator:
 
 # Create a fixture for the admin user.
 @pytest.fixture
-def admin_user(db) -> Generator:
-    # Create an admin user and update the authentication token.
+def admin_user(db, client) -> Generator:
+    # Create an admin user and authenticate the client with their token.
     admin_user = UserFactory.create()
-    update_token(admin_user.auth_token)
+    authenticate(client, admin_user.auth_token)
     yield admin_user
 
 
 # Create a fixture for the teacher user.
 @pytest.fixture
-def teacher_user(db) -> Generator:
-    # Create a teacher user and update the authentication token.
+def teacher_user(db, client) -> Generator:
+    # Create a teacher user and authenticate the client with their token.
     teacher_user = TeacherFactory.create()
-    update_token(teacher_user.auth_token)
+    authenticate(client, teacher_user.auth_token)
     yield teacher_user
 
 
 # Create a fixture for the student user.
 @pytest.fixture
-def student_user(db) -> Generator:
-    # Create a student user and update the authentication token.
+def student_user(db, client) -> Generator:
+    # Create a student user and authenticate the client with their token.
     student_user = StudentFactory.create()
-    update_token(student_user.auth_token)
+    authenticate(client, student_user.auth_token)
     yield student_user
 
 
@@ -151,10 +181,6 @@ def toggle_hacker_mode(db) -> Generator:
     db.session.commit()
 
 
-# Update the authentication token.
-def update_token(token) -> None:
-    if os.path.exists(AUTH_TOKEN_PATH):
-        os.remove(AUTH_TOKEN_PATH)
-
-    with open(AUTH_TOKEN_PATH, "w") as file:
-        file.write(token)
+# Send the given bearer token with every request made by the test client.
+def authenticate(client, token) -> None:
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
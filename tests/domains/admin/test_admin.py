@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from lms.adapters import query_tracker
+
+
+@pytest.mark.usefixtures("wipe_users_table")
+class TestAdmin:
+    def test_metrics(self, client, admin_user) -> None:
+        # Test that the metrics endpoint reports the principal cache counters
+        before = json.loads(client.get("/admin/metrics").data)
+        response = client.get("/admin/metrics")
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        assert data["caches"]["principals"]["hits"] == before["caches"]["principals"]["hits"] + 1
+        assert data["caches"]["principals"]["size"] == 1
+
+    def test_metrics_as_a_teacher(self, client, teacher_user) -> None:
+        # Test that the metrics endpoint is restricted to admin users
+        response = client.get("/admin/metrics")
+
+        assert response.status_code == 401
+
+    def test_queries(self, client, admin_user) -> None:
+        # Test that the queries endpoint reports the statements run per endpoint
+        query_tracker.reset()
+        client.get("/users/list")
+        response = client.get("/admin/queries")
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        assert data["user_domain.get_all_users"]["requests"] == 1
+        assert data["user_domain.get_all_users"]["queries"] == 3
+        assert data["user_domain.get_all_users"]["n_plus_one_requests"] == 0
+
+    def test_queries_as_a_teacher(self, client, teacher_user) -> None:
+        # Test that the queries endpoint is restricted to admin users
+        response = client.get("/admin/queries")
+
+        assert response.status_code == 401
+
+    def test_slow_queries(self, client, admin_user, monkeypatch) -> None:
+        # Test that the slow queries endpoint lists the statements over the threshold
+        query_tracker.reset()
+        monkeypatch.setattr(query_tracker, "slow_query_ms", 0.0)
+        client.get("/users/list")
+        monkeypatch.setattr(query_tracker, "slow_query_ms", 1_000_000.0)
+        response = client.get("/admin/slow_queries")
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        assert len(data) == 3
+        assert data[0]["total_ms"] >= data[1]["total_ms"]
+        assert all(offender["endpoints"] == ["user_domain.get_all_users"] for offender in data)
@@ -1,8 +1,11 @@
 import json
 
+from datetime import date
+
 import pytest
 
-from tests.factories import AssignmentFactory, ModuleFactory
+from lms.domains import Assignment
+from tests.factories import AssignmentFactory, GradeFactory, ModuleFactory, StudentFactory
 
 
 @pytest.mark.usefixtures("wipe_assignments_table")
@@ -80,6 +83,92 @@ class TestAssignment:
         assert "id" in data[0]
         assert "title" in data[0]
 
+    def test_list_assignments_query_budget(self, client, teacher_user, query_budget) -> None:
+        # Test that listing assignments runs one authorisation query, one version query and one page query
+        AssignmentFactory.create_batch(3)
+
+        with query_budget(3):
+            response = client.get("/assignments/list")
+
+        assert response.status_code == 200
+
+    def test_list_assignments_not_modified(self, client, teacher_user) -> None:
+        # Test that the list is answered with 304 Not Modified until an assignment is written
+        AssignmentFactory.create()
+        response = client.get("/assignments/list")
+        not_modified = client.get("/assignments/list", headers={"If-None-Match": response.headers["ETag"]})
+        Assignment.create(title="Essay", description="", module_id=ModuleFactory.create().id, due_date=None)
+        modified = client.get("/assignments/list", headers={"If-None-Match": response.headers["ETag"]})
+
+        assert not_modified.status_code == 304
+        assert modified.status_code == 200
+        assert len(modified.json) == len(response.json) + 1
+
+    def test_list_assignments_from_cache(self, client, teacher_user, query_budget) -> None:
+        # Test that a repeated list is served from the response cache, reading only the version it is keyed by, until
+        # an assignment is created
+        module = ModuleFactory.create()
+        Assignment.create(title="Essay", description="", module_id=module.id, due_date=None)
+        response = client.get("/assignments/list")
+
+        with query_budget(1):
+            cached = client.get("/assignments/list")
+        Assignment.create(title="Report", description="", module_id=module.id, due_date=None)
+        refreshed = client.get("/assignments/list")
+
+        assert cached.status_code == 200
+        assert cached.json == response.json
+        assert cached.headers["ETag"] == response.headers["ETag"]
+        assert [assignment["title"] for assignment in refreshed.json] == ["Essay", "Report"]
+
+    def test_list_assignments_filtered_and_sorted(self, client, teacher_user) -> None:
+        # Test listing the assignments of a module due after a date, in due-date order, one page at a time
+        module = ModuleFactory.create()
+        due_dates = [date(2030, 1, 9), date(2030, 1, 2), None, date(2030, 1, 5), date(2029, 12, 1)]
+        assignments = [AssignmentFactory.create(module_id=module.id, due_date=due_date) for due_date in due_dates]
+        AssignmentFactory.create(due_date=date(2030, 1, 3))
+
+        query = f"module_id={module.id}&due_date__gt=2030-01-01&sort=due_date&fields=id,due_date"
+        response = client.get(f"/assignments/list?{query}&limit=2")
+        next_response = client.get(response.headers["Link"].split(";")[0].strip("<>"))
+        nulls_last = client.get(f"/assignments/list?module_id={module.id}&sort=due_date&fields=id")
+
+        assert response.json == [
+            {"id": assignments[1].id, "due_date": "2030-01-02"},
+            {"id": assignments[3].id, "due_date": "2030-01-05"},
+        ]
+        assert next_response.json == [{"id": assignments[0].id, "due_date": "2030-01-09"}]
+        assert [row["id"] for row in nulls_last.json] == [assignments[index].id for index in (4, 1, 3, 0, 2)]
+
+    def test_list_assignments_of_several_modules(self, client, teacher_user) -> None:
+        # Test that `__in` filters take comma-separated values
+        assignments = AssignmentFactory.create_batch(3)
+
+        response = client.get(f"/assignments/list?module_id__in={assignments[0].module_id},{assignments[2].module_id}")
+
+        assert [row["id"] for row in response.json] == [assignments[0].id, assignments[2].id]
+
+    @pytest.mark.parametrize(
+        "query, message",
+        [
+            ("title=Essay", "Invalid filter: title, please choose from module_id, due_date, created_at"),
+            ("module_id__gt=1", "Invalid filter: module_id__gt"),
+            ("due_date__gte=friday", "Invalid value for due_date__gte: friday"),
+            ("module_id__in=1,x", "Invalid value for module_id__in: 1,x"),
+            (
+                "sort=-due_date",
+                "Invalid sort: -due_date, please choose from id, -id, due_date, created_at, -created_at",
+            ),
+            ("sort=title", "Invalid sort: title"),
+        ],
+    )
+    def test_list_assignments_with_invalid_filters(self, client, teacher_user, query, message) -> None:
+        # Test that unknown filters, invalid values and sort orders without an index are rejected
+        response = client.get(f"/assignments/list?{query}")
+
+        assert response.status_code == 400
+        assert response.json["message"].startswith(message)
+
     def test_list_all_assignments_with_hacker_mode(
         self, client, teacher_user_without_token, toggle_hacker_mode
     ) -> None:
@@ -106,3 +195,29 @@ class TestAssignment:
                 "Please double-check your authorisation and try again."
             )
         }
+
+    def test_view_assignment_stats(self, client, teacher_user) -> None:
+        # Test viewing the grade statistics of an assignment
+        assignment = AssignmentFactory.create()
+        for score in (40, 60, 95):
+            GradeFactory.create(student_id=StudentFactory.create().id, assignment_id=assignment.id, score=score)
+
+        response = client.get(f"/assignments/{assignment.id}/stats")
+
+        assert response.status_code == 200
+        assert response.json["assignment_id"] == assignment.id
+        assert (response.json["count"], response.json["median"], response.json["max"]) == (3, 60.0, 95.0)
+        assert response.json["histogram"]["counts"] == [0, 0, 0, 0, 1, 0, 1, 0, 0, 1]
+
+    def test_view_stats_of_unknown_assignment(self, client, teacher_user) -> None:
+        # Test viewing the grade statistics of an assignment that does not exist
+        response = client.get("/assignments/987654321/stats")
+
+        assert response.status_code == 422
+        assert response.json == {"message": "No assignment found, please try again"}
+
+    def test_view_assignment_stats_as_a_student(self, client, student_user) -> None:
+        # Test that students cannot view an assignment's grade statistics
+        response = client.get(f"/assignments/{AssignmentFactory.create().id}/stats")
+
+        assert response.status_code == 401
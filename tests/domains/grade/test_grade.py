@@ -23,6 +23,38 @@ class TestGrade:
             data.get("message") == f"Grade for student {student.id} and assignment {assignment.id} successfully created"
         )
 
+    def test_resubmit_grade(self, client, teacher_user, query_budget) -> None:
+        # Test that a retried submission updates the grade in a single statement
+        student = StudentFactory.create()
+        assignment = AssignmentFactory.create()
+        params = {"student_id": student.id, "assignment_id": assignment.id, "score": 40}
+
+        client.post("/grades/create", json=params)
+        with query_budget(2):
+            response = client.post("/grades/create", json={**params, "score": 45})
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        assert (
+            data.get("message") == f"Grade for student {student.id} and assignment {assignment.id} successfully updated"
+        )
+
+    def test_posted_grades_refresh_statistics(self, client, teacher_user) -> None:
+        # Test that grades created and updated through the endpoint change the statistics of their assignment
+        student = StudentFactory.create()
+        assignment = AssignmentFactory.create()
+        params = {"student_id": student.id, "assignment_id": assignment.id, "score": 40}
+
+        empty = client.get(f"/assignments/{assignment.id}/stats")
+        client.post("/grades/create", json=params)
+        created = client.get(f"/assignments/{assignment.id}/stats")
+        client.post("/grades/create", json={**params, "score": 90})
+        updated = client.get(f"/assignments/{assignment.id}/stats")
+
+        assert empty.json["count"] == 0
+        assert (created.json["count"], created.json["mean"]) == (1, 40.0)
+        assert (updated.json["count"], updated.json["mean"]) == (1, 90.0)
+
     def test_create_grade_with_hacker_mode(self, client, teacher_user_without_token, toggle_hacker_mode) -> None:
         # Test creating a grade with hacker mode enabled
         grade = GradeFactory.build()
@@ -82,6 +114,48 @@ class TestGrade:
         assert grade_two.assignment.id in [grade["assignment_id"] for grade in data]
         assert response.status_code == 200
 
+    def test_view_grades_query_budget(self, client, student_user, query_budget) -> None:
+        # Test that viewing grades runs one authorisation query, one version query and one grades query, however many
+        # grades there are
+        for assignment in AssignmentFactory.create_batch(3):
+            GradeFactory.create(student_id=student_user.id, assignment_id=assignment.id, score=30)
+
+        with query_budget(3):
+            response = client.get("/grades/view")
+
+        assert response.status_code == 200
+        assert len(response.json) == 3
+
+    def test_view_grades_fields(self, client, student_user) -> None:
+        # Test that `?fields=` returns the requested columns of the student's grades
+        assignment = AssignmentFactory.create()
+        GradeFactory.create(student_id=student_user.id, assignment_id=assignment.id, score=30)
+
+        response = client.get("/grades/view?fields=score,assignment_id")
+
+        assert response.status_code == 200
+        assert response.json == [{"assignment_id": assignment.id, "score": 30.0}]
+
+    def test_view_grades_not_modified(self, client, student_user) -> None:
+        # Test that the grades are answered with 304 Not Modified until a grade is written, and only to the same student
+        assignment = AssignmentFactory.create()
+        GradeFactory.create(student_id=student_user.id, assignment_id=assignment.id, score=30)
+        response = client.get("/grades/view")
+        not_modified = client.get("/grades/view", headers={"If-None-Match": response.headers["ETag"]})
+        other_student = StudentFactory.create()
+        other_response = client.get(
+            "/grades/view",
+            headers={"If-None-Match": response.headers["ETag"], "Authorization": f"Bearer {other_student.auth_token}"},
+        )
+        GradeFactory.create(student_id=student_user.id, assignment_id=AssignmentFactory.create().id, score=40)
+        modified = client.get("/grades/view", headers={"If-None-Match": response.headers["ETag"]})
+
+        assert not_modified.status_code == 304
+        assert other_response.status_code == 200
+        assert other_response.json == []
+        assert modified.status_code == 200
+        assert len(modified.json) == 2
+
     def test_view_grades_as_non_student(self, client, teacher_user) -> None:
         # Test viewing grades as a non-student user
         response = client.get("/grades/view")
@@ -89,3 +163,60 @@ class TestGrade:
 
         assert data.get("message") == "You are not a student, so there are no grades to view"
         assert response.status_code == 422
+
+    def test_bulk_create_grades(self, client, teacher_user, query_budget) -> None:
+        # Test importing a CSV file of grades in a fixed number of statements
+        students = StudentFactory.create_batch(3)
+        assignment = AssignmentFactory.create()
+        body = "student_id,assignment_id,score\n" + "".join(
+            f"{student.id},{assignment.id},{50 + index}\n" for index, student in enumerate(students)
+        )
+
+        with query_budget(5):
+            response = client.post("/grades/bulk", data=body, content_type="text/csv")
+
+        assert response.status_code == 200
+        assert response.json["message"] == "3 grades created, 0 updated and 0 rows rejected"
+        assert response.json["errors"] == []
+
+    def test_bulk_create_grades_with_unsupported_type(self, client, teacher_user) -> None:
+        # Test importing grades from a file type that is not supported
+        response = client.post("/grades/bulk", json=[{"student_id": 1, "assignment_id": 1, "score": 1}])
+
+        assert response.status_code == 415
+
+    def test_bulk_create_grades_as_a_student(self, client, student_user) -> None:
+        # Test that students cannot import grades
+        response = client.post("/grades/bulk", data="student_id,assignment_id,score\n", content_type="text/csv")
+
+        assert response.status_code == 401
+
+    def test_export_grades(self, client, teacher_user) -> None:
+        # Test streaming the grades of an assignment as a CSV file
+        assignment = AssignmentFactory.create()
+        students = StudentFactory.create_batch(3)
+        for score, student in enumerate(students, start=50):
+            GradeFactory.create(student_id=student.id, assignment_id=assignment.id, score=score)
+
+        response = client.get(f"/grades/export?assignment_id={assignment.id}")
+        lines = response.data.decode().splitlines()
+
+        assert response.status_code == 200
+        assert "Content-Length" not in response.headers
+        assert response.mimetype == "text/csv"
+        assert response.headers["Content-Disposition"] == 'attachment; filename="grades.csv"'
+        assert lines[0] == "id,student_id,assignment_id,module_id,score,created_at,updated_at"
+        assert [line.split(",")[1] for line in lines[1:]] == [str(student.id) for student in students]
+
+    def test_export_grades_with_invalid_params(self, client, teacher_user) -> None:
+        # Test exporting grades with an invalid filter
+        response = client.get("/grades/export?until=tomorrow")
+
+        assert response.status_code == 400
+        assert response.json == {"message": "until must be an ISO 8601 date or date and time"}
+
+    def test_export_grades_as_a_student(self, client, student_user) -> None:
+        # Test that students cannot export grades
+        response = client.get("/grades/export")
+
+        assert response.status_code == 401
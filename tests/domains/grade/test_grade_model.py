@@ -1,7 +1,13 @@
+from datetime import datetime
+
+import psycopg2
 import pytest
 
-from lms.domains import Grade
-from tests.factories import AssignmentFactory, GradeFactory, UserFactory
+from sqlalchemy import text
+
+from lms.domains import Grade, GradeImport
+from lms.domains.grade.grade_stats import grade_stats
+from tests.factories import AssignmentFactory, GradeFactory, StudentFactory, TeacherFactory, UserFactory
 
 
 @pytest.mark.usefixtures("wipe_grades_table")
@@ -32,3 +38,102 @@ class TestGradeModel:
 
         assert isinstance(created_grade, Grade)
         assert created_grade.score == grade.score
+
+    def test_grade_upsert(self, db) -> None:
+        # Test that upserting inserts a grade once and then updates its score in place
+        student = UserFactory.create()
+        assignment = AssignmentFactory.create()
+
+        GradeFactory.create(student_id=UserFactory.create().id, assignment_id=AssignmentFactory.create().id)
+        grade_id, created = Grade.upsert(score=40, student_id=student.id, assignment_id=assignment.id)
+        same_id, created_again = Grade.upsert(score=75, student_id=student.id, assignment_id=assignment.id)
+
+        assert created is True
+        assert created_again is False
+        assert same_id == grade_id
+        assert Grade.count(student_id=student.id, assignment_id=assignment.id) == 1
+        db.session.expire_all()
+        assert Grade.get(grade_id).score == 75
+        assert Grade.get(grade_id).updated_at is not None
+
+    def test_grade_bulk_upsert(self, db) -> None:
+        # Test that a bulk upsert creates and updates grades, the last row of a pair winning, and rejects unknown ids
+        first, second = StudentFactory.create_batch(2)
+        assignment = AssignmentFactory.create()
+        Grade.upsert(score=10, student_id=first.id, assignment_id=assignment.id)
+        rows = [
+            (2, first.id, assignment.id, 20.0),
+            (3, second.id, assignment.id, 30.0),
+            (4, second.id, assignment.id, 35.5),
+            (5, 987654321, assignment.id, 50.0),
+            (6, first.id, 987654321, 50.0),
+            (7, TeacherFactory.create().id, assignment.id, 50.0),
+        ]
+
+        result = Grade.bulk_upsert(iter(rows))
+
+        assert result == GradeImport(
+            created=1,
+            updated=1,
+            rejected=[(5, False, True), (6, True, False), (7, False, True)],
+            rejected_count=3,
+        )
+        db.session.expire_all()
+        scores = {grade.student_id: grade.score for grade in Grade.find_all(assignment_id=assignment.id)}
+        assert scores == {first.id: 20.0, second.id: 35.5}
+
+    def test_grade_bulk_upsert_lists_a_limited_number_of_rejected_rows(self) -> None:
+        # Test that only the first rejected rows are listed, while all of them are counted
+        rows = ((line, 987654321, 987654321, 50.0) for line in range(1, 11))
+
+        result = Grade.bulk_upsert(rows, max_rejected=3)
+
+        assert result.rejected == [(1, False, False), (2, False, False), (3, False, False)]
+        assert result.rejected_count == 10
+        assert (result.created, result.updated) == (0, 0)
+
+    def test_grade_bulk_upsert_rolls_back_a_failed_import(self, db) -> None:
+        # Test that a failed COPY is rolled back, leaving the session usable and the grades untouched
+        assignment = AssignmentFactory.create()
+        rows = [(1, StudentFactory.create().id, assignment.id, 10.0), (2, None, assignment.id, 20.0)]
+
+        with pytest.raises(psycopg2.errors.NotNullViolation):
+            Grade.bulk_upsert(iter(rows))
+
+        assert Grade.find_all(assignment_id=assignment.id) == []
+
+    def test_grade_bulk_upsert_refreshes_statistics(self) -> None:
+        # Test that a bulk upsert drops the cached statistics of the assignments it graded
+        student = StudentFactory.create()
+        assignment = AssignmentFactory.create()
+        assert grade_stats(type(assignment), assignment.id)["count"] == 0
+
+        Grade.bulk_upsert([(1, student.id, assignment.id, 80.0)])
+
+        assert grade_stats(type(assignment), assignment.id)["mean"] == 80.0
+
+    def test_grade_export(self, db) -> None:
+        # Test reading grades for an export in batches from a server-side cursor, with their module
+        student = StudentFactory.create()
+        first, second = AssignmentFactory.create_batch(2)
+        for score in (10, 20, 30):
+            GradeFactory.create(student_id=UserFactory.create().id, assignment_id=first.id, score=score)
+        GradeFactory.create(student_id=student.id, assignment_id=second.id, score=40)
+
+        batches = list(Grade.export(assignment_id=first.id, batch_size=2))
+
+        assert [len(rows) for rows in batches] == [2, 1]
+        assert [(row.score, row.module_id) for rows in batches for row in rows] == [
+            (10, first.module_id),
+            (20, first.module_id),
+            (30, first.module_id),
+        ]
+        assert [row.score for rows in Grade.export(module_id=second.module_id) for row in rows] == [40]
+        assert list(Grade.export(assignment_id=first.id, until=datetime(2000, 1, 1))) == []
+
+        # The rows come from a cursor declared on the server, which is closed with the export
+        export = Grade.export(batch_size=1)
+        next(export)
+        assert db.session.execute(text("SELECT count(*) FROM pg_cursors")).scalar() == 1
+        export.close()
+        assert db.session.execute(text("SELECT count(*) FROM pg_cursors")).scalar() == 0
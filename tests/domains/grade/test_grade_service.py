@@ -1,6 +1,8 @@
+import json
+
 import pytest
 
-from lms.domains import GradeService
+from lms.domains import Grade, GradeService
 from tests.factories import AssignmentFactory, GradeFactory, StudentFactory
 
 
@@ -19,6 +21,19 @@ class TestGradeService:
         assert message == f"Grade for student {student.id} and assignment {assignment.id} successfully created"
         assert status == 201
 
+    def test_create_grade_twice_updates_it(self) -> None:
+        # Test that submitting a grade again updates the existing grade instead of duplicating it
+        student = StudentFactory.create()
+        assignment = AssignmentFactory.create()
+        params = {"student_id": student.id, "assignment_id": assignment.id, "score": 40}
+
+        GradeService().create(params=params)
+        message, status = GradeService().create(params={**params, "score": 60})
+
+        assert message == f"Grade for student {student.id} and assignment {assignment.id} successfully updated"
+        assert status == 200
+        assert [grade.score for grade in Grade.find_all(student_id=student.id)] == [60]
+
     def test_create_grade_with_missing_params(self) -> None:
         # Test creating a grade with missing parameters using GradeService
         grade = GradeFactory.build()
@@ -29,3 +44,110 @@ class TestGradeService:
 
         assert message == "Something doesn't look right, please double-check the parameters and try again"
         assert status == 422
+
+    def test_bulk_create_grades_from_csv(self) -> None:
+        # Test importing grades from a CSV file, reporting its invalid rows by line number
+        students = StudentFactory.create_batch(2)
+        assignment = AssignmentFactory.create()
+        lines = [
+            b"assignment_id,student_id,score\n",
+            f"{assignment.id},{students[0].id},71.5\n".encode(),
+            f"{assignment.id},{students[1].id},64\n".encode(),
+            f"{assignment.id},abc,64\n".encode(),
+            f"{assignment.id},{students[1].id},\n".encode(),
+            f"987654321,{students[1].id},20\n".encode(),
+        ]
+
+        report, status = GradeService().bulk_create(lines=lines, media_type="text/csv")
+
+        assert status == 200
+        assert report == {
+            "message": "2 grades created, 0 updated and 3 rows rejected",
+            "created": 2,
+            "updated": 0,
+            "rejected": 3,
+            "errors": [
+                {"line": 4, "message": "student_id must be a positive integer"},
+                {"line": 5, "message": "Missing score"},
+                {"line": 6, "message": "Unknown assignment"},
+            ],
+        }
+
+    def test_bulk_create_grades_from_ndjson(self) -> None:
+        # Test importing grades from a newline-delimited JSON file
+        student = StudentFactory.create()
+        assignment = AssignmentFactory.create()
+        lines = [
+            json.dumps({"student_id": student.id, "assignment_id": assignment.id, "score": 90}).encode() + b"\n",
+            b"\n",
+            b"[1, 2, 3]\n",
+            json.dumps({"student_id": student.id, "assignment_id": assignment.id, "score": "high"}).encode(),
+        ]
+
+        report, status = GradeService().bulk_create(lines=lines, media_type="application/x-ndjson")
+
+        assert status == 200
+        assert (report["created"], report["rejected"]) == (1, 2)
+        assert report["errors"] == [
+            {"line": 3, "message": "Not a JSON object"},
+            {"line": 4, "message": "score must be a number"},
+        ]
+
+    def test_bulk_create_grades_with_invalid_file(self) -> None:
+        # Test that files of another type, or CSV files without the grade columns, are refused
+        assert GradeService().bulk_create(lines=[b"{}"], media_type="application/json")[1] == 415
+
+        report, status = GradeService().bulk_create(lines=[b"student,score\n", b"1,2\n"], media_type="text/csv")
+
+        assert status == 422
+        assert report == {"message": "The CSV header must name the student_id, assignment_id and score columns"}
+
+    def test_export_grades_as_csv(self) -> None:
+        # Test exporting the grades of an assignment as CSV, the header being written before the query runs
+        assignment = AssignmentFactory.create()
+        grade = GradeFactory.create(student_id=StudentFactory.create().id, assignment_id=assignment.id, score=72.5)
+
+        media_type, chunks = GradeService().export(params={"assignment_id": str(assignment.id)})
+
+        assert media_type == "text/csv"
+        assert next(chunks) == b"id,student_id,assignment_id,module_id,score,created_at,updated_at\r\n"
+        assert b"".join(chunks).decode() == (
+            f"{grade.id},{grade.student_id},{assignment.id},{assignment.module_id},72.5,"
+            f"{grade.created_at.isoformat()},\r\n"
+        )
+
+    def test_export_grades_as_ndjson(self) -> None:
+        # Test exporting the grades of a module created in a time range as NDJSON
+        assignment = AssignmentFactory.create()
+        grade = GradeFactory.create(student_id=StudentFactory.create().id, assignment_id=assignment.id, score=60)
+        params = {"format": "ndjson", "module_id": str(assignment.module_id), "since": "2000-01-01T00:00:00+02:00"}
+
+        media_type, chunks = GradeService().export(params=params)
+        records = [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+        assert media_type == "application/x-ndjson"
+        assert records == [
+            {
+                "id": grade.id,
+                "student_id": grade.student_id,
+                "assignment_id": assignment.id,
+                "module_id": assignment.module_id,
+                "score": 60.0,
+                "created_at": grade.created_at.isoformat(),
+                "updated_at": None,
+            }
+        ]
+        assert list(GradeService().export(params={**params, "until": "2000-01-02"})[1]) == []
+
+    @pytest.mark.parametrize(
+        "params, message",
+        [
+            ({"format": "xml"}, "The format must be csv or ndjson"),
+            ({"module_id": "first"}, "module_id must be a positive integer"),
+            ({"since": "yesterday"}, "since must be an ISO 8601 date or date and time"),
+        ],
+    )
+    def test_export_grades_with_invalid_params(self, params, message) -> None:
+        # Test that invalid export parameters are refused before anything is exported
+        with pytest.raises(ValueError, match=message):
+            GradeService().export(params=params)
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from sqlalchemy import text
+
+from lms.domains import Assignment, Grade, GradeService, Module
+from lms.domains.grade.grade_stats import grade_stats, score_statistics
+from tests.factories import AssignmentFactory, GradeFactory, ModuleFactory, StudentFactory
+
+
+def test_score_statistics() -> None:
+    # Test the statistics computed over an array of scores
+    stats = score_statistics(np.array([10.0, 20.0, 30.0, 40.0, 100.0]))
+
+    assert stats["count"] == 5
+    assert stats["mean"] == 40.0
+    assert stats["median"] == 30.0
+    assert stats["stddev"] == pytest.approx(31.623, abs=1e-3)
+    assert (stats["min"], stats["max"]) == (10.0, 100.0)
+    assert stats["percentiles"] == {"p10": 14.0, "p25": 20.0, "p75": 40.0, "p90": 76.0}
+    assert stats["histogram"]["edges"][:3] == [0.0, 10.0, 20.0]
+    assert stats["histogram"]["counts"] == [0, 1, 1, 1, 1, 0, 0, 0, 0, 1]
+
+
+def test_score_statistics_without_scores() -> None:
+    # Test the statistics of an empty set of scores
+    stats = score_statistics(np.array([]))
+
+    assert stats["count"] == 0
+    assert stats["mean"] is None
+    assert stats["histogram"]["counts"] == [0] * 10
+
+
+@pytest.mark.usefixtures("wipe_grades_table")
+class TestGradeStats:
+    def test_assignment_and_module_stats(self) -> None:
+        # Test the statistics of an assignment, and of every assignment of its module
+        module = ModuleFactory.create()
+        first, second = AssignmentFactory.create_batch(2, module_id=module.id)
+        for score, assignment in ((50, first), (70, first), (90, second)):
+            GradeFactory.create(student_id=StudentFactory.create().id, assignment_id=assignment.id, score=score)
+
+        assert grade_stats(Assignment, first.id)["mean"] == 60.0
+        assert grade_stats(Module, module.id)["count"] == 3
+        assert grade_stats(Module, module.id)["max"] == 90.0
+
+    def test_stats_of_unknown_records(self) -> None:
+        # Test that unknown assignments and modules have no statistics, while ungraded ones have empty statistics
+        assignment = AssignmentFactory.create()
+
+        assert grade_stats(Assignment, 987654321) is None
+        assert grade_stats(Module, 987654321) is None
+        assert grade_stats(Assignment, assignment.id)["count"] == 0
+
+    def test_stats_are_cached_until_a_grade_is_written(self, db, query_budget) -> None:
+        # Test that statistics are served from the cache, after reading the table versions, until a grade is written,
+        # even behind the models' backs as another process would
+        assignment = AssignmentFactory.create()
+        student = StudentFactory.create()
+        params = {"student_id": student.id, "assignment_id": assignment.id, "score": 40}
+        GradeService().create(params=params)
+        assignment_id, module_id = assignment.id, assignment.module_id
+
+        assert grade_stats(Assignment, assignment_id)["mean"] == 40.0
+        assert grade_stats(Module, module_id)["mean"] == 40.0
+        with query_budget(2):
+            grade_stats(Assignment, assignment_id)
+            grade_stats(Module, module_id)
+
+        GradeService().create(params={**params, "score": 80})
+        Grade.create(score=60, student_id=StudentFactory.create().id, assignment_id=assignment_id)
+
+        assert grade_stats(Assignment, assignment_id)["mean"] == 70.0
+        assert grade_stats(Module, module_id)["mean"] == 70.0
+
+        db.session.execute(text("UPDATE grades SET score = 100 WHERE assignment_id = :id"), {"id": assignment_id})
+        db.session.commit()
+
+        assert grade_stats(Assignment, assignment_id)["mean"] == 100.0
+        assert grade_stats(Module, module_id)["mean"] == 100.0
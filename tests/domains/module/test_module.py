@@ -2,7 +2,7 @@ import json
 
 import pytest
 
-from tests.factories import ModuleFactory
+from tests.factories import AssignmentFactory, GradeFactory, ModuleFactory, StudentFactory
 
 
 @pytest.mark.usefixtures("wipe_modules_table")
@@ -73,6 +73,56 @@ class TestModule:
         assert "id" in data[0]
         assert "title" in data[0]
 
+    def test_list_modules_query_budget(self, client, teacher_user, query_budget) -> None:
+        # Test that listing modules runs one authorisation query, one version query and one page query
+        ModuleFactory.create_batch(3)
+
+        with query_budget(3):
+            response = client.get("/modules/list")
+
+        assert response.status_code == 200
+
+    def test_list_modules_fields(self, client, teacher_user) -> None:
+        # Test that `?fields=` returns the requested columns, in the order of the allowlist
+        module = ModuleFactory.create()
+
+        response = client.get("/modules/list?fields=description,id,teacher_id")
+        invalid = client.get("/modules/list?fields=id,secret")
+
+        assert response.json == [{"id": module.id, "description": module.description, "teacher_id": module.teacher_id}]
+        assert invalid.status_code == 400
+        assert invalid.json["message"].startswith("Invalid fields: secret, please choose from id, title")
+
+    def test_list_modules_of_a_teacher(self, client, teacher_user) -> None:
+        # Test filtering the modules by teacher, newest first
+        modules = ModuleFactory.create_batch(2, teacher_id=teacher_user.id)
+        ModuleFactory.create()
+
+        response = client.get(f"/modules/list?teacher_id={teacher_user.id}&sort=-created_at")
+
+        assert [module["id"] for module in response.json] == [modules[1].id, modules[0].id]
+
+    def test_list_modules_one_page_at_a_time(self, client, teacher_user) -> None:
+        # Test that a partial page links to the next one
+        modules = [ModuleFactory.create() for _ in range(3)]
+
+        response = client.get("/modules/list?limit=2")
+        next_url = response.headers["Link"].split(";")[0].strip("<>")
+        next_response = client.get(next_url)
+
+        assert response.status_code == 200
+        assert [module["id"] for module in response.json] == [modules[0].id, modules[1].id]
+        assert [module["id"] for module in next_response.json] == [modules[2].id]
+        assert "Link" not in next_response.headers
+
+    @pytest.mark.parametrize("query", ["limit=0", "limit=abc", "after=garbage"])
+    def test_list_modules_with_invalid_pagination(self, client, teacher_user, query) -> None:
+        # Test that invalid cursors and page sizes are rejected
+        response = client.get(f"/modules/list?{query}")
+
+        assert response.status_code == 400
+        assert response.json == {"message": "Invalid pagination parameters, please double-check them and try again"}
+
     def test_list_all_modules_as_a_student(self, client, student_user) -> None:
         # Test listing all modules as a student (unauthorized)
         ModuleFactory.create()
@@ -104,3 +154,57 @@ class TestModule:
         assert len(data) >= 1
         assert "id" in data[0]
         assert "title" in data[0]
+
+    def test_view_gradebook(self, client, teacher_user, query_budget) -> None:
+        # Test viewing the columnar gradebook of a module in one query after authorisation
+        module = ModuleFactory.create()
+        assignments = AssignmentFactory.create_batch(3, module_id=module.id)
+        students = StudentFactory.create_batch(2)
+        for student in students:
+            GradeFactory.create(student_id=student.id, assignment_id=assignments[1].id, score=55)
+        module_id = module.id
+
+        with query_budget(2):
+            response = client.get(f"/modules/{module_id}/gradebook")
+
+        assert response.status_code == 200
+        assert response.json == {
+            "module_id": module_id,
+            "students": [student.id for student in students],
+            "assignments": [assignment.id for assignment in assignments],
+            "scores": [None, 55, None, None, 55, None],
+        }
+
+    def test_view_gradebook_of_unknown_module(self, client, teacher_user) -> None:
+        # Test viewing the gradebook of a module that does not exist
+        response = client.get("/modules/987654321/gradebook")
+
+        assert response.status_code == 422
+        assert response.json == {"message": "No module found, please try again"}
+
+    def test_view_gradebook_as_a_student(self, client, student_user) -> None:
+        # Test that students cannot view a module's gradebook
+        response = client.get(f"/modules/{ModuleFactory.create().id}/gradebook")
+
+        assert response.status_code == 401
+
+    def test_view_module_stats(self, client, teacher_user) -> None:
+        # Test viewing the grade statistics of every assignment of a module
+        module = ModuleFactory.create()
+        first, second = AssignmentFactory.create_batch(2, module_id=module.id)
+        GradeFactory.create(student_id=StudentFactory.create().id, assignment_id=first.id, score=35)
+        GradeFactory.create(student_id=StudentFactory.create().id, assignment_id=second.id, score=85)
+
+        response = client.get(f"/modules/{module.id}/stats")
+
+        assert response.status_code == 200
+        assert response.json["module_id"] == module.id
+        assert (response.json["count"], response.json["mean"]) == (2, 60.0)
+        assert response.json["histogram"]["counts"] == [0, 0, 0, 1, 0, 0, 0, 0, 1, 0]
+
+    def test_view_stats_of_unknown_module(self, client, teacher_user) -> None:
+        # Test viewing the grade statistics of a module that does not exist
+        response = client.get("/modules/987654321/stats")
+
+        assert response.status_code == 422
+        assert response.json == {"message": "No module found, please try again"}
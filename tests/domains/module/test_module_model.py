@@ -1,7 +1,7 @@
 import pytest
 
-from lms.domains import Module
-from tests.factories import ModuleFactory
+from lms.domains import Gradebook, Module
+from tests.factories import AssignmentFactory, GradeFactory, ModuleFactory, StudentFactory
 
 
 @pytest.mark.usefixtures("wipe_modules_table")
@@ -32,3 +32,28 @@ class TestModuleModel:
         assert created_module.title == module.title
         assert created_module.description == module.description
         assert created_module.teacher_id == module.teacher_id
+
+    def test_module_gradebook(self) -> None:
+        # Test building the students-by-assignments matrix of a module
+        module = ModuleFactory.create()
+        first, second = AssignmentFactory.create_batch(2, module_id=module.id)
+        alice, bob = StudentFactory.create_batch(2)
+        GradeFactory.create(student_id=alice.id, assignment_id=first.id, score=80)
+        GradeFactory.create(student_id=alice.id, assignment_id=second.id, score=90)
+        GradeFactory.create(student_id=bob.id, assignment_id=second.id, score=70)
+        GradeFactory.create(student_id=bob.id, assignment_id=AssignmentFactory.create().id, score=10)
+
+        gradebook = Module.gradebook(module.id)
+
+        assert gradebook == Gradebook(
+            students=[alice.id, bob.id],
+            assignments=[first.id, second.id],
+            scores=[80, 90, None, 70],
+        )
+
+    def test_module_gradebook_without_grades(self) -> None:
+        # Test the gradebook of a module without assignments, and of a module that does not exist
+        module = ModuleFactory.create()
+
+        assert Module.gradebook(module.id) == Gradebook(students=[], assignments=[], scores=[])
+        assert Module.gradebook(987654321) is None
@@ -0,0 +1,110 @@
+from typing import Generator
+
+import pytest
+
+from sqlalchemy import text
+
+from lms.adapters import search_index
+from lms.domains import Assignment, Module
+from tests.factories import AssignmentFactory, ModuleFactory
+
+
+# Create a fixture switching the search index to the SQLite backend for one test
+@pytest.fixture
+def sqlite_search(app) -> Generator:
+    app.config["SEARCH_BACKEND"] = "sqlite"
+    search_index.init_app(app)
+    yield
+    app.config["SEARCH_BACKEND"] = "postgres"
+    search_index.init_app(app)
+
+
+# Create a fixture writing a module and an assignment mentioning "organic"
+@pytest.fixture
+def catalog(teacher_user) -> tuple[Module, Assignment]:
+    module = Module.create(title="Organic chemistry", description="Reactions of carbon compounds", teacher_id=None)
+    assignment = Assignment.create(
+        title="Lab report", description="Write up the organic synthesis experiments", module_id=module.id, due_date=None
+    )
+    ModuleFactory.create(title="Physics", description="Mechanics")
+    return module, assignment
+
+
+@pytest.mark.usefixtures("wipe_modules_table", "wipe_assignments_table")
+class TestSearch:
+    def test_search(self, client, catalog, query_budget) -> None:
+        # Test that matches in titles rank above matches in descriptions, with stemmed words
+        module, assignment = catalog
+
+        with query_budget(3):
+            response = client.get("/search?q=organic")
+        experiments = client.get("/search?q=experiment")
+
+        assert response.status_code == 200
+        assert [(hit["kind"], hit["id"], hit["title"]) for hit in response.json] == [
+            ("module", module.id, "Organic chemistry"),
+            ("assignment", assignment.id, "Lab report"),
+        ]
+        assert response.json[0]["rank"] > response.json[1]["rank"]
+        assert [hit["id"] for hit in experiments.json] == [assignment.id]
+
+    def test_search_by_kind(self, client, catalog) -> None:
+        # Test restricting the search to some kinds of records, and limiting the number of results
+        module, assignment = catalog
+
+        assignments = client.get("/search?q=organic&kind=assignment")
+        first = client.get("/search?q=organic&limit=1")
+
+        assert [(hit["kind"], hit["id"]) for hit in assignments.json] == [("assignment", assignment.id)]
+        assert [(hit["kind"], hit["id"]) for hit in first.json] == [("module", module.id)]
+
+    def test_search_finds_new_records(self, client, catalog) -> None:
+        # Test that the generated search document of a record written any way is searchable at once
+        assignment = AssignmentFactory.create(title="Organic nomenclature", description="")
+        response = client.get("/search?q=nomenclature")
+
+        assert [hit["id"] for hit in response.json] == [assignment.id]
+
+    def test_search_not_modified(self, client, catalog) -> None:
+        # Test that a repeated search is answered with 304 Not Modified until a module or assignment is written
+        response = client.get("/search?q=organic")
+        not_modified = client.get("/search?q=organic", headers={"If-None-Match": response.headers["ETag"]})
+        Module.create(title="Organic farming", description="", teacher_id=None)
+        modified = client.get("/search?q=organic", headers={"If-None-Match": response.headers["ETag"]})
+
+        assert not_modified.status_code == 304
+        assert modified.status_code == 200
+        assert len(modified.json) == 3
+
+    @pytest.mark.parametrize("query", ["", "q=", "q=%20", f"q={'a' * 201}", "q=lab&kind=user", "q=lab&limit=0"])
+    def test_search_with_invalid_arguments(self, client, teacher_user, query) -> None:
+        # Test that empty or overlong queries, unknown kinds and invalid limits are rejected
+        response = client.get(f"/search?{query}")
+
+        assert response.status_code == 400
+
+    def test_search_as_a_student(self, client, student_user) -> None:
+        # Test that students cannot search
+        response = client.get("/search?q=organic")
+
+        assert response.status_code == 401
+
+    @pytest.mark.usefixtures("sqlite_search")
+    def test_search_with_sqlite(self, client, db, catalog) -> None:
+        # Test that the SQLite backend loads the records on the first search, and again once they are written or
+        # deleted, even behind the models' backs as another process would
+        module, assignment = catalog
+
+        response = client.get("/search?q=organic")
+        farming_id = Module.create(title="Organic farming", description="", teacher_id=None).id
+        refreshed = client.get("/search?q=organic&kind=module")
+        db.session.execute(text("DELETE FROM modules WHERE id = :id"), {"id": farming_id})
+        db.session.commit()
+        deleted = client.get("/search?q=organic&kind=module")
+
+        assert [(hit["kind"], hit["id"]) for hit in response.json] == [
+            ("module", module.id),
+            ("assignment", assignment.id),
+        ]
+        assert sorted(hit["id"] for hit in refreshed.json) == [module.id, farming_id]
+        assert [hit["id"] for hit in deleted.json] == [module.id]
@@ -2,8 +2,9 @@ import json
 
 import pytest
 
+from lms.adapters import cache_stats, password_pool, query_tracker
 from lms.domains import User, UserRole
-from tests.factories import StudentFactory, UserFactory
+from tests.factories import StudentFactory, TeacherFactory, UserFactory
 
 
 @pytest.mark.usefixtures("wipe_users_table")
@@ -100,6 +101,53 @@ class TestUser:
         assert "role_id" in data[0]
         assert "username" in data[0]
 
+    def test_list_users_query_budget(self, client, admin_user, query_budget) -> None:
+        # Test that listing users runs one authorisation query, one version query and one page query
+        UserFactory.create_batch(3)
+
+        with query_budget(3):
+            response = client.get("/users/list")
+
+        assert response.status_code == 200
+
+    def test_list_users_fields(self, client, admin_user) -> None:
+        # Test that `?fields=` restricts the page query to the requested columns, keeping them across pages
+        UserFactory.create_batch(2)
+
+        with query_tracker.capture() as statements:
+            response = client.get("/users/list?fields=username,created_at&limit=1")
+        next_response = client.get(response.headers["Link"].split(";")[0].strip("<>"))
+
+        assert list(response.json[0]) == ["username", "created_at"]
+        assert list(next_response.json[0]) == ["username", "created_at"]
+        assert statements[-1].startswith("SELECT users.username, users.created_at, users.id \nFROM users")
+
+    def test_list_users_by_role(self, client, admin_user) -> None:
+        # Test filtering the users by role name and creation time
+        students = StudentFactory.create_batch(2)
+        UserFactory.create()
+
+        response = client.get("/users/list?role=student&fields=id")
+        both = client.get("/users/list?role__in=student,admin&created_at__gte=2000-01-01&fields=id")
+        invalid = client.get("/users/list?role=owner")
+
+        assert response.json == [{"id": student.id} for student in students]
+        assert len(both.json) == User.count() == 4
+        assert invalid.status_code == 400
+        assert invalid.json["message"] == "Invalid value for role: owner"
+
+    def test_list_users_not_modified(self, client, admin_user, query_budget) -> None:
+        # Test that the list is answered with 304 Not Modified from the authorisation and version queries alone
+        response = client.get("/users/list")
+
+        with query_budget(2):
+            not_modified = client.get("/users/list", headers={"If-None-Match": response.headers["ETag"]})
+        UserFactory.create()
+        modified = client.get("/users/list", headers={"If-None-Match": response.headers["ETag"]})
+
+        assert not_modified.status_code == 304
+        assert modified.status_code == 200
+
     def test_list_all_users_with_hacker_mode(self, client, toggle_hacker_mode) -> None:
         # Test listing all users with hacker mode enabled
         UserFactory.create()
@@ -164,6 +212,29 @@ class TestUser:
             "username": user.username,
         }
 
+    def test_get_single_user_fields(self, client, admin_user) -> None:
+        # Test that `?fields=` selects only the requested columns of the user
+        user = UserFactory.create()
+
+        with query_tracker.capture() as statements:
+            response = client.get(f"/users/{user.id}?fields=username,email")
+
+        assert response.status_code == 200
+        assert response.json == {"email": user.email, "username": user.username}
+        assert statements[-1].startswith("SELECT users.email, users.username \nFROM users")
+
+    @pytest.mark.parametrize("fields", ["password", "auth_token,email", ""])
+    def test_get_single_user_invalid_fields(self, client, admin_user, fields) -> None:
+        # Test that fields outside of the allowlist are rejected
+        user = UserFactory.create()
+
+        response = client.get(f"/users/{user.id}?fields={fields}")
+
+        assert response.status_code == 400
+        assert response.json["message"].endswith(
+            "please choose from id, first_name, last_name, email, username, role_id, created_at, updated_at"
+        )
+
     def test_get_single_user_with_hacker_mode(self, client, toggle_hacker_mode) -> None:
         user = UserFactory.create()
 
@@ -268,6 +339,24 @@ class TestUser:
         assert "first_name" in data[0]
         assert "last_name" in data[0]
 
+    def test_list_students_one_page_at_a_time(self, client, teacher_user) -> None:
+        # Test that the student filter is kept when following the next link
+        students = [StudentFactory.create() for _ in range(3)]
+
+        response = client.get("/users/list_students?limit=2")
+        next_response = client.get(response.headers["Link"].split(";")[0].strip("<>"))
+
+        assert [student["id"] for student in response.json + next_response.json] == [student.id for student in students]
+        assert "Link" not in next_response.headers
+
+    def test_list_students_keeps_the_role(self, client, teacher_user) -> None:
+        # Test that the role filter cannot widen the list of students
+        student = StudentFactory.create()
+
+        response = client.get("/users/list_students?role=teacher")
+
+        assert [row["id"] for row in response.json] == [student.id]
+
     def test_list_all_students_with_hacker_mode(self, client, toggle_hacker_mode) -> None:
         StudentFactory.create()
         StudentFactory.create()
@@ -296,3 +385,122 @@ class TestUser:
                 "Please double-check your authorisation and try again."
             )
         }
+
+    def test_bulk_create_users(self, client, admin_user, query_budget, monkeypatch) -> None:
+        # Test creating the users of an NDJSON roster in a fixed number of statements
+        monkeypatch.setattr(password_pool, "rounds", 4)
+        body = "".join(
+            json.dumps(
+                {
+                    "username": f"student-{index}",
+                    "password": "secret",
+                    "role": "student",
+                    "first_name": "First",
+                    "last_name": "Last",
+                    "email": f"student-{index}@example.com",
+                }
+            )
+            + "\n"
+            for index in range(20)
+        )
+
+        with query_budget(3):
+            response = client.post("/users/bulk", data=body, content_type="application/x-ndjson")
+
+        assert response.status_code == 200
+        assert response.json["message"] == "20 users created and 0 rows rejected"
+        assert User.count(role_id=UserRole.STUDENT.value, username__in=[f"student-{i}" for i in range(20)]) == 20
+
+    def test_bulk_create_users_as_a_teacher(self, client, teacher_user) -> None:
+        # Test that only admins can create users in bulk
+        response = client.post("/users/bulk", json=[])
+
+        assert response.status_code == 401
+
+    def test_search_users(self, client, teacher_user, query_budget) -> None:
+        # Test looking users up by the start of their username, first name, last name, full name or email, in order of
+        # username
+        ada = StudentFactory.create(username="lovelace", first_name="Ada", last_name="Lovelace", email="ada@uni.ac.uk")
+        StudentFactory.create(username="ghopper", first_name="Grace", last_name="Hopper", email="amazing.g@uni.ac.uk")
+        StudentFactory.create(username="turing", first_name="Alan", last_name="Turing", email="alan@uni.ac.uk")
+
+        def usernames(prefix: str) -> list[str]:
+            return [user["username"] for user in client.get(f"/users/search?prefix={prefix}&role=student").json]
+
+        # The token, the tag, the version the results are cached by, and the search
+        with query_budget(4):
+            response = client.get("/users/search?prefix=LOVE")
+
+        assert response.status_code == 200
+        assert response.json == [
+            {
+                "id": ada.id,
+                "first_name": "Ada",
+                "last_name": "Lovelace",
+                "email": "ada@uni.ac.uk",
+                "username": "lovelace",
+                "role_id": UserRole.STUDENT.value,
+            }
+        ]
+        assert usernames("ala") == ["turing"]
+        assert usernames("ada%20lov") == ["lovelace"]
+        assert usernames("hop") == ["ghopper"]
+        assert usernames("amazing.g@uni") == ["ghopper"]
+        assert usernames("uni") == []
+        assert usernames("ace") == []
+        assert usernames("l_ve") == []
+
+    def test_search_users_by_role_and_limit(self, client, teacher_user) -> None:
+        # Test restricting the search to a role, and limiting the number of users returned
+        student = StudentFactory.create(username="zebedee", first_name="Zebedee", email="zebedee@uni.ac.uk")
+        teacher = TeacherFactory.create(username="zeb", first_name="Zebulon", email="zebulon@uni.ac.uk")
+
+        everyone = client.get("/users/search?prefix=zeb")
+        students = client.get("/users/search?prefix=zeb&role=Student")
+        first = client.get("/users/search?prefix=zeb&limit=1")
+
+        assert [user["id"] for user in everyone.json] == [teacher.id, student.id]
+        assert [user["id"] for user in students.json] == [student.id]
+        assert [user["id"] for user in first.json] == [teacher.id]
+
+    def test_search_users_is_cached_until_a_user_is_updated(self, client, admin_user, query_budget) -> None:
+        # Test that a repeated search is answered from the cache, and that updating a user drops the cached results
+        student = StudentFactory.create(username="zebedee", first_name="Zebedee", email="zebedee@uni.ac.uk")
+        client.get("/users/search?prefix=zeb")
+
+        # The tag and the version the results are cached by, both read from table_versions
+        with query_budget(2):
+            cached = client.get("/users/search?prefix=zeb")
+        client.put(f"/users/{student.id}", json={"first_name": "Zachary"})
+        updated = client.get("/users/search?prefix=zeb")
+
+        assert cached.json[0]["first_name"] == "Zebedee"
+        assert updated.json[0]["first_name"] == "Zachary"
+        assert cache_stats()["user_searches"]["hits"] == 1
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "",
+            "prefix=",
+            "prefix=%20",
+            "prefix=ad",
+            "prefix=ad%20%20",
+            "prefix=ad@uni",
+            f"prefix={'a' * 65}",
+            "prefix=ada&role=janitor",
+            "prefix=ada&limit=0",
+            "prefix=ada&limit=51",
+        ],
+    )
+    def test_search_users_with_invalid_arguments(self, client, teacher_user, query) -> None:
+        # Test that empty, short or overlong prefixes, unknown roles and invalid limits are rejected
+        response = client.get(f"/users/search?{query}")
+
+        assert response.status_code == 400
+
+    def test_search_users_as_a_student(self, client, student_user) -> None:
+        # Test that students cannot search users
+        response = client.get("/users/search?prefix=ada")
+
+        assert response.status_code == 401
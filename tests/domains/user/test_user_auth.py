@@ -0,0 +1,88 @@
+import pytest
+
+from lms.adapters import query_tracker
+from lms.domains import Principal, UserRole
+from lms.domains.user.user_auth import resolve_auth_state
+from tests.factories import StudentFactory, TeacherFactory
+
+
+@pytest.mark.usefixtures("wipe_users_table")
+class TestUserAuth:
+    def test_resolve_auth_state(self, teacher_user) -> None:
+        # Test resolving the principal from an access token
+        state = resolve_auth_state(access_token=teacher_user.auth_token, impersonate="teacher")
+
+        assert state.hacker_mode is False
+        assert state.principal == Principal(
+            id=teacher_user.id, role_id=UserRole.TEACHER.value, username=teacher_user.username
+        )
+        assert state.principal.is_teacher()
+
+    def test_resolve_auth_state_with_unknown_token(self, db) -> None:
+        # Test resolving an unknown or missing access token
+        StudentFactory.create(auth_token=None)
+
+        assert resolve_auth_state(access_token="unknown", impersonate="teacher").principal is None
+        assert resolve_auth_state(access_token=None, impersonate="teacher").principal is None
+
+    def test_resolve_auth_state_with_hacker_mode(self, toggle_hacker_mode) -> None:
+        # Test resolving the impersonated user while hacker mode is on
+        teacher = TeacherFactory.create(username="teacher")
+        state = resolve_auth_state(access_token=None, impersonate="teacher")
+
+        assert state.hacker_mode is True
+        assert state.impersonated.id == teacher.id
+
+    def test_hacker_mode_impersonation(self, client, toggle_hacker_mode) -> None:
+        # Test that admin routes run as nobody, and that teacher routes are rejected until the teacher exists
+        assert client.get("/users/list").status_code == 200
+
+        response = client.get("/modules/list")
+
+        assert response.status_code == 401
+        assert response.json == {
+            "message": "It appears hacker mode has no 'teacher' user to impersonate. "
+            "Please create the user and try again."
+        }
+
+        TeacherFactory.create(username="teacher")
+
+        assert client.get("/modules/list").status_code == 200
+
+    def test_resolve_auth_state_uses_a_single_query(self, teacher_user) -> None:
+        # Test that the switch, the principal and the impersonated user are fetched in one round trip
+        with query_tracker.capture() as statements:
+            resolve_auth_state(access_token=teacher_user.auth_token, impersonate="teacher")
+
+        assert len(statements) == 1
+
+    def test_route_with_multiple_roles(self, client, teacher_user) -> None:
+        # Test that a route declaring several roles accepts each of them
+        response = client.get("/users/list_students")
+
+        assert response.status_code == 200
+
+    def test_warm_cache_skips_the_database(self, teacher_user) -> None:
+        # Test that a second resolution of the same token is served from the caches
+        resolve_auth_state(access_token=teacher_user.auth_token, impersonate="teacher")
+        with query_tracker.capture() as statements:
+            state = resolve_auth_state(access_token=teacher_user.auth_token, impersonate="teacher")
+
+        assert statements == []
+        assert state.principal.id == teacher_user.id
+
+    def test_role_change_invalidates_the_cache(self, client, teacher_user) -> None:
+        # Test that demoting a user takes effect immediately
+        assert client.get("/modules/list").status_code == 200
+
+        teacher_user.update({"role_id": UserRole.STUDENT.value})
+
+        assert client.get("/modules/list").status_code == 401
+
+    def test_token_rotation_invalidates_the_cache(self, client, teacher_user) -> None:
+        # Test that a rotated token is rejected immediately
+        assert client.get("/modules/list").status_code == 200
+
+        teacher_user.rotate_auth_token()
+
+        assert client.get("/modules/list").status_code == 401
@@ -1,9 +1,25 @@
+from typing import Generator
+
 import pytest
 
-from lms.domains import User
+from sqlalchemy import text
+
+from lms.adapters import versions
+from lms.domains import User, UserRole
+from lms.domains.user.user_model import user_prefix_index
 from tests.factories import UserFactory
 
 
+# Create a fixture searching users with each backend in turn, starting from an empty in-memory index
+@pytest.fixture(params=["postgres", "memory"])
+def user_search_backend(app, request) -> Generator:
+    app.config["USER_SEARCH_BACKEND"] = request.param
+    user_prefix_index.clear()
+    yield request.param
+    app.config["USER_SEARCH_BACKEND"] = "postgres"
+    user_prefix_index.clear()
+
+
 @pytest.mark.usefixtures("wipe_users_table")
 class TestUserModel:
     def test_user_init(self) -> None:
@@ -50,6 +66,19 @@ class TestUserModel:
         assert isinstance(updated_user, User)
         assert updated_user.first_name == "updated name"
 
+    def test_credential_changes_keep_the_users_version(self) -> None:
+        # Test that logging in and out, which rehash passwords and rotate tokens, leave the listed users unchanged
+        user = UserFactory.create()
+        before = versions(["users"])
+
+        user.set_password("new hash")
+        user.rotate_auth_token()
+        unchanged = versions(["users"])
+        user.update({"first_name": "updated name"})
+
+        assert unchanged == before
+        assert versions(["users"])["users"] > before["users"]
+
     def test_user_update_if_email_already_exists_rollback(self) -> None:
         # Test updating a User model with an existing email (should trigger a rollback)
         user = UserFactory.create()
@@ -57,3 +86,103 @@ class TestUserModel:
 
         with pytest.raises(ValueError):
             another_user.update({"email": user.email})
+
+    def test_user_taken(self) -> None:
+        # Test finding the emails and usernames already taken, in one query
+        user = UserFactory.create()
+
+        emails, usernames = User.taken(emails=[user.email, "free@example.com"], usernames=[user.username, "free"])
+
+        assert emails == {user.email}
+        assert usernames == {user.username}
+
+    def test_user_bulk_create(self) -> None:
+        # Test inserting many users at once, skipping the ones conflicting with an existing user
+        existing = UserFactory.create()
+        users = [
+            {
+                "username": f"bulk-{index}",
+                "password": "hash",
+                "role_id": 3,
+                "first_name": "First",
+                "last_name": "Last",
+                "email": f"bulk-{index}@example.com",
+                "auth_token": f"bulk-token-{index}",
+            }
+            for index in range(3)
+        ]
+        users[1]["email"] = existing.email
+
+        created = User.bulk_create(users)
+
+        assert sorted(user.username for user in created) == ["bulk-0", "bulk-2"]
+        assert User.find_by(username="bulk-2").id in [user.id for user in created]
+        assert User.bulk_create([]) == []
+
+    def test_user_search(self, user_search_backend) -> None:
+        # Test that both backends match the start of the words of usernames, names and emails, escaping wildcards
+        student = UserRole.STUDENT.value
+        ada = UserFactory.create(username="lovelace", first_name="Ada", last_name="Lovelace", email="ada@uni.ac.uk")
+        UserFactory.create(username="100%_sure", first_name="Grace", last_name="Hopper", email="g.hopper@uni.ac.uk")
+        UserFactory.create(
+            username="turing", first_name="Alan", last_name="Turing", email="alan@uni.ac.uk", role_id=student
+        )
+        UserFactory.create(
+            username="adams", first_name="Ada", last_name="Adams", email="adams@uni.ac.uk", role_id=student
+        )
+
+        def usernames(prefix: str, **kwargs) -> list[str]:
+            return [row[4] for row in User.search(prefix, **kwargs)]
+
+        assert User.search("  Ada   LOVE ") == [(ada.id, "Ada", "Lovelace", "ada@uni.ac.uk", "lovelace", ada.role_id)]
+        assert usernames("ada") == ["adams", "lovelace"]
+        assert usernames("ada", role_id=student) == ["adams"]
+        assert usernames("ada", limit=1) == ["adams"]
+        assert usernames("ad") == []
+        assert usernames("g.hopper@uni.ac") == ["100%_sure"]
+        assert usernames("g.hopper@example") == []
+        assert usernames("100%_") == ["100%_sure"]
+        assert usernames("1%_") == []
+        assert usernames("@uni") == []
+
+    def test_user_search_follows_writes(self, user_search_backend) -> None:
+        # Test that users created, created in bulk or updated after a search are found by their current details
+        ada = UserFactory.create(username="lovelace", first_name="Ada", last_name="Lovelace", email="ada@uni.ac.uk")
+        assert [row[0] for row in User.search("ada")] == [ada.id]
+
+        grace = User.create("ghopper", "hash", 3, "Grace", "Hopper", "grace@uni.ac.uk", "grace-token")
+        User.bulk_create(
+            [
+                {
+                    "username": "turing",
+                    "password": "hash",
+                    "role_id": 3,
+                    "first_name": "Alan",
+                    "last_name": "Turing",
+                    "email": "alan@uni.ac.uk",
+                    "auth_token": "alan-token",
+                }
+            ]
+        )
+        ada.update({"first_name": "Augusta", "email": "countess@uni.ac.uk"})
+
+        assert User.search("ada") == []
+        assert [row[1] for row in User.search("aug")] == ["Augusta"]
+        assert [row[4] for row in User.search("lov")] == ["lovelace"]
+        assert [row[0] for row in User.search("grace hop")] == [grace.id]
+        assert [row[4] for row in User.search("tur")] == ["turing"]
+
+    def test_user_search_follows_writes_of_other_processes(self, db) -> None:
+        # Test that cached results are retired by a write that bypasses the model, as another worker's would
+        UserFactory.create(username="lovelace", first_name="Ada", last_name="Lovelace", email="ada@uni.ac.uk")
+        assert [row[4] for row in User.search("ada")] == ["lovelace"]
+
+        db.session.execute(
+            text(
+                "INSERT INTO users (username, password, role_id, first_name, last_name, email) "
+                "VALUES ('adams', 'hash', 3, 'Ada', 'Adams', 'adams@uni.ac.uk')"
+            )
+        )
+        db.session.commit()
+
+        assert [row[4] for row in User.search("ada")] == ["adams", "lovelace"]
@@ -1,6 +1,9 @@
+import json
+
 import pytest
 
-from lms.domains import UserService
+from lms.adapters import PoolSaturated, password_pool
+from lms.domains import User, UserService
 from tests.factories import UserFactory
 
 
@@ -75,29 +78,120 @@ class TestUserService:
         # Test user login
         hashed_password = "$2b$12$nWgf5G0gVy.gTz2vK2IPSe.PeCHr2yRZPybuLY19ZOC9qlavSVi7y"  # equals to `test`
         user = UserFactory.create(password=hashed_password)
-        message, status = UserService().login(username=user.username, password="test")
+        message, status, token = UserService().login(username=user.username, password="test")
 
         assert message == "Successfully logged-in"
         assert status == 200
+        assert token == user.auth_token
+
+    def test_user_login_rehashes_password_with_a_different_work_factor(self, monkeypatch) -> None:
+        # Test that a successful login upgrades the stored hash to the configured work factor
+        monkeypatch.setattr(password_pool, "rounds", 4)
+        hashed_password = "$2b$12$nWgf5G0gVy.gTz2vK2IPSe.PeCHr2yRZPybuLY19ZOC9qlavSVi7y"  # equals to `test`
+        user = UserFactory.create(password=hashed_password)
+        message, status, token = UserService().login(username=user.username, password="test")
+
+        assert status == 200
+        assert User.get(user.id).password.startswith("$2b$04$")
+        assert UserService().login(username=user.username, password="test")[1] == 200
 
     def test_user_login_with_invalid_username(self) -> None:
         # Test user login with an invalid username
         hashed_password = "$2b$12$nWgf5G0gVy.gTz2vK2IPSe.PeCHr2yRZPybuLY19ZOC9qlavSVi7y"  # equals to `test`
         UserFactory.create(password=hashed_password)
-        message, status = UserService().login(username="Invalid Username", password="test")
+        message, status, token = UserService().login(username="Invalid Username", password="test")
 
         assert (
             message == "An error occurred while trying to log-in, please double-check your credentials and try again."
         )
         assert status == 422
+        assert token is None
 
     def test_user_login_with_invalid_password(self) -> None:
         # Test user login with an invalid password
         hashed_password = "$2b$12$nWgf5G0gVy.gTz2vK2IPSe.PeCHr2yRZPybuLY19ZOC9qlavSVi7y"  # equals to `test`
         user = UserFactory.create(password=hashed_password)
-        message, status = UserService().login(username=user.username, password="invalid")
+        message, status, token = UserService().login(username=user.username, password="invalid")
 
         assert (
             message == "An error occurred while trying to log-in, please double-check your credentials and try again."
         )
         assert status == 422
+        assert token is None
+
+    def test_bulk_create_users(self, monkeypatch) -> None:
+        # Test creating the users of a JSON roster, reporting the rejected rows by their position
+        monkeypatch.setattr(password_pool, "rounds", 4)
+        existing = UserFactory.create()
+        user = {"password": "secret", "role": "student", "first_name": "First", "last_name": "Last"}
+        roster = [
+            {**user, "username": "ada", "email": "ada@example.com"},
+            {**user, "username": "alan", "email": "alan@example.com", "role": "teacher"},
+            {**user, "username": "ada2", "email": "ada@example.com"},
+            {**user, "username": existing.username, "email": "new@example.com"},
+            {**user, "username": "grace", "email": existing.email},
+            {**user, "username": "edsger", "email": "edsger@example.com", "role": "janitor"},
+            {**user, "username": "barbara", "email": None},
+            "not a user",
+        ]
+
+        report, status = UserService().bulk_create(lines=[json.dumps(roster).encode()], media_type="application/json")
+
+        assert status == 200
+        assert report["message"] == "2 users created and 6 rows rejected"
+        assert [(user["row"], user["username"]) for user in report["users"]] == [(1, "ada"), (2, "alan")]
+        assert report["errors"] == [
+            {"row": 3, "message": "Email ada@example.com appears earlier in the roster"},
+            {"row": 4, "message": f"User with username {existing.username} already exists"},
+            {"row": 5, "message": f"User with email {existing.email} already exists"},
+            {"row": 6, "message": "Invalid role janitor"},
+            {"row": 7, "message": "Missing email"},
+            {"row": 8, "message": "Not a JSON object"},
+        ]
+        alan = User.get(report["users"][1]["id"])
+        assert alan.is_teacher() and alan.auth_token
+        assert password_pool.check("secret", alan.password)
+
+    def test_bulk_create_users_from_csv(self, monkeypatch) -> None:
+        # Test creating the users of a CSV roster
+        monkeypatch.setattr(password_pool, "rounds", 4)
+        lines = [
+            b"username,password,role,first_name,last_name,email\n",
+            b"ada,secret,student,Ada,Lovelace,ada@example.com\n",
+            b"alan,secret,student,Alan,Turing,alan@example.com\n",
+        ]
+
+        report, status = UserService().bulk_create(lines=lines, media_type="text/csv")
+
+        assert status == 200
+        assert (report["created"], report["rejected"]) == (2, 0)
+        assert User.find_by(username="alan").last_name == "Turing"
+
+    def test_bulk_create_users_with_invalid_roster(self) -> None:
+        # Test that rosters of another type, malformed JSON and CSV files without every field are refused
+        service = UserService()
+
+        assert service.bulk_create(lines=[b"users"], media_type="text/plain")[1] == 415
+        assert service.bulk_create(lines=[b"[{"], media_type="application/json") == (
+            {"message": "The roster is not valid JSON"},
+            422,
+        )
+        assert service.bulk_create(lines=[b"{}"], media_type="application/json") == (
+            {"message": "The roster must be a JSON array of users"},
+            422,
+        )
+        assert service.bulk_create(lines=[b"username,email\n"], media_type="text/csv")[1] == 422
+
+    def test_bulk_create_users_when_password_pool_is_busy(self, monkeypatch) -> None:
+        # Test that a roster is refused, and nothing created, while another one is being hashed
+        def saturated(*args, **kwargs):
+            raise PoolSaturated()
+
+        monkeypatch.setattr(password_pool, "hash_many", saturated)
+        roster = [{"username": "ada", "password": "secret", "role": "student", "first_name": "A", "last_name": "L"}]
+        roster[0]["email"] = "ada@example.com"
+
+        report, status = UserService().bulk_create(lines=[json.dumps(roster).encode()], media_type="application/json")
+
+        assert status == 503
+        assert not User.exists(username="ada")
@@ -1,8 +1,10 @@
 import json
 import os
 
-# Import the AUTH_TOKEN_PATH from the test configuration.
-from tests.conftest import AUTH_TOKEN_PATH
+from lms.adapters import PoolSaturated, password_pool
+from lms.common import AUTH_TOKEN_PATH
+from lms.domains import User
+from tests.conftest import authenticate
 
 
 # Define a test class for the Flask application.
@@ -40,9 +42,38 @@ class TestApp:
         response = client.post("/login", json={"username": username, "password": password})
         data = json.loads(response.data)
 
-        # Assert that the response status code is 200 and that the login was successful.
+        # Assert that the response status code is 200 and that the login returned the user's bearer token.
         assert response.status_code == 200
-        assert data == {"message": "Successfully logged-in"}
+        assert data == {"message": "Successfully logged-in", "token": User.find_by(username=username).auth_token}
+
+        # Assert that the returned token authenticates subsequent requests.
+        authenticate(client, data["token"])
+        assert client.get("/users/list").status_code == 200
+
+    # Test that the legacy token file is only used when the fallback is enabled.
+    def test_login_with_token_file_fallback(self, app, client, admin_user, monkeypatch) -> None:
+        monkeypatch.setitem(app.config, "AUTH_TOKEN_FILE_FALLBACK", True)
+        client.environ_base.pop("HTTP_AUTHORIZATION")
+
+        # Log in as the admin user and verify the token is written to the shared file.
+        admin_user.password = "$2b$12$nWgf5G0gVy.gTz2vK2IPSe.PeCHr2yRZPybuLY19ZOC9qlavSVi7y"  # equals to `test`
+        response = client.post("/login", json={"username": admin_user.username, "password": "test"})
+        assert response.status_code == 200
+        with open(AUTH_TOKEN_PATH, "r") as file:
+            assert file.read() == admin_user.auth_token
+
+        # Assert that requests without a header are authenticated from the file, and that logging out removes it.
+        assert client.get("/users/list").status_code == 200
+        assert client.put("/logout").status_code == 200
+        assert not os.path.exists(AUTH_TOKEN_PATH)
+
+    # Test that requests without a bearer token are rejected when the fallback is disabled.
+    def test_request_without_bearer_token(self, client, admin_user) -> None:
+        client.environ_base.pop("HTTP_AUTHORIZATION")
+
+        response = client.get("/users/list")
+
+        assert response.status_code == 401
 
     # Test logging in with an invalid password.
     def test_login_with_invalid_password(self, client) -> None:
@@ -85,17 +116,31 @@ class TestApp:
             "message": "An error occurred while trying to log-in, please double-check your credentials and try again."
         }
 
+    # Test that logins are shed with a 503 when the password worker pool is saturated.
+    def test_login_when_password_pool_is_saturated(self, client, admin_user, monkeypatch) -> None:
+        def saturated(*args, **kwargs) -> None:
+            raise PoolSaturated()
+
+        monkeypatch.setattr(password_pool, "check", saturated)
+
+        response = client.post("/login", json={"username": admin_user.username, "password": "password"})
+        data = json.loads(response.data)
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert data == {"message": "The service is busy right now, please try again in a moment"}
+
     # Test the logout functionality.
     def test_logout(self, client, admin_user) -> None:
-        # Check if the AUTH_TOKEN_PATH file exists (indicating a user is logged in).
-        assert os.path.exists(AUTH_TOKEN_PATH)
+        # Check that the bearer token authenticates the user.
+        assert client.get("/users/list").status_code == 200
 
-        # Log out the user and verify the response and file existence.
+        # Log out the user and verify the response.
         response = client.put("/logout")
         data = json.loads(response.data)
 
         # Assert that the response status code is 200, the logout was successful,
-        # and the AUTH_TOKEN_PATH file no longer exists.
+        # and the previous token has been revoked.
         assert response.status_code == 200
         assert data == {"message": "Successfully logged-out of the app"}
-        assert not os.path.exists(AUTH_TOKEN_PATH)
+        assert client.get("/users/list").status_code == 401
@@ -0,0 +1,231 @@
+import json
+
+from datetime import date, datetime
+from typing import Any, Callable
+
+import pytest
+
+from sqlalchemy import delete, event, func, literal_column, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+
+from lms.domains import Assignment, Grade, Module, User, UserRole
+from lms.domains.module.module_model import _gradebook_statement
+
+
+# Create a fixture seeding a dataset large enough for the planner to prefer indexes over sequential scans:
+# 50k users of which 1k students and 1k teachers, 2k modules, 10k assignments and 50k grades.
+# Records are created a minute apart, modules have a short description, and assignments are due over a year, one in
+# ten without a due date.
+# The rows are inserted inside the test transaction and rolled back with it.
+@pytest.fixture
+def large_dataset(db) -> None:
+    for statement in (
+        """
+        INSERT INTO users (id, username, password, first_name, last_name, email, role_id, created_at)
+        SELECT n, 'plan-user-' || n, 'x', 'First', 'Last', 'plan-user-' || n || '@example.com',
+               CASE WHEN n % 50 = 0 THEN 3 WHEN n % 50 = 10 THEN 2 ELSE 1 END,
+               TIMESTAMP '2024-01-01' + (n - 1000000) * INTERVAL '1 minute'
+        FROM generate_series(1000001, 1050000) AS n
+        """,
+        """
+        INSERT INTO modules (id, title, description, teacher_id, created_at)
+        SELECT n, 'Module ' || n, repeat('Lectures, seminars and coursework. ', 10), 1000010 + (n % 1000) * 50,
+               TIMESTAMP '2024-01-01' + (n - 1000000) * INTERVAL '1 minute'
+        FROM generate_series(1000001, 1002000) AS n
+        """,
+        """
+        INSERT INTO assignments (id, title, description, module_id, due_date, created_at)
+        SELECT n, 'Assignment ' || n, 'Description', 1000001 + n % 2000,
+               CASE WHEN n % 10 <> 0 THEN DATE '2030-01-01' + (n * 7) % 365 END,
+               TIMESTAMP '2024-01-01' + (n - 1000000) * INTERVAL '1 minute'
+        FROM generate_series(1000001, 1010000) AS n
+        """,
+        """
+        INSERT INTO grades (student_id, assignment_id, score)
+        SELECT 1000050 + (n % 1000) * 50, 1000001 + (n - 1) / 5, 50
+        FROM generate_series(1, 50000) AS n
+        """,
+        "ANALYZE users, modules, assignments, grades",
+    ):
+        db.session.execute(text(statement))
+
+
+# Define a helper returning the scan nodes of a statement's plan as (node type, relation, index) tuples
+def scans(db, statement) -> list[tuple[str, str | None, str | None]]:
+    sql = statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    return [node for node in plan_nodes(plan) if "Scan" in node[0]]
+
+
+# Define a helper returning every node of a JSON plan as (node type, relation, index, estimated rows) tuples
+def plan_nodes(plan) -> list[tuple[str, str | None, str | None, int]]:
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+
+    nodes, pending = [], [plan[0]["Plan"]]
+    while pending:
+        node = pending.pop()
+        pending.extend(node.get("Plans", []))
+        nodes.append((node["Node Type"], node.get("Relation Name"), node.get("Index Name"), node["Plan Rows"]))
+    return nodes
+
+
+# Define a helper returning the plan of the statement run by `model.paginate(**kwargs)`, on the page following the
+# first one when `second_page` is set, as sent to the database with its parameters
+def page_plan(db, model, second_page: bool = False, **kwargs) -> list[tuple[str, str | None, str | None, int]]:
+    if second_page:
+        kwargs["after"] = model.paginate(**kwargs).next_cursor
+        assert kwargs["after"], kwargs
+
+    return last_plan(db, lambda: model.paginate(**kwargs))
+
+
+# Define a helper returning the plan of the last statement run by `call`, as sent to the database with its parameters
+def last_plan(db, call: Callable[[], Any]) -> list[tuple[str, str | None, str | None, int]]:
+    executed = []
+    listener = lambda conn, cursor, statement, parameters, *args: executed.append((statement, parameters))  # noqa: E731
+    event.listen(Engine, "before_cursor_execute", listener)
+    try:
+        call()
+    finally:
+        event.remove(Engine, "before_cursor_execute", listener)
+
+    statement, parameters = executed[-1]
+    plan = db.session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    return plan_nodes(plan)
+
+
+# Define the text search configuration of the search documents, as a literal SQL value
+ENGLISH = literal_column("'english'")
+
+
+# Define the hot queries of the application, with the index each one should be served by
+HOT_QUERIES = {
+    # GET /grades/view and User.grades
+    "grades of a student": (
+        select(Grade.student_id, Grade.assignment_id, Grade.score).where(Grade.student_id == 1000050),
+        "grades_student_id_assignment_id_key",
+    ),
+    # One student's grade for one assignment
+    "grade of a student for an assignment": (
+        select(Grade).where(Grade.student_id == 1000050, Grade.assignment_id == 1000002),
+        "grades_student_id_assignment_id_key",
+    ),
+    # Deleting a student cascades to their grades
+    "grades deleted with a student": (
+        delete(Grade).where(Grade.student_id == 1000050),
+        "grades_student_id_assignment_id_key",
+    ),
+    # Assignment.grades and the cascade from a deleted assignment
+    "grades of an assignment": (select(Grade).where(Grade.assignment_id == 1000002), "grades_assignment_id_idx"),
+    # Module.assignments and the cascade from a deleted module
+    "assignments of a module": (
+        select(Assignment).where(Assignment.module_id == 1000002),
+        "assignments_module_id_due_date_id_idx",
+    ),
+    # User.modules and the cascade from a deleted teacher
+    "modules of a teacher": (select(Module).where(Module.teacher_id == 1000010), "modules_teacher_id_id_idx"),
+    # GET /modules/<id>/gradebook
+    "gradebook of a module": (_gradebook_statement().params(module_id=1000002), "grades_assignment_id_idx"),
+    # GET /search, matching the generated search documents
+    "search modules": (
+        select(Module.id).where(Module.search_vector.op("@@")(func.plainto_tsquery(ENGLISH, "1000002"))),
+        "modules_search_vector_idx",
+    ),
+    "search assignments": (
+        select(Assignment.id).where(Assignment.search_vector.op("@@")(func.plainto_tsquery(ENGLISH, "1000002"))),
+        "assignments_search_vector_idx",
+    ),
+    # GET /users/list_students, one page at a time
+    "page of students": (
+        select(User.id, User.first_name, User.last_name)
+        .where(User.role_id == UserRole.STUDENT.value, User.id > 1025000)
+        .order_by(User.id)
+        .limit(101),
+        "users_role_id_id_idx",
+    ),
+}
+
+
+@pytest.mark.usefixtures("large_dataset")
+def test_hot_queries_use_their_index(db) -> None:
+    # Test that the planner serves each hot query from its index rather than a sequential scan
+    for name, (statement, index) in HOT_QUERIES.items():
+        nodes = scans(db, statement)
+
+        assert index in [index_name for _, _, index_name, _ in nodes], (name, nodes)
+        assert "Seq Scan" not in [node_type for node_type, _, _, _ in nodes], (name, nodes)
+
+
+# Define the filters and sort orders of the list endpoints, as passed to paginate, with the index serving each page
+LIST_QUERIES = {
+    # GET /assignments/list?module_id=...&due_date__gt=...&sort=due_date
+    "assignments of a module due after a date": (
+        Assignment,
+        {"order_by": "due_date", "module_id": 1000002, "due_date__gt": date(2030, 3, 1)},
+        "assignments_module_id_due_date_id_idx",
+    ),
+    # GET /assignments/list?sort=due_date, past the first page
+    "assignments by due date": (
+        Assignment,
+        {"order_by": "due_date", "second_page": True},
+        "assignments_due_date_id_idx",
+    ),
+    # GET /assignments/list?due_date__gte=...&due_date__lt=...&sort=due_date
+    "assignments due within a range": (
+        Assignment,
+        {"order_by": "due_date", "due_date__gte": date(2030, 3, 1), "due_date__lt": date(2030, 3, 8)},
+        "assignments_due_date_id_idx",
+    ),
+    # GET /assignments/list?sort=-created_at, past the first page
+    "newest assignments": (
+        Assignment,
+        {"order_by": "-created_at", "second_page": True},
+        "assignments_created_at_id_idx",
+    ),
+    # GET /modules/list?teacher_id=...
+    "modules of a teacher": (Module, {"teacher_id": 1000010}, "modules_teacher_id_id_idx"),
+    # GET /modules/list?created_at__gte=...&sort=created_at
+    "modules created since a date": (
+        Module,
+        {"order_by": "created_at", "created_at__gte": datetime(2024, 1, 2)},
+        "modules_created_at_id_idx",
+    ),
+    # GET /users/list?role=teacher, past the first page
+    "teachers": (User, {"role_id": UserRole.TEACHER.value, "second_page": True}, "users_role_id_id_idx"),
+    # GET /users/list?created_at__lt=...&sort=-created_at
+    "users created before a date": (
+        User,
+        {"order_by": "-created_at", "created_at__lt": datetime(2024, 1, 20)},
+        "users_created_at_id_idx",
+    ),
+}
+
+
+@pytest.mark.usefixtures("large_dataset")
+@pytest.mark.parametrize("name", LIST_QUERIES)
+def test_list_queries_use_their_index(db, name) -> None:
+    # Test that each page of a filtered and sorted list is read from its index without a sequential scan, and that
+    # the planner never sorts more than two pages of rows: those of a handful of matches, or the union of the rows
+    # after a cursor on a nullable sort key and its NULL rows
+    model, kwargs, index = LIST_QUERIES[name]
+    nodes = page_plan(db, model, limit=100, view="list", **kwargs)
+
+    assert index in [index_name for _, _, index_name, _ in nodes], nodes
+    assert "Seq Scan" not in [node_type for node_type, _, _, _ in nodes], nodes
+    assert all(rows <= 2 * 101 for node_type, _, _, rows in nodes if node_type == "Sort"), nodes
+
+
+@pytest.mark.usefixtures("large_dataset")
+@pytest.mark.parametrize("prefix", ["plan-user-104999", "plan-user-1049"])
+def test_user_search_uses_the_trigram_index(db, prefix) -> None:
+    # Test that GET /users/search matches the search documents of users through their trigram index, rather than
+    # walking the username index, even when a hundred users match and they all sort last
+    if not db.session.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar():
+        pytest.skip("pg_trgm is not installed (db/migrations/V9__user_search_document.sql)")
+
+    nodes = last_plan(db, lambda: User.search(prefix))
+
+    assert "users_search_trgm_idx" in [index_name for _, _, index_name, _ in nodes], nodes
+    assert "users_username_key" not in [index_name for _, _, index_name, _ in nodes], nodes
+    assert "Seq Scan" not in [node_type for node_type, _, _, _ in nodes], nodes